@@ -0,0 +1,484 @@
+""" Benchmark the lifecycle of headless applications with many plugins.
+
+Run it with::
+
+    python application_lifecycle.py [options]
+
+For each number of plugins (see '--plugins'), it builds an 'Application' with
+that many synthetic plugins (plus the core plugin) and times:-
+
+- 'construct' (creating the plugins)
+- '__init__'  (creating the application)
+- 'start'     (starting the application)
+- 'stop'      (stopping the application)
+
+and the average cost of some common operations on the started application
+(getting extensions and services, adding and removing a plugin etc). It also
+reports how much the resident set size of the process grows while the
+application is built and started.
+
+Each synthetic plugin offers '--extension-points' extension points and
+contributes to '--contributions' extension points offered by other plugins.
+It also contributes '--service-offers' service offers, '--categories'
+categories and '--class-load-hooks' class load hooks (for classes that are
+never loaded) to the core plugin's extension points.
+
+Each application is built in a new process (so that the sizes don't affect
+each other, and class load hooks, which are global, don't pile up). Use
+'--repeat' to run each size several times and keep the fastest times.
+
+To gate a change, save the results before making it, and compare against them
+afterwards::
+
+    python application_lifecycle.py --save before.json
+    ...
+    python application_lifecycle.py --compare before.json --tolerance 0.2
+
+The comparison exits with a non-zero status if any phase or operation is more
+than 'tolerance' slower than it was before (phases that take less than a
+millisecond are ignored as they are too noisy).
+
+"""
+
+
+# Standard library imports.
+import gc, json, optparse, os, subprocess, sys, time
+
+# Enthought library imports.
+from envisage.api import Application, Category, ClassLoadHook
+from envisage.api import ExtensionPoint, Plugin, ServiceOffer
+from envisage.core_plugin import CorePlugin
+from envisage.plugin_profiler import _get_rss
+from traits.api import HasTraits, Interface, List, provides
+
+
+# The phases of the application's lifecycle that are timed.
+PHASES = ['construct', '__init__', 'start', 'stop']
+
+# Phases and operations that take less than this (in seconds) are not
+# compared.
+MINIMUM_SECONDS = 0.001
+
+
+class IBenchmarkService(Interface):
+    """ The protocol of the services offered by the synthetic plugins. """
+
+
+@provides(IBenchmarkService)
+class BenchmarkService(HasTraits):
+    """ The services offered by the synthetic plugins. """
+
+
+def get_extension_point_id(plugin_index, index):
+    """ Return the Id of an extension point offered by a synthetic plugin. """
+
+    return 'benchmark.plugin%d.extension_point%d' % (plugin_index, index)
+
+
+def on_load(cls):
+    """ The class load hooks (which are never called). """
+
+    return
+
+
+def create_plugin_classes(count, options):
+    """ Create the classes of the synthetic plugins. """
+
+    # A plugin can't contribute to more than one extension point of each of
+    # the other plugins (it is not worth making the contributions any more
+    # complicated than that).
+    contributions = min(options.contributions, count - 1)
+    if options.extension_points == 0:
+        contributions = 0
+
+    classes = []
+    for i in xrange(count):
+        namespace = {
+            'id'   : 'benchmark.plugin%d' % i,
+            'name' : 'Plugin %d' % i
+        }
+
+        for j in xrange(options.extension_points):
+            namespace['extension_point%d' % j] = ExtensionPoint(
+                List, id=get_extension_point_id(i, j)
+            )
+
+        for j in xrange(contributions):
+            namespace['contribution%d' % j] = List(
+                [i],
+                contributes_to=get_extension_point_id(
+                    (i + 1 + j) % count, j % options.extension_points
+                )
+            )
+
+        namespace['service_offers'] = List(
+            [
+                ServiceOffer(
+                    protocol=IBenchmarkService, factory=BenchmarkService
+                )
+                for j in xrange(options.service_offers)
+            ],
+            contributes_to=CorePlugin.SERVICE_OFFERS
+        )
+
+        namespace['categories'] = List(
+            [
+                Category(
+                    class_name        = 'benchmark_categories.Category%d' % j,
+                    target_class_name = 'benchmark_targets.Target%d_%d' % (
+                        i, j
+                    )
+                )
+                for j in xrange(options.categories)
+            ],
+            contributes_to=CorePlugin.CATEGORIES
+        )
+
+        namespace['class_load_hooks'] = List(
+            [
+                ClassLoadHook(
+                    class_name = 'benchmark_targets.Hooked%d_%d' % (i, j),
+                    on_load    = on_load
+                )
+                for j in xrange(options.class_load_hooks)
+            ],
+            contributes_to=CorePlugin.CLASS_LOAD_HOOKS
+        )
+
+        classes.append(type('SyntheticPlugin%d' % i, (Plugin,), namespace))
+
+    return classes
+
+
+def time_per_operation(function, count):
+    """ Return the average time (in seconds) of calls to a function. """
+
+    gc.collect()
+
+    start = time.time()
+    for i in xrange(count):
+        function()
+
+    return (time.time() - start) / count
+
+
+def run(count, options):
+    """ Run the benchmark for a single number of plugins.
+
+    Returns a dictionary in the form::
+
+        {
+            'phases'     : { phase : seconds },
+            'operations' : { operation : seconds },
+            'memory'     : bytes (or None if it can't be measured)
+        }
+
+    """
+
+    classes = create_plugin_classes(count, options)
+
+    # The plugin added and removed in the 'add_remove_plugin' operation.
+    extra = create_plugin_classes(1, options)[0](id='benchmark.extra')
+
+    gc.collect()
+    rss = _get_rss()
+
+    phases = {}
+
+    start = time.time()
+    plugins = [CorePlugin()] + [klass() for klass in classes]
+    phases['construct'] = time.time() - start
+
+    start = time.time()
+    application = Application(
+        id='benchmark.application_lifecycle', plugins=plugins
+    )
+    phases['__init__'] = time.time() - start
+
+    start = time.time()
+    application.start()
+    phases['start'] = time.time() - start
+
+    gc.collect()
+    if rss is not None:
+        memory = _get_rss() - rss
+
+    else:
+        memory = None
+
+    operations = {}
+    repeat = options.operations
+
+    if options.extension_points > 0:
+        extension_point_id = get_extension_point_id(0, 0)
+        operations['get_extensions'] = time_per_operation(
+            lambda: application.get_extensions(extension_point_id), repeat
+        )
+
+    if options.service_offers > 0:
+        operations['get_service'] = time_per_operation(
+            lambda: application.get_service(IBenchmarkService), repeat
+        )
+
+    plugin_id = 'benchmark.plugin%d' % (count - 1)
+    operations['get_plugin'] = time_per_operation(
+        lambda: application.get_plugin(plugin_id), repeat
+    )
+
+    service = BenchmarkService()
+    def register_and_unregister_service():
+        application.unregister_service(
+            application.register_service(IBenchmarkService, service)
+        )
+
+    operations['register_unregister_service'] = time_per_operation(
+        register_and_unregister_service, repeat
+    )
+
+    def add_and_remove_plugin():
+        application.add_plugin(extra)
+        application.remove_plugin(extra)
+
+    operations['add_remove_plugin'] = time_per_operation(
+        add_and_remove_plugin, max(1, repeat / 10)
+    )
+
+    start = time.time()
+    application.stop()
+    phases['stop'] = time.time() - start
+
+    return {'phases' : phases, 'operations' : operations, 'memory' : memory}
+
+
+def run_in_subprocess(count, argv):
+    """ Run the benchmark for a single number of plugins in a new process.
+
+    'argv' is the command line of this process (all of the options except
+    '--plugins' are passed on to the new process).
+
+    """
+
+    # 'subprocess.check_output' isn't available in Python 2.6.
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--single', str(count)]
+        + argv,
+        stdout=subprocess.PIPE
+    )
+    output = process.communicate()[0]
+    if process.returncode != 0:
+        raise RuntimeError(
+            'benchmark of %d plugins failed (%d)' % (count, process.returncode)
+        )
+
+    # The results are on the last line (in case a plugin prints anything!).
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def merge(results, new):
+    """ Merge the results of two runs (keeping the fastest times). """
+
+    if results is None:
+        return new
+
+    for key in ['phases', 'operations']:
+        for name, seconds in new[key].items():
+            results[key][name] = min(results[key].get(name, seconds), seconds)
+
+    if results['memory'] is not None and new['memory'] is not None:
+        results['memory'] = min(results['memory'], new['memory'])
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """ Compare results with a baseline.
+
+    Returns a list of the regressions in the form::
+
+        [(count, name, seconds, baseline_seconds), ...]
+
+    """
+
+    regressions = []
+    for count, result in sorted_by_count(results):
+        if count not in baseline:
+            continue
+
+        for key in ['phases', 'operations']:
+            for name, seconds in sorted(result[key].items()):
+                baseline_seconds = baseline[count][key].get(name)
+                if baseline_seconds is None:
+                    continue
+
+                if max(seconds, baseline_seconds) < MINIMUM_SECONDS:
+                    continue
+
+                if seconds > baseline_seconds * (1 + tolerance):
+                    regressions.append(
+                        (count, name, seconds, baseline_seconds)
+                    )
+
+    return regressions
+
+
+def sorted_by_count(results):
+    """ Return the results as a list of (count, result) in order of count. """
+
+    return sorted(results.items(), key=lambda item: int(item[0]))
+
+
+def report(results):
+    """ Print the results. """
+
+    print '%8s %s %10s' % (
+        'plugins', ' '.join('%10s' % phase for phase in PHASES), 'memory'
+    )
+
+    for count, result in sorted_by_count(results):
+        if result['memory'] is None:
+            memory = 'n/a'
+
+        else:
+            memory = '%.1fMB' % (result['memory'] / (1024.0 * 1024.0))
+
+        print '%8s %s %10s' % (
+            count,
+            ' '.join(
+                '%9.3fs' % result['phases'][phase] for phase in PHASES
+            ),
+            memory
+        )
+
+    print
+    print 'Average cost of each operation (microseconds):-'
+    for count, result in sorted_by_count(results):
+        print '%8s %s' % (
+            count,
+            ', '.join(
+                '%s %.1f' % (name, seconds * 1e6)
+                for name, seconds in sorted(result['operations'].items())
+            )
+        )
+
+    return
+
+
+def get_option_parser():
+    """ Return the command line option parser. """
+
+    parser = optparse.OptionParser(
+        usage='%prog [options]', description=__doc__.split('\n')[0]
+    )
+
+    parser.add_option(
+        '--plugins', default='10,100,500,1000,2000',
+        help='comma separated numbers of plugins [%default]'
+    )
+    parser.add_option(
+        '--extension-points', type='int', default=2,
+        help='extension points offered by each plugin [%default]'
+    )
+    parser.add_option(
+        '--contributions', type='int', default=2,
+        help='extension points each plugin contributes to [%default]'
+    )
+    parser.add_option(
+        '--service-offers', type='int', default=1,
+        help='service offers contributed by each plugin [%default]'
+    )
+    parser.add_option(
+        '--categories', type='int', default=0,
+        help='categories contributed by each plugin [%default]'
+    )
+    parser.add_option(
+        '--class-load-hooks', type='int', default=0,
+        help='class load hooks contributed by each plugin [%default]'
+    )
+    parser.add_option(
+        '--operations', type='int', default=1000,
+        help='times to repeat each operation [%default]'
+    )
+    parser.add_option(
+        '--repeat', type='int', default=1,
+        help='times to run each number of plugins [%default]'
+    )
+    parser.add_option(
+        '--save', metavar='FILE', help='save the results to a JSON file'
+    )
+    parser.add_option(
+        '--compare', metavar='FILE',
+        help='compare the results with those saved in a JSON file'
+    )
+    parser.add_option(
+        '--tolerance', type='float', default=0.2,
+        help='fraction by which times can regress [%default]'
+    )
+
+    # Used internally to run a single number of plugins in a new process.
+    parser.add_option('--single', type='int', help=optparse.SUPPRESS_HELP)
+
+    return parser
+
+
+def main(argv):
+    """ Entry point. """
+
+    parser = get_option_parser()
+    options, args = parser.parse_args(argv[1:])
+
+    if options.single is not None:
+        print json.dumps(run(options.single, options))
+        return 0
+
+    # Pass the options that describe the plugins on to each new process.
+    single_argv = []
+    for name in ['extension_points', 'contributions', 'service_offers',
+                 'categories', 'class_load_hooks', 'operations']:
+        single_argv.extend(
+            ['--%s' % name.replace('_', '-'), str(getattr(options, name))]
+        )
+
+    results = {}
+    for count in [int(count) for count in options.plugins.split(',')]:
+        result = None
+        for i in xrange(options.repeat):
+            result = merge(result, run_in_subprocess(count, single_argv))
+
+        # JSON keys are always strings.
+        results[str(count)] = result
+
+    report(results)
+
+    if options.save is not None:
+        with open(options.save, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+    status = 0
+    if options.compare is not None:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, options.tolerance)
+
+        print
+        if len(regressions) > 0:
+            print 'Regressions (more than %d%% slower):-' % (
+                options.tolerance * 100
+            )
+            for count, name, seconds, baseline_seconds in regressions:
+                print '%8s %-30s %10.6fs (was %.6fs)' % (
+                    count, name, seconds, baseline_seconds
+                )
+
+            status = 1
+
+        else:
+            print 'No regressions.'
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+#### EOF ######################################################################
@@ -0,0 +1,213 @@
+""" Benchmark the event objects created when plugins are added and removed.
+
+Run it with::
+
+    python bulk_plugin_events.py [number_of_plugins]
+
+It compares the cost of creating the (slotted) event classes that Envisage
+uses now with the classes that it used to use, and then counts the events
+created while adding and removing plugins one at a time (which creates a
+plugin event, and an extension point changed event for each extension point
+that a plugin contributes to, for every plugin) and in bulk.
+
+"""
+
+
+# Standard library imports.
+import gc, sys, time
+
+# Enthought library imports.
+from envisage.api import Application, ExtensionPoint, Plugin
+from envisage.extension_point_changed_event import ExtensionPointChangedEvent
+from envisage.plugin_event import PluginEvent
+from traits.api import Instance, List, TraitListEvent, Vetoable
+
+
+class LegacyPluginEvent(Vetoable):
+    """ The 'HasTraits' based plugin event that Envisage used to use. """
+
+    plugin = Instance('envisage.api.IPlugin')
+
+    old_plugin = Instance('envisage.api.IPlugin')
+
+    plugins = List(Instance('envisage.api.IPlugin'))
+
+
+class LegacyExtensionPointChangedEvent(TraitListEvent):
+    """ The extension point changed event that Envisage used to use. """
+
+    def __init__ (self, extension_point_id=None, **kw):
+        """ Constructor. """
+
+        super(LegacyExtensionPointChangedEvent, self).__init__(**kw)
+
+        self.extension_point_id = extension_point_id
+
+        return
+
+
+class Host(Plugin):
+    """ A plugin that offers an extension point. """
+
+    id = 'benchmark.host'
+
+    things = ExtensionPoint(List, id='benchmark.things')
+
+
+class Contributor(Plugin):
+    """ A plugin that contributes to the extension point. """
+
+    things = List([1, 2, 3], contributes_to='benchmark.things')
+
+
+def get_size(obj):
+    """ Return the (shallow) number of bytes used by an object. """
+
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+
+    return size
+
+
+def time_it(function, repeat=5):
+    """ Return the best time (in seconds) of several calls to a function. """
+
+    times = []
+    for i in range(repeat):
+        gc.collect()
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+
+    return min(times)
+
+
+def benchmark_events(count):
+    """ Benchmark creating events in isolation.
+
+    Returns a dictionary in the form::
+
+        { event_class : (seconds_saved_per_event, bytes_saved_per_event) }
+
+    """
+
+    plugin = Contributor()
+
+    print 'Creating %d events:-' % count
+    savings = {}
+    for klass, create, create_legacy in [
+        (
+            PluginEvent,
+            lambda: PluginEvent(plugin=plugin),
+            lambda: LegacyPluginEvent(plugin=plugin)
+        ),
+        (
+            ExtensionPointChangedEvent,
+            lambda: ExtensionPointChangedEvent(
+                extension_point_id='x', added=[1], removed=[], index=0
+            ),
+            lambda: LegacyExtensionPointChangedEvent(
+                extension_point_id='x', added=[1], removed=[], index=0
+            )
+        )
+    ]:
+        legacy = time_it(lambda: [create_legacy() for i in xrange(count)])
+        slotted = time_it(lambda: [create() for i in xrange(count)])
+        savings[klass] = (
+            (legacy - slotted) / count,
+            get_size(create_legacy()) - get_size(create())
+        )
+
+        for label, seconds, size in [
+            ('legacy', legacy, get_size(create_legacy())),
+            ('slotted', slotted, get_size(create()))
+        ]:
+            print '  %-40s %8.3fs %6d bytes each' % (
+                '%s (%s)' % (klass.__name__, label), seconds, size
+            )
+
+    return savings
+
+
+def benchmark_plugins(count, bulk):
+    """ Benchmark adding and removing plugins.
+
+    Returns a tuple in the form:-
+
+        (seconds, { event_class : number_of_events })
+
+    """
+
+    application = Application(plugins=[Host()])
+    host = application.get_plugin('benchmark.host')
+    host.connect_extension_point_traits()
+
+    # Make sure the extension point has been accessed (otherwise no extension
+    # point changed events are created).
+    host.things
+
+    # Count the events (listeners are weakly referenced, so keep hold!).
+    counts = {PluginEvent : 0, ExtensionPointChangedEvent : 0}
+    def count_plugin_event(event):
+        counts[PluginEvent] += 1
+
+    def count_extension_point_changed_event(extension_registry, event):
+        counts[ExtensionPointChangedEvent] += 1
+
+    for name in ['plugin_added', 'plugin_removed', 'plugins_added',
+                 'plugins_removed']:
+        application.on_trait_change(count_plugin_event, name)
+
+    application.add_extension_point_listener(
+        count_extension_point_changed_event, 'benchmark.things'
+    )
+
+    plugins = [Contributor(id='c%d' % i) for i in xrange(count)]
+
+    def add_and_remove():
+        if bulk:
+            application.add_plugins(plugins)
+            application.remove_plugins(plugins)
+
+        else:
+            for plugin in plugins:
+                application.add_plugin(plugin)
+
+            for plugin in plugins:
+                application.remove_plugin(plugin)
+
+    seconds = time_it(add_and_remove, repeat=1)
+
+    return seconds, counts
+
+
+def main(argv):
+    """ Entry point. """
+
+    count = int(argv[1]) if len(argv) > 1 else 1000
+
+    savings = benchmark_events(count * 10)
+
+    for bulk in [False, True]:
+        print
+        print 'Adding and removing %d plugins %s:-' % (
+            count, 'in bulk' if bulk else 'one at a time'
+        )
+
+        seconds, counts = benchmark_plugins(count, bulk)
+        print '  %-40s %8.3fs' % ('total', seconds)
+        for klass, number in counts.items():
+            seconds_saved, bytes_saved = savings[klass]
+            print '  %-40s %8d (%.3fs and %d bytes saved by slotting)' % (
+                klass.__name__ + 's', number, number * seconds_saved,
+                number * bytes_saved
+            )
+
+    return
+
+
+if __name__ == '__main__':
+    main(sys.argv)
+
+#### EOF ######################################################################
@@ -6,9 +6,9 @@ import logging, os
 
 # Enthought library imports.
 from traits.etsconfig.api import ETSConfig
-from apptools.preferences.api import IPreferences, ScopedPreferences
+from apptools.preferences.api import IPreferences
 from apptools.preferences.api import set_default_preferences
-from traits.api import Delegate, Event, HasTraits, Instance, Str
+from traits.api import Bool, Delegate, Dict, Event, HasTraits, Instance, Str
 from traits.api import VetoableEvent, provides
 
 # Local imports.
@@ -20,6 +20,8 @@ from i_service_registry import IServiceRegistry
 
 from application_event import ApplicationEvent
 from import_manager import ImportManager
+from incremental_preferences import IncrementalPreferences
+from plugin_profiler import PluginProfiler, profile_phase
 
 
 # Logging.
@@ -77,6 +79,33 @@ class Application(HasTraits):
     # Fired when a plugin has been removed.
     plugin_removed = Delegate('plugin_manager', modify=True)
 
+    # Fired (once) when plugins have been added by 'add_plugins' (including
+    # the plugins passed to the constructor, for which 'plugin_added' is
+    # *not* fired).
+    plugins_added = Delegate('plugin_manager', modify=True)
+
+    # Fired (once) when plugins have been removed by 'remove_plugins'.
+    plugins_removed = Delegate('plugin_manager', modify=True)
+
+    # Fired when a plugin has been replaced (e.g. when it is reloaded).
+    plugin_replaced = Delegate('plugin_manager', modify=True)
+
+    #### 'IServiceRegistry' interface ########################################
+
+    #### Events ####
+
+    # Fired when a service is registered.
+    registered = Delegate('service_registry', modify=True)
+
+    # Fired when a service is unregistered.
+    unregistered = Delegate('service_registry', modify=True)
+
+    # Fired when services are registered in bulk.
+    services_registered = Delegate('service_registry', modify=True)
+
+    # Fired when services are unregistered in bulk.
+    services_unregistered = Delegate('service_registry', modify=True)
+
     #### 'Application' interface ##############################################
 
     # These traits allow application developers to build completely different
@@ -89,6 +118,17 @@ class Application(HasTraits):
     # The plugin manager (starts and stops plugins etc).
     plugin_manager = Instance(IPluginManager)
 
+    # If this is set then the application (and its plugin manager and plugin
+    # activators) record how long each phase of each plugin's lifecycle takes.
+    profiler = Instance(PluginProfiler)
+
+    # If this is True then the preferences are saved on a background thread
+    # when the application is stopped (so that stopping isn't held up by
+    # writing preferences files). This only works for preferences that can
+    # be saved in the background (like the default 'IncrementalPreferences',
+    # which waits a while for the save to finish when the process exits).
+    save_preferences_in_background = Bool(False)
+
     # The service registry.
     service_registry = Instance(IServiceRegistry)
 
@@ -97,6 +137,18 @@ class Application(HasTraits):
     # The import manager.
     _import_manager = Instance(IImportManager, factory=ImportManager)
 
+    # The plugins whose activation has been deferred, and the lookups that
+    # will activate them.
+    #
+    # { ('extension_point', extension_point_id) : [plugin, ...] }
+    # { ('service', protocol_name) : [plugin, ...] }
+    _activation_triggers = Dict
+
+    # The callables that activate each deferred plugin.
+    #
+    # { plugin : (activate, triggers) }
+    _deferred_activations = Dict
+
     ###########################################################################
     # 'object' interface.
     ###########################################################################
@@ -110,6 +162,11 @@ class Application(HasTraits):
         respectively. The application is also iterable, so to iterate over the
         plugins use 'for plugin in application: ...'.
 
+        The initial plugins are added using 'add_plugins', so a single
+        'plugins_added' event is fired for all of them (and *not* a
+        'plugin_added' event for each one), unless the plugin manager
+        doesn't support adding plugins in bulk.
+
         """
 
         super(Application, self).__init__(**traits)
@@ -133,7 +190,7 @@ class Application(HasTraits):
         # respectively. The application is also iterable, so to iterate over
         # the plugins use 'for plugin in application: ...'.
         if plugins is not None:
-            map(self.add_plugin, plugins)
+            self.add_plugins(plugins)
 
         return
 
@@ -164,7 +221,7 @@ class Application(HasTraits):
     def _preferences_default(self):
         """ Trait initializer. """
 
-        return ScopedPreferences()
+        return IncrementalPreferences()
 
     #### Methods ##############################################################
 
@@ -201,6 +258,11 @@ class Application(HasTraits):
 
         """
 
+        if len(self._activation_triggers) > 0:
+            self._activate_deferred_plugins(
+                ('extension_point', extension_point_id)
+            )
+
         return self.extension_registry.get_extensions(extension_point_id)
 
     def get_extension_point(self, extension_point_id):
@@ -247,6 +309,13 @@ class Application(HasTraits):
 
         return self._import_manager.import_symbol(symbol_path)
 
+    def reload_module(self, module_name):
+        """ Reload the module with the specified (and possibly dotted) name.
+
+        """
+
+        return self._import_manager.reload_module(module_name)
+
     ###########################################################################
     # 'IPluginManager' interface.
     ###########################################################################
@@ -263,6 +332,20 @@ class Application(HasTraits):
 
         return
 
+    def add_plugins(self, plugins):
+        """ Add several plugins to the manager (in order). """
+
+        # Plugin managers written before 'add_plugins' was part of the
+        # interface can only add plugins one at a time.
+        if hasattr(self.plugin_manager, 'add_plugins'):
+            self.plugin_manager.add_plugins(plugins)
+
+        else:
+            for plugin in plugins:
+                self.plugin_manager.add_plugin(plugin)
+
+        return
+
     def get_plugin(self, plugin_id):
         """ Return the plugin with the specified Id. """
 
@@ -275,6 +358,27 @@ class Application(HasTraits):
 
         return
 
+    def remove_plugins(self, plugins):
+        """ Remove several plugins from the manager. """
+
+        # Plugin managers written before 'remove_plugins' was part of the
+        # interface can only remove plugins one at a time.
+        if hasattr(self.plugin_manager, 'remove_plugins'):
+            self.plugin_manager.remove_plugins(plugins)
+
+        else:
+            for plugin in plugins:
+                self.plugin_manager.remove_plugin(plugin)
+
+        return
+
+    def replace_plugin(self, old, new):
+        """ Replace a plugin with another one. """
+
+        self.plugin_manager.replace_plugin(old, new)
+
+        return
+
     def start(self):
         """ Start the plugin manager.
 
@@ -292,7 +396,8 @@ class Application(HasTraits):
         if not event.veto:
             # Start the plugin manager (this starts all of the manager's
             # plugins).
-            self.plugin_manager.start()
+            with profile_phase(self, 'application_start'):
+                self._start_plugins()
 
             # Lifecycle event.
             self.started = self._create_application_event()
@@ -326,10 +431,12 @@ class Application(HasTraits):
         if not event.veto:
             # Stop the plugin manager (this stops all of the manager's
             # plugins).
-            self.plugin_manager.stop()
+            with profile_phase(self, 'application_stop'):
+                self._stop_plugins()
 
             # Save all preferences.
-            self.preferences.save()
+            with profile_phase(self, 'save_preferences'):
+                self._save_preferences()
 
             # Lifecycle event.
             self.stopped = self._create_application_event()
@@ -357,6 +464,8 @@ class Application(HasTraits):
 
         """
 
+        self._activate_service_plugins(protocol)
+
         service = self.service_registry.get_required_service(
             protocol, query, minimize, maximize
         )
@@ -366,17 +475,37 @@ class Application(HasTraits):
     def get_service(self, protocol, query='', minimize='', maximize=''):
         """ Return at most one service that matches the specified query. """
 
+        self._activate_service_plugins(protocol)
+
         service = self.service_registry.get_service(
             protocol, query, minimize, maximize
         )
 
         return service
 
+    def get_service_async(self, protocol, query='', minimize='', maximize=''):
+        """ Return a future for at most one service that matches the query. """
+
+        self._activate_service_plugins(protocol)
+
+        future = self.service_registry.get_service_async(
+            protocol, query, minimize, maximize
+        )
+
+        return future
+
     def get_service_from_id(self, service_id):
         """ Return the service with the specified id. """
 
         return self.service_registry.get_service_from_id(service_id)
 
+    def get_service_pool(self, protocol, query=''):
+        """ Return at most one service pool that matches the query. """
+
+        self._activate_service_plugins(protocol)
+
+        return self.service_registry.get_service_pool(protocol, query)
+
     def get_service_properties(self, service_id):
         """ Return the dictionary of properties associated with a service. """
 
@@ -385,12 +514,25 @@ class Application(HasTraits):
     def get_services(self, protocol, query='', minimize='', maximize=''):
         """ Return all services that match the specified query. """
 
+        self._activate_service_plugins(protocol)
+
         services = self.service_registry.get_services(
             protocol, query, minimize, maximize
         )
 
         return services
 
+    def get_services_async(self, protocol, query='', minimize='', maximize=''):
+        """ Return a future for all services that match the query. """
+
+        self._activate_service_plugins(protocol)
+
+        future = self.service_registry.get_services_async(
+            protocol, query, minimize, maximize
+        )
+
+        return future
+
     def register_service(self, protocol, obj, properties=None):
         """ Register a service. """
 
@@ -400,6 +542,20 @@ class Application(HasTraits):
 
         return service_id
 
+    def register_service_pool(self, protocol, pool, properties=None):
+        """ Register a pool of services. """
+
+        service_id = self.service_registry.register_service_pool(
+            protocol, pool, properties
+        )
+
+        return service_id
+
+    def register_services(self, services):
+        """ Register multiple services. """
+
+        return self.service_registry.register_services(services)
+
     def set_service_properties(self, service_id, properties):
         """ Set the dictionary of properties associated with a service. """
 
@@ -414,10 +570,129 @@ class Application(HasTraits):
 
         return
 
+    def unregister_services(self, service_ids):
+        """ Unregister multiple services. """
+
+        self.service_registry.unregister_services(service_ids)
+
+        return
+
     ###########################################################################
     # 'Application' interface.
     ###########################################################################
 
+    def cancel_plugin_activation(self, plugin):
+        """ Cancel the deferred activation of a plugin.
+
+        Return True if the plugin's activation was deferred (and hence has
+        now been cancelled), or False if it was not (e.g. because it has
+        already been activated).
+
+        """
+
+        if plugin not in self._deferred_activations:
+            return False
+
+        activate, triggers = self._deferred_activations.pop(plugin)
+        for trigger in triggers:
+            plugins = self._activation_triggers[trigger]
+            plugins.remove(plugin)
+            if len(plugins) == 0:
+                del self._activation_triggers[trigger]
+
+        return True
+
+    def defer_plugin_activation(
+        self, plugin, activate, extension_point_ids=None, protocols=None
+    ):
+        """ Defer the activation of a plugin until it is first used.
+
+        'activate' is a callable that takes no arguments and it is called
+        (once only) the first time that somebody asks the application for
+        the extensions to any of the specified extension points, or for
+        services of any of the specified protocols (which, as usual, can be
+        actual classes or interfaces, or their names).
+
+        This is used by the 'LazyPluginActivator'.
+
+        """
+
+        triggers = []
+        for extension_point_id in extension_point_ids or []:
+            triggers.append(('extension_point', extension_point_id))
+
+        for protocol in protocols or []:
+            triggers.append(('service', self._get_protocol_name(protocol)))
+
+        for trigger in triggers:
+            self._activation_triggers.setdefault(trigger, []).append(plugin)
+
+        self._deferred_activations[plugin] = (activate, triggers)
+
+        logger.debug('plugin %s activation deferred', plugin.id)
+
+        return
+
+    def reload_plugin(self, plugin_id, module_names=None, factory=None):
+        """ Reload a plugin without restarting the application.
+
+        This is useful when the plugin's code has changed. The plugin is
+        stopped (which unregisters its services etc), the modules containing
+        its code are reloaded, and a new instance of the (reloaded) plugin
+        class takes the old plugin's place and is started.
+
+        'module_names' is a list of the names of the modules to reload (in
+        order). If it is not specified then only the module that defines the
+        plugin's class is reloaded.
+
+        'factory' is a callable that takes the reloaded plugin class and the
+        old plugin and returns the new plugin. If it is not specified then
+        the new plugin gets the old plugin's 'id', and its 'name' and
+        'requires' unless they are just the old class's defaults (so that any
+        changes to them in the code are picked up). Use a factory if the new
+        plugin needs any other traits from the old one.
+
+        Listeners to extension points are only told about the contributions
+        that actually changed (rather than all of the plugin's contributions
+        being removed and then added again). Contributions are compared using
+        '==', so objects that are only equal to themselves (i.e. most objects
+        other than strings, numbers, tuples etc) are always reported as
+        removed and added again.
+
+        Raise a 'SystemError' if there is no such plugin.
+
+        Returns the new plugin.
+
+        """
+
+        plugin = self.get_plugin(plugin_id)
+        if plugin is None:
+            raise SystemError('no such plugin %s' % plugin_id)
+
+        klass = type(plugin)
+        if module_names is None:
+            module_names = [klass.__module__]
+
+        self.stop_plugin(plugin)
+
+        for module_name in module_names:
+            self.reload_module(module_name)
+
+        klass = self.import_symbol(
+            '%s:%s' % (klass.__module__, klass.__name__)
+        )
+        if factory is None:
+            factory = self._create_reloaded_plugin
+
+        new_plugin = factory(klass, plugin)
+
+        self.replace_plugin(plugin, new_plugin)
+        self.start_plugin(new_plugin)
+
+        logger.debug('plugin %s reloaded', plugin_id)
+
+        return new_plugin
+
     #### Trait initializers ###################################################
 
     def _extension_registry_default(self):
@@ -485,11 +760,67 @@ class Application(HasTraits):
 
     #### Methods ##############################################################
 
+    def _activate_deferred_plugins(self, trigger):
+        """ Activate any deferred plugins that are waiting for a lookup. """
+
+        for plugin in self._activation_triggers.get(trigger, [])[:]:
+            activate, triggers = self._deferred_activations[plugin]
+
+            # We cancel the deferral *before* activating the plugin so that
+            # any lookups made during activation don't try to activate it
+            # again!
+            self.cancel_plugin_activation(plugin)
+
+            logger.debug('plugin %s activated by %s', plugin.id, trigger)
+            activate()
+
+        return
+
+    def _activate_service_plugins(self, protocol):
+        """ Activate any deferred plugins that offer services of a protocol.
+
+        """
+
+        if len(self._activation_triggers) > 0:
+            self._activate_deferred_plugins(
+                ('service', self._get_protocol_name(protocol))
+            )
+
+        return
+
     def _create_application_event(self):
         """ Create an application event. """
 
         return ApplicationEvent(application=self)
 
+    def _create_reloaded_plugin(self, klass, plugin):
+        """ Create an instance of a reloaded plugin class. """
+
+        traits = {'id' : plugin.id}
+        for trait_name in ['name', 'requires']:
+            trait = plugin.trait(trait_name)
+            value = getattr(plugin, trait_name)
+
+            # If the value is just the (static) default from the old class
+            # then use the default from the reloaded class instead.
+            if trait.default_kind == 'method' or value != trait.default:
+                traits[trait_name] = value
+
+        return klass(**traits)
+
+    def _get_protocol_name(self, protocol_or_name):
+        """ Returns the full class name for a protocol. """
+
+        if isinstance(protocol_or_name, basestring):
+            name = protocol_or_name
+
+        else:
+            name = '%s.%s' % (
+                protocol_or_name.__module__, protocol_or_name.__name__
+            )
+
+        return name
+
     def _initialize_application_home(self):
         """ Initialize the application home directory. """
 
@@ -503,4 +834,44 @@ class Application(HasTraits):
 
         return
 
+    def _save_preferences(self):
+        """ Save the preferences when the application is stopped. """
+
+        save_in_background = getattr(
+            self.preferences, 'save_in_background', None
+        )
+
+        if self.save_preferences_in_background \
+           and save_in_background is not None:
+            save_in_background()
+
+        else:
+            self.preferences.save()
+
+        return
+
+    def _start_plugins(self):
+        """ Start all of the application's plugins.
+
+        This is a hook for applications that start their plugins in a
+        particular way (e.g. on an event loop).
+
+        """
+
+        self.plugin_manager.start()
+
+        return
+
+    def _stop_plugins(self):
+        """ Stop all of the application's plugins.
+
+        This is a hook for applications that stop their plugins in a
+        particular way (e.g. on an event loop).
+
+        """
+
+        self.plugin_manager.stop()
+
+        return
+
 #### EOF ######################################################################
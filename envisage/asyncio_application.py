@@ -0,0 +1,331 @@
+""" A non-GUI application with an asyncio event loop.
+
+Nothing is imported from asyncio (or 'trollius', its Python 2 backport) until
+the application is used so this module can safely live in the Envisage core
+without either of them being installed.
+
+"""
+
+
+# Standard library imports.
+import logging, thread
+
+# Enthought library imports.
+from envisage.api import Application
+from traits.api import Any, Instance, Long
+
+# Local imports.
+from plugin_dependencies import get_requirements, get_start_order
+from plugin_extension_registry import PluginExtensionRegistry
+from service_registry import ServiceRegistry
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+def get_asyncio():
+    """ Return the 'asyncio' module (or 'trollius' if it isn't available).
+
+    Raise an 'ImportError' if neither of them is available.
+
+    """
+
+    try:
+        import asyncio
+
+    except ImportError:
+        import trollius as asyncio
+
+    return asyncio
+
+
+class AsyncioApplication(Application):
+    """ A non-GUI application with an asyncio event loop.
+
+    A plugin's 'start' and 'stop' methods can return a coroutine (or a future)
+    and the application waits for it to finish. Plugins that don't depend on
+    each other are started (and stopped) concurrently, but a plugin is only
+    started once the coroutines of the plugins that it requires have finished
+    (and stopped before them).
+
+    Services can therefore do non-blocking I/O on the application's loop.
+    Extension point and service registry events that are fired on other
+    threads (e.g. by services using executors) are delivered on the loop.
+
+    The application's 'start' and 'stop' methods run the loop until all of the
+    plugins have been started or stopped and so they must not be called when
+    the loop is already running. 'run' starts the application, runs the loop
+    until 'exit' is called, and then stops the application.
+
+    """
+
+    #### 'AsyncioApplication' interface #######################################
+
+    # The event loop (by default, the current thread's default loop).
+    loop = Any
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    # The Id of the thread that runs the loop (0 until the application is
+    # started).
+    _loop_thread_id = Long
+
+    ###########################################################################
+    # 'IApplication' interface.
+    ###########################################################################
+
+    def run(self):
+        """ Run the application. """
+
+        if self.start():
+            logger.debug('---------- loop starting ----------')
+            self.loop.run_forever()
+            logger.debug('---------- loop stopped ----------')
+
+            self.stop()
+
+        return
+
+    ###########################################################################
+    # 'AsyncioApplication' interface.
+    ###########################################################################
+
+    def exit(self):
+        """ Stop the event loop started by 'run' (and hence the application).
+
+        This can be called from any thread.
+
+        """
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+        return
+
+    ###########################################################################
+    # Protected 'Application' interface.
+    ###########################################################################
+
+    #### Trait initializers ###################################################
+
+    def _extension_registry_default(self):
+        """ Trait initializer. """
+
+        return _LoopExtensionRegistry(application=self, plugin_manager=self)
+
+    def _service_registry_default(self):
+        """ Trait initializer. """
+
+        return _LoopServiceRegistry(application=self)
+
+    #### Methods ##############################################################
+
+    def _start_plugins(self):
+        """ Start all of the application's plugins. """
+
+        self._loop_thread_id = thread.get_ident()
+
+        plugins = get_start_order(self.plugin_manager)
+        requirements = get_requirements(plugins)
+
+        # A plugin is started once all of the plugins that it requires have
+        # been started.
+        futures = {}
+        for plugin in plugins:
+            futures[plugin] = self._call_after(
+                [futures[required] for required in requirements[plugin]],
+                self.start_plugin, plugin
+            )
+
+        self._run_until_complete(futures.values())
+
+        return
+
+    def _stop_plugins(self):
+        """ Stop all of the application's plugins. """
+
+        plugins = get_start_order(self.plugin_manager)
+        requirements = get_requirements(plugins)
+
+        # A plugin is stopped once all of the plugins that require it have
+        # been stopped (even if they failed to stop).
+        dependents = dict((plugin, []) for plugin in plugins)
+        for plugin, required in requirements.items():
+            for required_plugin in required:
+                dependents[required_plugin].append(plugin)
+
+        futures = {}
+        for plugin in reversed(plugins):
+            futures[plugin] = self._call_after(
+                [futures[dependent] for dependent in dependents[plugin]],
+                self.stop_plugin, plugin, ignore_errors=True
+            )
+
+        self._run_until_complete(futures.values())
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    #### Trait initializers ###################################################
+
+    def _loop_default(self):
+        """ Trait initializer. """
+
+        asyncio = get_asyncio()
+
+        try:
+            loop = asyncio.get_event_loop()
+
+        except RuntimeError:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+
+        return loop
+
+    #### Methods ##############################################################
+
+    def _call_after(self, futures, function, *args, **kw):
+        """ Call a function once some futures are done.
+
+        If the function returns a coroutine (or a future) then it is run on
+        the loop. If any of the futures failed then the function is not
+        called, unless 'ignore_errors' is True.
+
+        Returns a future for the result of the function (or its coroutine).
+
+        """
+
+        asyncio = get_asyncio()
+        ignore_errors = kw.get('ignore_errors', False)
+
+        result = asyncio.Future(loop=self.loop)
+
+        def set_result_from(future):
+            if future.cancelled():
+                result.cancel()
+
+            elif future.exception() is not None:
+                result.set_exception(future.exception())
+
+            else:
+                result.set_result(future.result())
+
+        def call(ignored=None):
+            if not ignore_errors:
+                for future in futures:
+                    if future.exception() is not None:
+                        result.set_exception(future.exception())
+                        return
+
+            try:
+                value = function(*args)
+
+            except Exception as exc:
+                result.set_exception(exc)
+                return
+
+            if asyncio.iscoroutine(value) or isinstance(value, asyncio.Future):
+                future = asyncio.ensure_future(value, loop=self.loop)
+                future.add_done_callback(set_result_from)
+
+            else:
+                result.set_result(value)
+
+        if len(futures) > 0:
+            asyncio.gather(*futures, return_exceptions=True).add_done_callback(
+                call
+            )
+
+        else:
+            self.loop.call_soon(call)
+
+        return result
+
+    def _call_on_loop(self, function, *args):
+        """ Call a function on the loop's thread.
+
+        If the loop is running in another thread then the call is scheduled on
+        the loop, otherwise the function is called immediately.
+
+        """
+
+        loop = self.loop
+        if loop.is_running() and thread.get_ident() != self._loop_thread_id:
+            loop.call_soon_threadsafe(lambda: function(*args))
+
+        else:
+            function(*args)
+
+        return
+
+    def _run_until_complete(self, futures):
+        """ Run the loop until some futures are done.
+
+        If any of the futures failed then the first exception is re-raised
+        (once they are *all* done).
+
+        """
+
+        if len(futures) == 0:
+            return
+
+        asyncio = get_asyncio()
+
+        results = self.loop.run_until_complete(
+            asyncio.gather(*futures, return_exceptions=True)
+        )
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return
+
+
+class _LoopExtensionRegistry(PluginExtensionRegistry):
+    """ An extension registry that calls its listeners on the loop. """
+
+    # The application whose loop is used.
+    application = Instance(AsyncioApplication)
+
+    ###########################################################################
+    # Protected 'ExtensionRegistry' interface.
+    ###########################################################################
+
+    def _call_listeners(self, refs, extension_point_id, added, removed, index):
+        """ Call listeners that are listening to an extension point. """
+
+        call_listeners = super(_LoopExtensionRegistry, self)._call_listeners
+
+        self.application._call_on_loop(
+            call_listeners, refs, extension_point_id, added, removed, index
+        )
+
+        return
+
+
+class _LoopServiceRegistry(ServiceRegistry):
+    """ A service registry that fires its events on the loop. """
+
+    # The application whose loop is used.
+    application = Instance(AsyncioApplication)
+
+    ###########################################################################
+    # Protected 'ServiceRegistry' interface.
+    ###########################################################################
+
+    def _fire_event(self, trait_name, value):
+        """ Fire one of the registry's events. """
+
+        fire_event = super(_LoopServiceRegistry, self)._fire_event
+
+        self.application._call_on_loop(fire_event, trait_name, value)
+
+        return
+
+#### EOF ######################################################################
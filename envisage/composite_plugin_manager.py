@@ -5,15 +5,17 @@
 import logging
 
 # Enthought library imports.
-from traits.api import Event, HasTraits, Instance, List, provides
-from traits.api import on_trait_change
+from traits.api import Any, Dict, Event, Float, HasTraits, Instance, Int
+from traits.api import List, Property, Str, on_trait_change, provides
 
 # Local imports.
 from i_application import IApplication
-from i_plugin import IPlugin
 from i_plugin_manager import IPluginManager
+from plugin_dependencies import get_start_order, start_plugins_concurrently
+from plugin_dependencies import stop_plugins_with_deadlines
 from plugin_event import PluginEvent
 from plugin_manager import PluginManager
+from plugin_profiler import profile_phase
 
 
 # Logging.
@@ -33,6 +35,10 @@ class CompositePluginManager(HasTraits):
              ]
         )
 
+    The plugins of all of the plugin managers are merged (in the order of the
+    plugin managers) into a single list which is kept up to date as plugins
+    are added to and removed from the individual plugin managers.
+
     """
 
     #### 'IPluginManager' protocol #############################################
@@ -45,6 +51,14 @@ class CompositePluginManager(HasTraits):
     # Fired when a plugin has been removed from the manager.
     plugin_removed = Event(PluginEvent)
 
+    # Fired (once per plugin manager that plugins are added to/removed from)
+    # when plugins have been added/removed by 'add_plugins'/'remove_plugins'.
+    plugins_added = Event(PluginEvent)
+    plugins_removed = Event(PluginEvent)
+
+    # Fired when a plugin has been replaced by another one.
+    plugin_replaced = Event(PluginEvent)
+
     #### 'CompositePluginManager' protocol #####################################
 
     # The application that the plugin manager is part of.
@@ -55,6 +69,62 @@ class CompositePluginManager(HasTraits):
 
         return
 
+    # The maximum number of threads used to start plugins concurrently.
+    #
+    # Plugins are always started after the plugins that they require (see
+    # 'IPlugin.requires'), but if this is greater than zero, plugins that do
+    # not depend on each other are started at the same time. If it is zero
+    # (the default) then plugins are started one at a time in the calling
+    # thread.
+    start_threads = Int(0)
+
+    # The maximum number of threads used to stop plugins concurrently.
+    #
+    # Plugins are always stopped before the plugins that they require, but if
+    # this is greater than zero, plugins that nothing else requires are
+    # stopped at the same time.
+    stop_threads = Int(0)
+
+    # The number of seconds that stopping all of the plugins may take (0
+    # means no limit). Plugins that haven't been stopped by then are
+    # abandoned (see 'stop_overruns').
+    stop_timeout = Float(0)
+
+    # The number of seconds that stopping any one plugin may take (0 means no
+    # limit). A plugin that takes longer is abandoned and the plugins that it
+    # requires are stopped anyway.
+    #
+    # If any of 'stop_threads', 'stop_timeout' or 'plugin_stop_timeout' is
+    # greater than zero then plugins are stopped on separate threads, and an
+    # exception raised by a plugin's 'stop' method is logged rather than
+    # raised. Otherwise, plugins are stopped one at a time in the calling
+    # thread.
+    plugin_stop_timeout = Float(0)
+
+    # The plugins that overran when the manager was last stopped, in the form:
+    #
+    # { plugin_id : seconds }
+    #
+    # where 'seconds' is how long the plugin had been stopping when it was
+    # abandoned, or None if it was never stopped.
+    stop_overruns = Dict(Str, Any)
+
+    # The plugin manager that plugins are added to by 'add_plugin'. If this is
+    # None then they are added to the first plugin manager. Otherwise, it must
+    # be one of the 'plugin_managers'.
+    default_plugin_manager = Property(Instance(PluginManager))
+    def _get_default_plugin_manager(self):
+        return self._default_plugin_manager
+
+    def _set_default_plugin_manager(self, plugin_manager):
+        # The plugin managers may not have been set yet if both traits are
+        # passed to the constructor (it is checked again when plugins are
+        # added).
+        if self.traits_inited():
+            self._check_default_plugin_manager(plugin_manager)
+
+        self._default_plugin_manager = plugin_manager
+
     # The plugin managers that make up this plugin manager!
     #
     # This is currently a list of 'PluginManager's as opposed to, the more
@@ -70,67 +140,201 @@ class CompositePluginManager(HasTraits):
         for plugin_manager in added:
             plugin_manager.application = self.application
 
+        self._reset_plugins()
+
+    @on_trait_change('plugin_managers:include[], plugin_managers:exclude[]')
+    def _plugin_patterns_changed(self):
+        self._reset_plugins()
+
     @on_trait_change('plugin_managers:plugin_added')
     def _plugin_added(self, obj, trait_name, old, new):
+        self._add_to_plugins(obj, new.plugin)
         self.plugin_added = new
 
     @on_trait_change('plugin_managers:plugin_removed')
     def _plugin_removed(self, obj, trait_name, old, new):
+        self._remove_from_plugins(new.plugin)
         self.plugin_removed = new
-        
+
+    @on_trait_change('plugin_managers:plugins_added')
+    def _plugins_added(self, obj, trait_name, old, new):
+        self._reset_plugins()
+        self.plugins_added = new
+
+    @on_trait_change('plugin_managers:plugins_removed')
+    def _plugins_removed(self, obj, trait_name, old, new):
+        self._reset_plugins()
+        self.plugins_removed = new
+
+    @on_trait_change('plugin_managers:plugin_replaced')
+    def _plugin_replaced(self, obj, trait_name, old, new):
+        self._replace_in_plugins(obj, new.old_plugin, new.plugin)
+        self.plugin_replaced = new
+
+    # Replacing a plugin manager's list of plugins wholesale (e.g. when a
+    # subclass harvests its plugins) doesn't fire any plugin events.
+    @on_trait_change('plugin_managers:_plugins')
+    def _plugin_list_replaced(self):
+        self._reset_plugins()
+
     #### Private protocol ######################################################
 
-    # The plugins that the manager manages!
-    _plugins = List(IPlugin)
-    def __plugins_default(self):
-        plugins = []
-        for plugin_manager in self.plugin_managers:
-            for plugin in plugin_manager:
-                plugins.append(plugin)
+    # The plugin manager that plugins are added to (see
+    # 'default_plugin_manager').
+    _default_plugin_manager = Instance(PluginManager)
 
-        return plugins
+    # The plugins of all of the plugin managers, in order (None until they are
+    # needed). The list is never modified in place (a new list is created
+    # instead), so it is safe to iterate over it while plugins are added or
+    # removed.
+    _plugins = Any
+
+    # The plugin manager that each plugin belongs to.
+    #
+    # { plugin : plugin_manager }
+    _plugin_owners = Any
+
+    # The plugins by Id (None until they are needed).
+    #
+    # { plugin_id : plugin }
+    _plugin_index = Any
 
     #### 'object' protocol ####################################################
 
     def __iter__(self):
         """ Return an iterator over the manager's plugins. """
 
-        plugins = []
-        for plugin_manager in self.plugin_managers:
-            for plugin in plugin_manager:
-                plugins.append(plugin)
-
-        return iter(plugins)
+        return iter(self._get_plugins())
 
     #### 'IPluginManager' protocol #############################################
 
     def add_plugin(self, plugin):
-        """ Add a plugin to the manager. """
+        """ Add a plugin to the manager.
+
+        The plugin is added to the 'default_plugin_manager' (or the first
+        plugin manager if there isn't one).
+
+        """
+
+        self._get_plugin_manager_to_add_to().add_plugin(plugin)
+
+        return
+
+    def add_plugins(self, plugins):
+        """ Add several plugins to the manager (in order).
+
+        The plugins are added to the 'default_plugin_manager' (or the first
+        plugin manager if there isn't one).
+
+        """
 
-        raise NotImplementedError
+        plugin_manager = self._get_plugin_manager_to_add_to()
+
+        # Plugin managers written before 'add_plugins' was part of the
+        # interface can only add plugins one at a time.
+        if hasattr(plugin_manager, 'add_plugins'):
+            plugin_manager.add_plugins(plugins)
+
+        else:
+            for plugin in plugins:
+                plugin_manager.add_plugin(plugin)
+
+        return
 
     def get_plugin(self, plugin_id):
         """ Return the plugin with the specified Id. """
 
-        for plugin in self:
-            if plugin_id == plugin.id:
-                break
+        if self._plugin_index is None:
+            plugin_index = {}
+            for plugin in self._get_plugins():
+                plugin_index.setdefault(plugin.id, plugin)
 
-        else:
-            plugin = None
+            self._plugin_index = plugin_index
 
-        return plugin
+        return self._plugin_index.get(plugin_id)
 
     def remove_plugin(self, plugin):
-        """ Remove a plugin from the manager. """
+        """ Remove a plugin from the manager.
+
+        The plugin is removed from the plugin manager that it belongs to.
+
+        """
+
+        self._get_plugins()
+
+        plugin_manager = self._plugin_owners.get(plugin)
+        if plugin_manager is None:
+            raise ValueError('plugin %s is not in the manager' % plugin.id)
+
+        plugin_manager.remove_plugin(plugin)
+
+        return
+
+    def remove_plugins(self, plugins):
+        """ Remove several plugins from the manager.
+
+        Each plugin is removed from the plugin manager that it belongs to.
+
+        """
+
+        self._get_plugins()
+
+        # Group the plugins by the plugin manager that they belong to.
+        plugins_by_manager = {}
+        for plugin in plugins:
+            plugin_manager = self._plugin_owners.get(plugin)
+            if plugin_manager is None:
+                raise ValueError('plugin %s is not in the manager' % plugin.id)
+
+            plugins_by_manager.setdefault(plugin_manager, []).append(plugin)
+
+        for plugin_manager in self.plugin_managers:
+            if plugin_manager not in plugins_by_manager:
+                continue
+
+            # Plugin managers written before 'remove_plugins' was part of the
+            # interface can only remove plugins one at a time.
+            if hasattr(plugin_manager, 'remove_plugins'):
+                plugin_manager.remove_plugins(
+                    plugins_by_manager[plugin_manager]
+                )
+
+            else:
+                for plugin in plugins_by_manager[plugin_manager]:
+                    plugin_manager.remove_plugin(plugin)
+
+        return
+
+    def replace_plugin(self, old, new):
+        """ Replace a plugin with another one.
+
+        The plugin is replaced in the plugin manager that it belongs to.
+
+        """
+
+        self._get_plugins()
+
+        plugin_manager = self._plugin_owners.get(old)
+        if plugin_manager is None:
+            raise ValueError('plugin %s is not in the manager' % old.id)
 
-        raise NotImplementedError
+        plugin_manager.replace_plugin(old, new)
+
+        return
 
     def start(self):
         """ Start the plugin manager. """
 
-        for plugin in self:
-            self.start_plugin(plugin)
+        start_order = get_start_order(self)
+
+        if self.start_threads > 0:
+            start_plugins_concurrently(
+                start_order, self.start_plugin, self.start_threads
+            )
+
+        else:
+            for plugin in start_order:
+                self.start_plugin(plugin)
 
         return
 
@@ -140,23 +344,39 @@ class CompositePluginManager(HasTraits):
         plugin = plugin or self.get_plugin(plugin_id)
         if plugin is not None:
             logger.debug('plugin %s starting', plugin.id)
-            plugin.activator.start_plugin(plugin)
+            with profile_phase(self.application, 'start_plugin', plugin.id):
+                result = plugin.activator.start_plugin(plugin)
             logger.debug('plugin %s started', plugin.id)
 
         else:
             raise SystemError('no such plugin %s' % plugin_id)
 
-        return
+        return result
 
     def stop(self):
         """ Stop the plugin manager. """
 
-        # We stop the plugins in the reverse order that they were started.
-        stop_order = list(iter(self))
-        stop_order.reverse()
+        # We stop the plugins in the reverse order that they were started (or
+        # would have been started if they were started one at a time).
+        if self.stop_threads > 0 or self.stop_timeout > 0 \
+           or self.plugin_stop_timeout > 0:
+            overruns = stop_plugins_with_deadlines(
+                list(self), self.stop_plugin, max(1, self.stop_threads),
+                self.plugin_stop_timeout, self.stop_timeout
+            )
+
+        else:
+            overruns = {}
+
+            stop_order = get_start_order(self)
+            stop_order.reverse()
+
+            for plugin in stop_order:
+                self.stop_plugin(plugin)
 
-        for plugin in stop_order:
-            self.stop_plugin(plugin)
+        self.stop_overruns = dict(
+            (plugin.id, seconds) for plugin, seconds in overruns.items()
+        )
 
         return
 
@@ -166,12 +386,172 @@ class CompositePluginManager(HasTraits):
         plugin = plugin or self.get_plugin(plugin_id)
         if plugin is not None:
             logger.debug('plugin %s stopping', plugin.id)
-            plugin.activator.stop_plugin(plugin)
+            with profile_phase(self.application, 'stop_plugin', plugin.id):
+                result = plugin.activator.stop_plugin(plugin)
             logger.debug('plugin %s stopped', plugin.id)
 
         else:
             raise SystemError('no such plugin %s' % plugin_id)
 
+        return result
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _add_to_plugins(self, plugin_manager, plugin):
+        """ Add a plugin that has been added to one of the plugin managers.
+
+        """
+
+        # If the merged list hasn't been built yet then there is nothing to
+        # update.
+        if self._plugins is None:
+            return
+
+        # Plugin managers can add plugins that they then exclude!
+        if not plugin_manager._include_plugin(plugin.id):
+            return
+
+        # Plugin managers add plugins to the end of their list, so the plugin
+        # goes after the plugins of its own plugin manager and of those before
+        # it.
+        indices = dict(
+            (manager, index)
+            for index, manager in enumerate(self.plugin_managers)
+        )
+        manager_index = indices[plugin_manager]
+
+        position = 0
+        for other in self._plugins:
+            if indices[self._plugin_owners[other]] > manager_index:
+                break
+
+            position += 1
+
+        plugins = list(self._plugins)
+        plugins.insert(position, plugin)
+        self._plugins = plugins
+        self._plugin_owners[plugin] = plugin_manager
+
+        # If there is already a plugin with the same Id then we have to work
+        # out which one comes first (the index is rebuilt when needed).
+        if self._plugin_index is not None:
+            if plugin.id in self._plugin_index:
+                self._plugin_index = None
+
+            else:
+                self._plugin_index[plugin.id] = plugin
+
+        return
+
+    def _check_default_plugin_manager(self, plugin_manager):
+        """ Check that a plugin manager can be the default plugin manager.
+
+        Raise a 'ValueError' if it isn't one of the plugin managers (plugins
+        added to it would never be seen by the composite).
+
+        """
+
+        if plugin_manager is not None \
+           and plugin_manager not in self.plugin_managers:
+            raise ValueError(
+                'the default plugin manager must be one of the plugin managers'
+            )
+
+        return
+
+    def _get_plugin_manager_to_add_to(self):
+        """ Return the plugin manager that plugins are added to.
+
+        Raise a 'SystemError' if there are no plugin managers, or a
+        'ValueError' if the default plugin manager isn't one of them.
+
+        """
+
+        plugin_manager = self.default_plugin_manager
+        if plugin_manager is None:
+            if len(self.plugin_managers) == 0:
+                raise SystemError('no plugin manager to add plugins to')
+
+            plugin_manager = self.plugin_managers[0]
+
+        else:
+            self._check_default_plugin_manager(plugin_manager)
+
+        return plugin_manager
+
+    def _get_plugins(self):
+        """ Return the plugins of all of the plugin managers (in order). """
+
+        plugins = self._plugins
+        if plugins is None:
+            plugins = []
+            plugin_owners = {}
+            for plugin_manager in self.plugin_managers:
+                for plugin in plugin_manager:
+                    plugins.append(plugin)
+                    plugin_owners[plugin] = plugin_manager
+
+            self._plugins = plugins
+            self._plugin_owners = plugin_owners
+
+        return plugins
+
+    def _remove_from_plugins(self, plugin):
+        """ Remove a plugin that has been removed from one of the plugin
+        managers.
+
+        """
+
+        if self._plugins is None or plugin not in self._plugin_owners:
+            return
+
+        self._plugins = [
+            other for other in self._plugins if other is not plugin
+        ]
+        del self._plugin_owners[plugin]
+
+        if self._plugin_index is not None:
+            if self._plugin_index.get(plugin.id) is plugin:
+                # There might be another plugin with the same Id (the index
+                # is rebuilt when needed).
+                self._plugin_index = None
+
+        return
+
+    def _replace_in_plugins(self, plugin_manager, old, new):
+        """ Replace a plugin that has been replaced in one of the plugin
+        managers.
+
+        """
+
+        if self._plugins is None or old not in self._plugin_owners:
+            return
+
+        self._plugins = [
+            new if plugin is old else plugin for plugin in self._plugins
+        ]
+        del self._plugin_owners[old]
+        self._plugin_owners[new] = plugin_manager
+
+        if self._plugin_index is not None:
+            if self._plugin_index.get(old.id) is old:
+                del self._plugin_index[old.id]
+                self._plugin_index.setdefault(new.id, new)
+
+        return
+
+    def _reset_plugins(self):
+        """ Forget the merged plugins (they are merged again when they are
+        next needed).
+
+        """
+
+        self._plugins = None
+        self._plugin_owners = None
+        self._plugin_index = None
+
         return
 
 #### EOF ######################################################################
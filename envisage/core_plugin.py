@@ -2,8 +2,9 @@
 
 
 # Enthought library imports.
-from envisage.api import ExtensionPoint, Plugin, ServiceOffer
-from traits.api import List, Instance, on_trait_change, Str
+from envisage.api import ExtensionPoint, Plugin, PooledServiceOffer
+from envisage.api import ServiceOffer
+from traits.api import Dict, List, Instance, on_trait_change, Str
 
 
 class CorePlugin(Plugin):
@@ -164,15 +165,28 @@ class CorePlugin(Plugin):
     )
     @on_trait_change('service_offers_items')
     def _service_offers_changed(self, event):
-        """ React to new service offers being *added*.
+        """ React to service offers being added or removed.
 
-        Note that we don't currently do anything if services are *removed* as
-        we have no facility to let users of the service know that the offer
-        has been retracted.
+        Note that if an offer is *removed* (e.g. when the plugin that made it
+        is reloaded) its service is unregistered, but we have no facility to
+        let users of the service know that the offer has been retracted.
 
         """
 
-        map(self._register_service_offer, event.added)
+        removed_ids = [
+            self._service_offer_ids.pop(service_offer)
+            for service_offer in event.removed
+
+            if service_offer in self._service_offer_ids
+        ]
+        if len(removed_ids) > 0:
+            self.application.unregister_services(removed_ids)
+            self._service_ids = [
+                service_id for service_id in self._service_ids
+                if service_id not in removed_ids
+            ]
+
+        self._service_ids.extend(self._register_service_offers(event.added))
 
         return
 
@@ -180,6 +194,13 @@ class CorePlugin(Plugin):
 
     # None.
 
+    #### Private interface ####################################################
+
+    # The id of the service registered for each service offer.
+    #
+    # { service_offer : service_id }
+    _service_offer_ids = Dict
+
     ###########################################################################
     # 'IPlugin' interface.
     ###########################################################################
@@ -208,6 +229,30 @@ class CorePlugin(Plugin):
 
         return
 
+    def stop(self):
+        """ Stop the plugin. """
+
+        # The services themselves are unregistered by the plugin activation
+        # strategy (see 'start'), so forget which offers they were for.
+        self._service_offer_ids = {}
+
+        return
+
+    ###########################################################################
+    # 'CorePlugin' interface.
+    ###########################################################################
+
+    def get_service_offer_ids(self):
+        """ Return the Id of the service registered for each service offer.
+
+        Returns a dictionary in the form::
+
+            { service_offer : service_id }
+
+        """
+
+        return self._service_offer_ids.copy()
+
     ###########################################################################
     # Private interface.
     ###########################################################################
@@ -280,19 +325,49 @@ class CorePlugin(Plugin):
         return
 
     def _register_service_offers(self, service_offers):
-        """ Register a list of service offers. """
+        """ Register a list of service offers.
 
-        return map(self._register_service_offer, service_offers)
+        Returns the service ids.
 
-    def _register_service_offer(self, service_offer):
-        """ Register a service offer. """
+        """
 
-        service_id = self.application.register_service(
-            protocol   = service_offer.protocol,
-            obj        = service_offer.factory,
-            properties = service_offer.properties
+        # A pooled offer registers a pool of objects created by the factory
+        # (which is looked up using 'get_service_pool') instead of the factory
+        # itself.
+        pooled_service_offers = [
+            service_offer for service_offer in service_offers
+            if isinstance(service_offer, PooledServiceOffer)
+        ]
+        for service_offer in pooled_service_offers:
+            service_id = self.application.register_service_pool(
+                service_offer.protocol,
+                service_offer.create_pool(),
+                service_offer.properties
+            )
+            self._service_offer_ids[service_offer] = service_id
+
+        # All of the other offers are registered in one go.
+        other_service_offers = [
+            service_offer for service_offer in service_offers
+            if not isinstance(service_offer, PooledServiceOffer)
+        ]
+        service_ids = self.application.register_services(
+            [
+                (
+                    service_offer.protocol,
+                    service_offer.factory,
+                    service_offer.properties
+                )
+                for service_offer in other_service_offers
+            ]
+        )
+        self._service_offer_ids.update(
+            dict(zip(other_service_offers, service_ids))
         )
 
-        return service_id
+        return [
+            self._service_offer_ids[service_offer]
+            for service_offer in service_offers
+        ]
 
 ### EOF ######################################################################
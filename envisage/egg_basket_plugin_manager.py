@@ -1,13 +1,16 @@
 """ A plugin manager that finds plugins in eggs on the 'plugin_path'. """
 
 
-import logging, pkg_resources, sys
+import logging, os, pkg_resources, sys
 import traceback
 
-from traits.api import Callable, Directory, List, on_trait_change
+from traits.api import Bool, Callable, Dict, Directory, Int, List, Str
+from traits.api import on_trait_change
 
-from egg_utils import add_eggs_on_path, get_entry_points_in_egg_order
+from egg_utils import add_eggs_on_path, compile_eggs, get_cached_entry_points
+from egg_utils import get_entry_points_in_egg_order, save_entry_points_to_cache
 from plugin_manager import PluginManager
+from plugin_profiler import profile_phase
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +39,16 @@ class EggBasketPluginManager(PluginManager):
 
     #### 'EggBasketPluginManager' protocol #####################################
 
+    # The name of a file used to cache the results of finding the eggs on the
+    # plugin path (and their plugin entry points in egg order). Scanning and
+    # sorting a large number of eggs is slow, so if this is set then it is
+    # only done when the eggs on the plugin path change (eggs are added,
+    # removed or modified). If this is empty (the default) nothing is cached.
+    #
+    # Note that the cache is only written if there were no broken
+    # distributions (so that they are always reported).
+    discovery_cache = Str
+
     # If a plugin cannot be loaded for any reason, this callable is called
     # with the following arguments: entry_point, exception.
     on_broken_plugin = Callable
@@ -53,10 +66,20 @@ class EggBasketPluginManager(PluginManager):
     # A list of directories that will be searched to find plugins.
     plugin_path = List(Directory)
 
+    # The number of processes used to byte-compile the eggs that contain the
+    # (included) plugins, in parallel, before the plugins are imported. Most
+    # of the cost of creating plugins is usually importing their modules, and
+    # this means that the imports (which are still done one at a time, in egg
+    # order) do not have to compile anything. Only unzipped eggs can be
+    # compiled.
+    #
+    # If this is 0 (the default) then nothing is compiled in advance.
+    precompile_processes = Int(0)
+
     @on_trait_change('plugin_path[]')
     def _plugin_path_changed(self, obj, trait_name, removed, added):
         self._update_sys_dot_path(removed, added)
-        self.reset_traits(['_plugins'])
+        self._update_plugins(removed, added)
 
     # Protected 'PluginManager' protocol ######################################
 
@@ -64,6 +87,7 @@ class EggBasketPluginManager(PluginManager):
         """ Trait initializer. """
 
         plugins = self._harvest_plugins_in_eggs(self.application)
+        self._harvested = True
 
         logger.debug('egg basket plugin manager found plugins <%s>', plugins)
 
@@ -71,11 +95,24 @@ class EggBasketPluginManager(PluginManager):
 
     #### Private protocol #####################################################
 
+    # True once the plugins on the plugin path have been harvested (until
+    # then, changes to the plugin path don't have to be harvested
+    # incrementally).
+    _harvested = Bool(False)
+
+    # The directory on the plugin path that each plugin was found in.
+    #
+    # { plugin : dirname }
+    _plugin_directories = Dict
+
     def _create_plugin_from_entry_point(self, ep, application):
         """ Create a plugin from an entry point. """
 
-        klass  = ep.load()
-        plugin = klass(application=application)
+        with profile_phase(application, 'load', ep.name):
+            klass = ep.load()
+
+        with profile_phase(application, 'construct', ep.name):
+            plugin = klass(application=application)
 
         # Warn if the entry point is an old-style one where the LHS didn't have
         # to be the same as the plugin Id.
@@ -87,43 +124,126 @@ class EggBasketPluginManager(PluginManager):
 
         return plugin
 
-    def _get_plugin_entry_points(self, working_set):
-        """ Return all plugin entry points in the working set. """
+    def _find_plugin_entry_points(self, dirname=None):
+        """ Find the plugin entry points in the eggs on the plugin path.
 
-        entry_points = get_entry_points_in_egg_order(
-            working_set, self.ENVISAGE_PLUGINS_ENTRY_POINT
-        )
+        If a directory is specified then only the entry points in the eggs
+        in that directory are returned (the other directories on the plugin
+        path are assumed to have been harvested already).
 
-        return entry_points
+        The eggs are also added to the global working set.
+
+        """
+
+        if dirname is not None:
+            return self._find_plugin_entry_points_in_directory(dirname)
 
-    def _harvest_plugins_in_eggs(self, application):
-        """ Harvest plugins found in eggs on the plugin path. """
+        if len(self.discovery_cache) > 0:
+            entry_points = get_cached_entry_points(
+                self.discovery_cache, self.plugin_path,
+                self.ENVISAGE_PLUGINS_ENTRY_POINT
+            )
+            if entry_points is not None:
+                return entry_points
+
+        # Keep track of whether any distributions are broken.
+        broken = []
+        def on_error(errors):
+            broken.append(errors)
+            self._handle_broken_distributions(errors)
 
         # We first add the eggs to a local working set so that when we get
         # the plugin entry points we don't pick up any from other eggs
         # installed on sys.path.
         plugin_working_set = pkg_resources.WorkingSet(self.plugin_path)
-        add_eggs_on_path(plugin_working_set, self.plugin_path,
-                         self._handle_broken_distributions)
+        distributions = add_eggs_on_path(
+            plugin_working_set, self.plugin_path, on_error
+        )
 
         # We also add the eggs to the global working set as otherwise the
         # plugin classes can't be imported!
-        add_eggs_on_path(pkg_resources.working_set, self.plugin_path,
-                         self._handle_broken_distributions)
+        add_eggs_on_path(pkg_resources.working_set, self.plugin_path, on_error)
+
+        entry_points = self._get_plugin_entry_points(plugin_working_set)
+
+        if len(self.discovery_cache) > 0 and len(broken) == 0:
+            save_entry_points_to_cache(
+                self.discovery_cache, self.plugin_path,
+                self.ENVISAGE_PLUGINS_ENTRY_POINT, distributions, entry_points
+            )
+
+        return entry_points
+
+    def _find_plugin_entry_points_in_directory(self, dirname):
+        """ Find the plugin entry points in the eggs in a directory. """
+
+        plugin_working_set = pkg_resources.WorkingSet(self.plugin_path)
+        add_eggs_on_path(
+            plugin_working_set, [dirname], self._handle_broken_distributions
+        )
+        add_eggs_on_path(
+            pkg_resources.working_set, [dirname],
+            self._handle_broken_distributions
+        )
+
+        entry_points = [
+            entry_point for entry_point
+            in self._get_plugin_entry_points(plugin_working_set)
+
+            if self._get_egg_directory(entry_point) == _normpath(dirname)
+        ]
+
+        return entry_points
+
+    def _get_egg_directory(self, entry_point):
+        """ Return the (normalized) directory containing an entry point.
+
+        """
+
+        return _normpath(os.path.dirname(entry_point.dist.location))
+
+    def _get_plugin_entry_points(self, working_set):
+        """ Return all plugin entry points in the working set. """
+
+        entry_points = get_entry_points_in_egg_order(
+            working_set, self.ENVISAGE_PLUGINS_ENTRY_POINT
+        )
+
+        return entry_points
+
+    def _harvest_plugins_in_eggs(self, application, dirname=None):
+        """ Harvest plugins found in eggs on the plugin path.
+
+        If a directory is specified then only the plugins in eggs in that
+        directory are harvested.
+
+        """
+
+        entry_points = [
+            entry_point
+            for entry_point in self._find_plugin_entry_points(dirname)
+
+            if self._include_plugin(entry_point.name)
+        ]
+
+        if self.precompile_processes > 0:
+            self._precompile_entry_points(entry_points)
 
         plugins = []
-        for entry_point in self._get_plugin_entry_points(plugin_working_set):
-            if self._include_plugin(entry_point.name):
-                try:
-                    plugin = self._create_plugin_from_entry_point(entry_point,
-                                                                  application)
-                    plugins.append(plugin)
-                except Exception as exc:
-                    exc_tb = traceback.format_exc()
-                    msg = 'Error loading plugin: %s (from %s)\n%s'\
-                        %(entry_point.name, entry_point.dist.location, exc_tb)
-                    logger.error(msg)
-                    self.on_broken_plugin(entry_point, exc)
+        for entry_point in entry_points:
+            try:
+                plugin = self._create_plugin_from_entry_point(entry_point,
+                                                              application)
+                plugins.append(plugin)
+                self._plugin_directories[plugin] = self._get_egg_directory(
+                    entry_point
+                )
+            except Exception as exc:
+                exc_tb = traceback.format_exc()
+                msg = 'Error loading plugin: %s (from %s)\n%s'\
+                    %(entry_point.name, entry_point.dist.location, exc_tb)
+                logger.error(msg)
+                self.on_broken_plugin(entry_point, exc)
 
         return plugins
 
@@ -135,6 +255,58 @@ class EggBasketPluginManager(PluginManager):
             for dist, exc in errors.items():
                 self.on_broken_distribution(dist, exc)
 
+    def _precompile_entry_points(self, entry_points):
+        """ Byte-compile the eggs that contain the entry points. """
+
+        locations = [entry_point.dist.location for entry_point in entry_points]
+
+        # Compiling is only an optimization, so if it fails for any reason
+        # we just carry on and let the imports do it instead.
+        try:
+            compile_eggs(locations, self.precompile_processes)
+
+        except Exception:
+            logger.exception('Error byte-compiling plugin eggs')
+
+        return
+
+    def _update_plugins(self, removed, added):
+        """ Update the plugins when directories are added to/removed from
+        the plugin path.
+
+        Only the plugins in the directories that were removed are removed
+        (firing 'plugin_removed') and only the directories that were added
+        are harvested (firing 'plugin_added' for each new plugin, which is
+        added to the end of the list of plugins).
+
+        """
+
+        # If the plugins haven't been harvested yet then they will be harvested
+        # from the new plugin path when they are.
+        if not self._harvested:
+            return
+
+        # If the whole plugin path was replaced then only the directories that
+        # are not in both the old and new paths have actually changed.
+        removed, added = (
+            [dirname for dirname in removed if dirname not in added],
+            [dirname for dirname in added if dirname not in removed]
+        )
+
+        removed_dirnames = set(_normpath(dirname) for dirname in removed)
+        for plugin in self._plugins[:]:
+            if self._plugin_directories.get(plugin) in removed_dirnames:
+                del self._plugin_directories[plugin]
+                self.remove_plugin(plugin)
+
+        for dirname in added:
+            for plugin in self._harvest_plugins_in_eggs(
+                self.application, dirname
+            ):
+                self.add_plugin(plugin)
+
+        return
+
     def _update_sys_dot_path(self, removed, added):
         """ Add/remove the given entries from sys.path. """
 
@@ -146,4 +318,12 @@ class EggBasketPluginManager(PluginManager):
             if dirname not in sys.path:
                 sys.path.append(dirname)
 
+
+def _normpath(dirname):
+    """ Normalize a directory name so that it can be compared with others.
+
+    """
+
+    return os.path.normcase(os.path.abspath(dirname))
+
 #### EOF ######################################################################
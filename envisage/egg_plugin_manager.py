@@ -2,7 +2,7 @@
 
 
 # Standard library imports.
-import logging, pkg_resources, re
+import logging, pkg_resources
 
 # Enthought library imports.
 from traits.api import Instance, List, Str
@@ -10,6 +10,7 @@ from traits.api import Instance, List, Str
 # Local imports.
 from egg_utils import get_entry_points_in_egg_order
 from plugin_manager import PluginManager
+from plugin_profiler import profile_phase
 
 
 # Logging.
@@ -36,6 +37,10 @@ class EggPluginManager(PluginManager):
     # Entry point Id.
     PLUGINS = 'envisage.plugins'
 
+    # The flags used when matching plugin Ids with the 'include' and 'exclude'
+    # patterns (which are regular expressions, not 'fnmatch' patterns).
+    PATTERN_FLAGS = 0
+
     #### 'EggPluginManager' interface #########################################
 
     # The working set that contains the eggs that contain the plugins that
@@ -82,8 +87,11 @@ class EggPluginManager(PluginManager):
     def _create_plugin_from_ep(self, ep):
         """ Create a plugin from an extension point. """
 
-        klass  = ep.load()
-        plugin = klass(application=self.application)
+        with profile_phase(self.application, 'load', ep.name):
+            klass = ep.load()
+
+        with profile_phase(self.application, 'construct', ep.name):
+            plugin = klass(application=self.application)
 
         # Warn if the entry point is an old-style one where the LHS didn't have
         # to be the same as the plugin Id.
@@ -95,38 +103,13 @@ class EggPluginManager(PluginManager):
 
         return plugin
 
-    def _is_excluded(self, plugin_id):
-        """ Return True if the plugin Id is excluded.
-
-        If no 'exclude' patterns are specified then this method returns False
-        for all plugin Ids.
-
-        """
-
-        if len(self.exclude) == 0:
-            return False
-
-        for pattern in self.exclude:
-            if re.match(pattern, plugin_id) is not None:
-                return True
-
-        return False
-
-    def _is_included(self, plugin_id):
-        """ Return True if the plugin Id is included.
-
-        If no 'include' patterns are specified then this method returns True
-        for all plugin Ids.
+    def _translate_pattern(self, pattern):
+        """ Translate an 'include' or 'exclude' pattern into a regular
+        expression.
 
         """
 
-        if len(self.include) == 0:
-            return True
-
-        for pattern in self.include:
-            if re.match(pattern, plugin_id) is not None:
-                return True
-
-        return False
+        # The patterns are already regular expressions!
+        return pattern
 
 #### EOF ######################################################################
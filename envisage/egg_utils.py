@@ -2,14 +2,27 @@
 
 
 # Standard library imports.
-import pkg_resources
+import compileall, json, logging, os, pkg_resources, sys
 
 # Enthought library imports.
 from traits.util.toposort import topological_sort
 
 
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+# The version of the format of egg discovery cache files (if the format
+# changes then old cache files are simply ignored).
+EGG_DISCOVERY_CACHE_VERSION = 2
+
+
 def add_eggs_on_path(working_set, path, on_error=None):
-    """ Add all eggs found on the path to a working set. """
+    """ Add all eggs found on the path to a working set.
+
+    Returns the distributions that were added.
+
+    """
 
     environment = pkg_resources.Environment(path)
 
@@ -26,9 +39,93 @@ def add_eggs_on_path(working_set, path, on_error=None):
     # modules in the eggs available for importing).
     map(working_set.add, distributions)
 
+    return distributions
+
+
+def compile_eggs(locations, processes):
+    """ Byte-compile the modules in eggs using a pool of processes.
+
+    This warms the bytecode cache so that importing the modules later does
+    not have to compile them. Only unzipped eggs (i.e. directories) can be
+    compiled, any other locations are ignored.
+
+    """
+
+    # Standard library imports.
+    #
+    # Do the import here as compiling the eggs is optional (and most
+    # applications won't do it).
+    import multiprocessing
+
+    locations = sorted(set(
+        location for location in locations if os.path.isdir(location)
+    ))
+    if len(locations) == 0:
+        return
+
+    pool = multiprocessing.Pool(min(processes, len(locations)))
+    try:
+        results = pool.map(_compile_egg, locations)
+
+    finally:
+        pool.close()
+        pool.join()
+
+    for location, ok in zip(locations, results):
+        if not ok:
+            logger.warn('errors byte-compiling egg <%s>', location)
+
     return
 
 
+def get_cached_entry_points(filename, path, entry_point_name):
+    """ Return the entry points recorded in an egg discovery cache.
+
+    The cache (see 'save_entry_points_to_cache') records which eggs on the
+    path were added to the working set and their entry points in egg order.
+    If the cache is missing, unreadable or stale (i.e. any egg on the path
+    has been added, removed or changed since it was saved) then return None.
+
+    Otherwise, the distributions are added to the global working set (so
+    that their modules can be imported) and the entry points are returned
+    *without* scanning the path or sorting the eggs again.
+
+    """
+
+    try:
+        with open(filename) as f:
+            cache = json.load(f)
+
+    except (IOError, ValueError):
+        return None
+
+    signature = _get_egg_discovery_signature(path, entry_point_name)
+    if cache.get('signature') != signature:
+        logger.debug('egg discovery cache <%s> is stale', filename)
+        return None
+
+    distributions = {}
+    for location in cache['locations']:
+        found = list(pkg_resources.find_distributions(location, only=True))
+        if len(found) == 0:
+            return None
+
+        distributions[location] = found[0]
+
+    for location in cache['locations']:
+        pkg_resources.working_set.add(distributions[location])
+
+    entry_points = [
+        pkg_resources.EntryPoint.parse(spec, dist=distributions[location])
+
+        for location, spec in cache['entry_points']
+    ]
+
+    logger.debug('egg discovery cache <%s> used', filename)
+
+    return entry_points
+
+
 def get_entry_points_in_egg_order(working_set, entry_point_name):
     """ Return entry points in Egg dependency order. """
 
@@ -95,4 +192,138 @@ def get_requires(working_set, distribution):
 
     return requires
 
+
+def save_entry_points_to_cache(filename, path, entry_point_name,
+                               distributions, entry_points):
+    """ Save the entry points found on a path to an egg discovery cache.
+
+    'distributions' are all of the distributions found on the path (as
+    returned by 'add_eggs_on_path'), including those that the plugins merely
+    require, and 'entry_points' must be in egg order (as returned by
+    'get_entry_points_in_egg_order'). Errors writing the cache are logged
+    and otherwise ignored (the cache is only an optimization).
+
+    """
+
+    cache = {
+        'signature'    : _get_egg_discovery_signature(path, entry_point_name),
+        'locations'    : [
+            distribution.location for distribution in distributions
+        ],
+        'entry_points' : [
+            [entry_point.dist.location, str(entry_point)]
+
+            for entry_point in entry_points
+        ]
+    }
+
+    # Write to a temporary file first so that a half-written cache is never
+    # read (by another process, say).
+    tmp_filename = filename + '.tmp'
+    try:
+        with open(tmp_filename, 'w') as f:
+            json.dump(cache, f)
+
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmp_filename, filename)
+
+    except (IOError, OSError):
+        logger.exception('Error saving egg discovery cache <%s>', filename)
+
+    return
+
+
+def _compile_egg(location):
+    """ Byte-compile all modules in an (unzipped) egg.
+
+    This has to be a module level function so that it can be called in
+    another process.
+
+    """
+
+    return compileall.compile_dir(location, quiet=1)
+
+
+def _get_egg_discovery_signature(path, entry_point_name):
+    """ Return a signature that changes whenever any egg on a path does.
+
+    The signature includes the name and modification time of everything in
+    each directory on the path, and of the metadata of unzipped eggs (whose
+    own modification time does not change when the files inside them do).
+
+    The eggs on the path are resolved against the distributions that are
+    already in the global working set (e.g. those installed in
+    site-packages), so the signature also includes the name and version of
+    each of those (except for the ones on the path itself, which are only
+    added to the working set when the path is scanned).
+
+    """
+
+    directories = []
+    for dirname in path:
+        try:
+            names = sorted(os.listdir(dirname))
+
+        except OSError:
+            names = []
+
+        entries = []
+        for name in names:
+            filename = os.path.join(dirname, name)
+            entries.append([name, _get_mtime(filename)])
+
+            metadata_dirname = os.path.join(filename, 'EGG-INFO')
+            if os.path.isdir(metadata_dirname):
+                for metadata_name in sorted(os.listdir(metadata_dirname)):
+                    entries.append([
+                        os.path.join(name, 'EGG-INFO', metadata_name),
+                        _get_mtime(
+                            os.path.join(metadata_dirname, metadata_name)
+                        )
+                    ])
+
+        directories.append([dirname, entries])
+
+    normalized_path = set(_normpath(dirname) for dirname in path)
+    working_set = sorted(
+        [distribution.project_name, distribution.version]
+
+        for distribution in pkg_resources.working_set
+        if _normpath(os.path.dirname(distribution.location))
+        not in normalized_path
+    )
+
+    signature = {
+        'version'          : EGG_DISCOVERY_CACHE_VERSION,
+        'python'           : sys.version,
+        'entry_point_name' : entry_point_name,
+        'directories'      : directories,
+        'working_set'      : working_set
+    }
+
+    # Round-trip the signature through JSON so that it can be compared with
+    # one loaded from a cache file.
+    return json.loads(json.dumps(signature))
+
+
+def _get_mtime(filename):
+    """ Return the modification time of a file (or None if it is gone). """
+
+    try:
+        mtime = os.path.getmtime(filename)
+
+    except OSError:
+        mtime = None
+
+    return mtime
+
+
+def _normpath(dirname):
+    """ Normalize a directory name so that it can be compared with others.
+
+    """
+
+    return os.path.normcase(os.path.abspath(dirname))
+
 #### EOF ######################################################################
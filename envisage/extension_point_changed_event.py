@@ -1,22 +1,34 @@
 """ An event fired when an extension point's extensions have changed. """
 
 
-# Enthought library imports.
-from traits.api import TraitListEvent
+class ExtensionPointChangedEvent(object):
+    """ An event fired when an extension point's extensions have changed.
 
+    This has the same attributes as a traits 'TraitListEvent' ('index',
+    'removed' and 'added') plus the extension point Id, but it is a plain
+    (slotted) object because an event is created for every change to every
+    extension point that somebody is listening to.
 
-class ExtensionPointChangedEvent(TraitListEvent):
-    """ An event fired when an extension point's extensions have changed. """
+    """
 
-    def __init__ (self, extension_point_id=None, **kw):
-        """ Constructor. """
+    __slots__ = ('extension_point_id', 'index', 'removed', 'added')
 
-        # The base class has the 'index', 'removed' and 'added' attributes.
-        super(ExtensionPointChangedEvent, self).__init__(**kw)
+    def __init__(self, extension_point_id=None, index=0, removed=None,
+                 added=None):
+        """ Constructor. """
 
-        # We add the extension point Id.
         self.extension_point_id = extension_point_id
+        self.index = index
+        self.removed = removed if removed is not None else []
+        self.added = added if added is not None else []
 
         return
 
+    def __repr__(self):
+        """ Return a string representation of the event. """
+
+        return 'ExtensionPointChangedEvent(%r, index=%r)' % (
+            self.extension_point_id, self.index
+        )
+
 #### EOF ######################################################################
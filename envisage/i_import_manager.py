@@ -30,18 +30,29 @@ class IImportManager(Interface):
            Which is turned into the equivalent of::
 
              from foo import bar
-             eval('baz', bar.__dict__)
+             getattr(bar, 'baz')
 
-           With the result of the 'eval' being returned.
+           With the value of the attribute being returned.
 
         The second form is recommended as it allows for nested symbols to be
         retreived, e.g. the symbol path 'foo.bar:baz.bling' becomes::
 
             from foo import bar
-            eval('baz.bling', bar.__dict__)
+            getattr(getattr(bar, 'baz'), 'bling')
 
         The first form is retained for backwards compatability.
 
+        Implementations may cache symbols, in which case 'reload_module' must
+        discard the symbols imported from the reloaded module.
+
+        """
+
+    def reload_module(self, module_name):
+        """ Reload the module with the specified (and possibly dotted) name.
+
+        The module is re-executed so that symbols imported from it afterwards
+        reflect any changes to its code. Returns the reloaded module.
+
         """
 
 #### EOF ######################################################################
@@ -2,7 +2,7 @@
 
 
 # Enthought library imports.
-from traits.api import Instance, Interface, Str
+from traits.api import Instance, Interface, List, Str
 
 # Local imports.
 from i_plugin_activator import IPluginActivator
@@ -32,6 +32,10 @@ class IPlugin(Interface):
     # The plugin's name (suitable for displaying to the user).
     name = Str
 
+    # The Ids of the plugins that must be started before this one (and hence
+    # stopped after it).
+    requires = List(Str)
+
     def start(self):
         """ Start the plugin.
 
@@ -19,6 +19,18 @@ class IPluginManager(Interface):
     # Fired when a plugin has been removed from the manager.
     plugin_removed = Event(PluginEvent)
 
+    # Fired (once) when plugins have been added to the manager by
+    # 'add_plugins'. 'plugin_added' is *not* fired for each plugin.
+    plugins_added = Event(PluginEvent)
+
+    # Fired (once) when plugins have been removed from the manager by
+    # 'remove_plugins'. 'plugin_removed' is *not* fired for each plugin.
+    plugins_removed = Event(PluginEvent)
+
+    # Fired when a plugin has been replaced by another one (e.g. when it is
+    # reloaded). 'plugin_added' and 'plugin_removed' are *not* fired.
+    plugin_replaced = Event(PluginEvent)
+
     def __iter__(self):
         """ Return an iterator over the manager's plugins.
 
@@ -29,6 +41,13 @@ class IPluginManager(Interface):
 
         """
 
+    def add_plugins(self, plugins):
+        """ Add several plugins to the manager (in order).
+
+        This is much cheaper than adding the plugins one at a time.
+
+        """
+
     def get_plugin(self, plugin_id):
         """ Return the plugin with the specified Id.
 
@@ -41,6 +60,24 @@ class IPluginManager(Interface):
 
         """
 
+    def remove_plugins(self, plugins):
+        """ Remove several plugins from the manager.
+
+        This is much cheaper than removing the plugins one at a time.
+
+        Raise a 'ValueError' if any of the plugins are not in the manager (in
+        which case none of them are removed).
+
+        """
+
+    def replace_plugin(self, old, new):
+        """ Replace a plugin with another one.
+
+        The new plugin takes the old one's place (e.g. in the order that
+        plugins are started).
+
+        """
+
     def start(self):
         """ Start the plugin manager.
 
@@ -14,6 +14,14 @@ class IProviderExtensionRegistry(IExtensionRegistry):
 
         """
 
+    def add_providers(self, providers):
+        """ Add several extension providers (in order).
+
+        Listeners are told about all of the providers' contributions to each
+        extension point in a single event.
+
+        """
+
     def get_providers(self):
         """ Return all of the providers in the registry.
 
@@ -26,4 +34,33 @@ class IProviderExtensionRegistry(IExtensionRegistry):
 
         """
 
+    def remove_providers(self, providers):
+        """ Remove several extension providers.
+
+        Listeners are told about all of the providers' contributions to each
+        extension point in as few events as possible (one, if the providers'
+        contributions are next to each other).
+
+        Raise a 'ValueError' if any of the providers are not in the registry
+        (in which case none of them are removed).
+
+        """
+
+    def replace_provider(self, old, new, key=None):
+        """ Replace an extension provider with another one.
+
+        The new provider takes the old one's place and listeners are only
+        told about the contributions that are actually different.
+
+        By default contributions are compared using '=='. That works well for
+        values (strings, numbers, tuples etc) but most other objects are
+        only equal to themselves, so *all* of the old provider's object
+        contributions are reported as removed and all of the new provider's
+        as added. To do better, 'key' can be a callable that takes a
+        contribution and returns the value to compare it by (e.g. its name).
+
+        Raise a 'ValueError' if the old provider is not in the registry.
+
+        """
+
 #### EOF ######################################################################
@@ -30,6 +30,22 @@ class IServiceRegistry(Interface):
     # An event that is fired when a service is unregistered.
     unregistered = Event
 
+    # An event that is fired when services are registered in bulk (the value
+    # is the list of the new service Ids).
+    #
+    # This is fired *after* 'registered' has been fired for each of the
+    # individual services (which is only done so that listeners that
+    # predate bulk registration still see every service; new listeners
+    # should listen to this event as well).
+    services_registered = Event
+
+    # An event that is fired when services are unregistered in bulk (the
+    # value is the list of the service Ids).
+    #
+    # This is fired *after* 'unregistered' has been fired for each of the
+    # individual services.
+    services_unregistered = Event
+
     def get_service(self, protocol, query='', minimize='', maximize=''):
         """ Return at most one service that matches the specified query.
 
@@ -46,6 +62,20 @@ class IServiceRegistry(Interface):
 
         """
 
+    def get_service_async(self, protocol, query='', minimize='', maximize=''):
+        """ Return a future for at most one service that matches the query.
+
+        This is the same as 'get_service', except that the lookup (and hence
+        the call to any service factory that has to be made to create the
+        service) happens on a worker thread. The result of the returned future
+        is the service (or None if no such service is found).
+
+        This allows slow service factories (e.g. ones that open database
+        connections) to be called without blocking the caller, and hence
+        services to be prefetched, e.g. when the user interface is idle.
+
+        """
+
     def get_service_from_id(self, service_id):
         """ Return the service with the specified id.
 
@@ -66,6 +96,27 @@ class IServiceRegistry(Interface):
 
         """
 
+    def get_services_async(self, protocol, query='', minimize='', maximize=''):
+        """ Return a future for all services that match the specified query.
+
+        This is the same as 'get_services', except that the lookup happens on
+        a worker thread. The result of the returned future is the list of
+        services.
+
+        """
+
+    def get_service_pool(self, protocol, query=''):
+        """ Return at most one service pool that matches the specified query.
+
+        Pools are registered using 'register_service_pool' and they are kept
+        separate from ordinary services, i.e. 'get_service' never returns a
+        pool (and this never returns anything but a pool). The query is
+        evaluated over the pool and the properties it was registered with.
+
+        Return None if no such pool exists.
+
+        """
+
     def get_service_properties(self, service_id):
         """ Return the dictionary of properties associated with a service.
 
@@ -101,6 +152,33 @@ class IServiceRegistry(Interface):
 
         """
 
+    def register_service_pool(self, protocol, pool, properties=None):
+        """ Register a pool of services.
+
+        'pool' is a 'ServicePool' whose objects implement the protocol. It
+        can only be looked up using 'get_service_pool'.
+
+        Return a service Id that can be used to unregister the pool (using
+        'unregister_service') and to get/set any service properties.
+
+        """
+
+    def register_services(self, services):
+        """ Register multiple services.
+
+        'services' is an iterable of '(protocol, obj, properties)' tuples
+        where each element is exactly as for 'register_service' (and so
+        'properties' can be None).
+
+        This is the same as calling 'register_service' for each service
+        (and 'registered' is fired for each of them), except that listeners
+        aren't told about any of the services until they have all been
+        registered, after which a 'services_registered' event is fired.
+
+        Return the list of the new service Ids (in the same order).
+
+        """
+
     def set_service_properties(self, service_id, properties):
         """ Set the dictionary of properties associated with a service.
 
@@ -115,4 +193,17 @@ class IServiceRegistry(Interface):
 
         """
 
+    def unregister_services(self, service_ids):
+        """ Unregister multiple services.
+
+        This is the same as calling 'unregister_service' for each service Id
+        (and 'unregistered' is fired for each of them), except that listeners
+        aren't told about any of the services until they have all been
+        unregistered, after which a 'services_unregistered' event is fired.
+
+        If no service exists for any of the Ids then a 'ValueError' exception
+        is raised and *none* of the services are unregistered.
+
+        """
+
 #### EOF ######################################################################
@@ -1,6 +1,10 @@
 """ The default import manager implementation. """
 
 
+# Standard library imports.
+from collections import deque
+import threading
+
 # Enthought library imports.
 from traits.api import HasTraits, provides
 
@@ -8,6 +12,139 @@ from traits.api import HasTraits, provides
 from i_import_manager import IImportManager
 
 
+class _SymbolCache(object):
+    """ A bounded, thread-safe cache of imported symbols.
+
+    The least recently used symbols are discarded when the cache is full.
+
+    """
+
+    def __init__(self, max_size):
+        """ Constructor. """
+
+        # The maximum number of symbols in the cache.
+        self.max_size = max_size
+
+        # The number of lookups that found (and didn't find) a symbol.
+        self.hits   = 0
+        self.misses = 0
+
+        # { symbol_path : (module_name, symbol) }
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        # The order in which the symbols were used ('OrderedDict' isn't
+        # available in Python 2.6). Each use of a symbol appends a
+        # (use_count, symbol_path) pair to the queue, and '_last_used' records
+        # the most recent use of each symbol, so pairs for earlier uses are
+        # stale and are skipped (and eventually compacted away).
+        #
+        # { symbol_path : use_count }
+        self._last_used = {}
+        self._uses = deque()
+        self._use_count = 0
+
+        return
+
+    def clear(self, module_name=None):
+        """ Discard the symbols imported from a module (or all symbols). """
+
+        with self._lock:
+            if module_name is None:
+                self._entries.clear()
+                self._last_used.clear()
+                self._uses.clear()
+
+            else:
+                for symbol_path, entry in self._entries.items():
+                    if entry[0] == module_name:
+                        del self._entries[symbol_path]
+                        del self._last_used[symbol_path]
+
+        return
+
+    def get(self, symbol_path):
+        """ Return the entry for a symbol path (or None if there isn't one).
+
+        """
+
+        with self._lock:
+            entry = self._entries.get(symbol_path)
+            if entry is None:
+                self.misses += 1
+
+            else:
+                self._use(symbol_path)
+                self.hits += 1
+
+        return entry
+
+    def get_stats(self):
+        """ Return the cache statistics. """
+
+        with self._lock:
+            stats = {
+                'hits'     : self.hits,
+                'misses'   : self.misses,
+                'size'     : len(self._entries),
+                'max_size' : self.max_size
+            }
+
+        return stats
+
+    def set(self, symbol_path, module_name, symbol):
+        """ Add a symbol to the cache. """
+
+        with self._lock:
+            self._entries[symbol_path] = (module_name, symbol)
+            self._use(symbol_path)
+
+            while len(self._entries) > self.max_size:
+                self._discard_least_recently_used()
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _discard_least_recently_used(self):
+        """ Discard the least recently used symbol. """
+
+        while True:
+            use_count, symbol_path = self._uses.popleft()
+            if self._last_used.get(symbol_path) == use_count:
+                del self._entries[symbol_path]
+                del self._last_used[symbol_path]
+                break
+
+        return
+
+    def _use(self, symbol_path):
+        """ Make a symbol the most recently used. """
+
+        self._use_count += 1
+        self._last_used[symbol_path] = self._use_count
+        self._uses.append((self._use_count, symbol_path))
+
+        # Don't let the stale uses pile up (e.g. when a few symbols are looked
+        # up over and over again).
+        if len(self._uses) > 2 * max(self.max_size, len(self._entries)):
+            self._uses = deque(
+                sorted(
+                    (use_count, path)
+                    for path, use_count in self._last_used.items()
+                )
+            )
+
+        return
+
+
+# The symbols imported by *all* import managers (the modules that they are
+# imported from are shared too, in 'sys.modules').
+_symbol_cache = _SymbolCache(max_size=1024)
+
+
 @provides(IImportManager)
 class ImportManager(HasTraits):
     """ The default import manager implementation.
@@ -23,13 +160,90 @@ class ImportManager(HasTraits):
     ###########################################################################
 
     def import_symbol(self, symbol_path):
-        """ Import the symbol defined by the specified symbol path. """
+        """ Import the symbol defined by the specified symbol path.
+
+        Symbols are cached (by all import managers) so importing the same
+        symbol path again is just a dictionary lookup.
+
+        """
+
+        entry = _symbol_cache.get(symbol_path)
+        if entry is not None:
+            symbol = entry[1]
+
+        else:
+            module_name, symbol = self._import_symbol(symbol_path)
+            _symbol_cache.set(symbol_path, module_name, symbol)
+
+        # Event notification.
+        self.symbol_imported = symbol
+
+        return symbol
+
+    def reload_module(self, module_name):
+        """ Reload the module with the specified (and possibly dotted) name.
+
+        """
+
+        # Symbols imported from the old version of the module are stale.
+        self.clear_symbol_cache(module_name)
+
+        module = reload(self._import_module(module_name))
+
+        return module
+
+    ###########################################################################
+    # 'ImportManager' interface.
+    ###########################################################################
+
+    def clear_symbol_cache(self, module_name=None):
+        """ Discard cached symbols.
+
+        If a module name is specified then only the symbols imported from
+        that module are discarded. 'reload_module' does this automatically,
+        but if a module is reloaded by other means then this must be called.
+
+        """
+
+        _symbol_cache.clear(module_name)
+
+        return
+
+    def get_symbol_cache_stats(self):
+        """ Return statistics about the (shared) symbol cache.
+
+        Returns a dictionary in the form::
+
+            {
+                'hits'     : int,
+                'misses'   : int,
+                'size'     : int,
+                'max_size' : int
+            }
+
+        """
+
+        return _symbol_cache.get_stats()
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _import_symbol(self, symbol_path):
+        """ Import the symbol defined by the specified symbol path.
+
+        Returns a tuple in the form (module_name, symbol).
+
+        """
 
         if ':' in symbol_path:
             module_name, symbol_name = symbol_path.split(':')
 
-            module = self._import_module(module_name)
-            symbol = eval(symbol_name, module.__dict__)
+            # Follow the chain of attributes (e.g. 'baz.bling') rather than
+            # using 'eval'.
+            symbol = self._import_module(module_name)
+            for attribute_name in symbol_name.split('.'):
+                symbol = getattr(symbol, attribute_name)
 
         else:
             components = symbol_path.split('.')
@@ -43,14 +257,7 @@ class ImportManager(HasTraits):
 
             symbol = getattr(module, symbol_name)
 
-        # Event notification.
-        self.symbol_imported = symbol
-
-        return symbol
-
-    ###########################################################################
-    # Private interface.
-    ###########################################################################
+        return module_name, symbol
 
     def _import_module(self, module_name):
         """ Import the module with the specified (and possibly dotted) name.
@@ -0,0 +1,334 @@
+""" Scoped preferences that only save the scopes that have changed. """
+
+
+# Standard library imports.
+import atexit, logging, os, shutil, tempfile, threading, time
+
+# Enthought library imports.
+from apptools.preferences.api import Preferences, ScopedPreferences
+from traits.api import Any, Bool, Float, List
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+class IncrementalPreferences(ScopedPreferences):
+    """ Scoped preferences that only save the scopes that have changed.
+
+    This is the application's default preferences node. Its 'application'
+    scope keeps track of whether any of its preferences have been set,
+    removed or cleared since it was loaded (or last saved), and 'save' only
+    rewrites the scope's file if they have. The file is written atomically,
+    i.e. to a temporary file that then replaces it, so a crash part way
+    through a save never leaves a truncated preferences file.
+
+    Preferences can also be saved on a background thread (see
+    'save_in_background'). Any such save that is still running when the
+    process exits is given at most 'exit_timeout' seconds to finish.
+
+    """
+
+    #### 'IncrementalPreferences' interface ###################################
+
+    # How long (in seconds) to wait for background saves to finish when the
+    # process exits.
+    exit_timeout = Float(10.0)
+
+    #### Private interface ####################################################
+
+    # The lock that serializes saves (foreground and background).
+    _save_lock = Any
+
+    # The threads of background saves that may still be running.
+    _save_threads = List
+
+    # Has 'wait' been registered to run at exit?
+    _wait_at_exit = Bool(False)
+
+    ###########################################################################
+    # 'IPreferences' interface.
+    ###########################################################################
+
+    def save(self, file_or_filename=None):
+        """ Save the node's preferences to a file.
+
+        Scopes that haven't changed since they were loaded (or last saved)
+        are not saved (unless a file or filename is specified).
+
+        """
+
+        with self._save_lock:
+            super(IncrementalPreferences, self).save(file_or_filename)
+
+        return
+
+    ###########################################################################
+    # 'IncrementalPreferences' interface.
+    ###########################################################################
+
+    def save_in_background(self):
+        """ Save the preferences on a background thread.
+
+        Returns the thread (use 'wait' to wait for it to finish).
+
+        """
+
+        thread = threading.Thread(
+            target=self._save_in_background, name='save preferences'
+        )
+
+        # Don't let a slow save keep the process alive for longer than
+        # 'exit_timeout'.
+        thread.daemon = True
+
+        self._save_threads = [
+            save_thread for save_thread in self._save_threads
+            if save_thread.is_alive()
+        ] + [thread]
+
+        if not self._wait_at_exit:
+            atexit.register(self._wait_for_exit)
+            self._wait_at_exit = True
+
+        thread.start()
+
+        return thread
+
+    def wait(self, timeout=None):
+        """ Wait for any background saves to finish.
+
+        Returns True if they have all finished, or False if the timeout (in
+        seconds) expired first.
+
+        """
+
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        for thread in self._save_threads[:]:
+            if timeout is None:
+                thread.join()
+
+            else:
+                thread.join(max(0, deadline - time.time()))
+
+        self._save_threads = [
+            thread for thread in self._save_threads if thread.is_alive()
+        ]
+
+        return len(self._save_threads) == 0
+
+    ###########################################################################
+    # 'ScopedPreferences' interface.
+    ###########################################################################
+
+    def _scopes_default(self):
+        """ Trait initializer. """
+
+        scopes = [
+            _TrackedPreferences(
+                name     = 'application',
+                filename = self.application_preferences_filename
+            ),
+
+            Preferences(name='default')
+        ]
+
+        return scopes
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def __save_lock_default(self):
+        """ Trait initializer. """
+
+        return threading.Lock()
+
+    def _save_in_background(self):
+        """ Save the preferences (this runs on a background thread). """
+
+        try:
+            self.save()
+
+        except Exception:
+            logger.exception('error saving preferences')
+
+        return
+
+    def _wait_for_exit(self):
+        """ Wait (a while) for any background saves when the process exits.
+
+        """
+
+        if not self.wait(self.exit_timeout):
+            logger.warn(
+                'preferences not saved after %.1fs - giving up',
+                self.exit_timeout
+            )
+
+        return
+
+
+class _TrackedPreferences(Preferences):
+    """ A preferences node that knows if it has changed.
+
+    A change to any node in the tree marks the root of the tree as dirty.
+
+    """
+
+    # Has the tree changed since it was loaded (or last saved)? This is only
+    # used in the root of the tree.
+    dirty = Bool(False)
+
+    ###########################################################################
+    # 'IPreferences' interface.
+    ###########################################################################
+
+    def save(self, file_or_filename=None):
+        """ Save the node's preferences to a file.
+
+        If no file or filename is specified then the preferences are only
+        saved if they have changed.
+
+        """
+
+        if file_or_filename is None:
+            if not self.dirty:
+                logger.debug('preferences <%s> unchanged', self.filename)
+                return
+
+            file_or_filename = self.filename
+
+        # Only files that we know the name of can be replaced atomically.
+        if not isinstance(file_or_filename, basestring):
+            super(_TrackedPreferences, self).save(file_or_filename)
+
+        elif len(file_or_filename) > 0:
+            # Any changes made while we are saving will make the node dirty
+            # again.
+            self.dirty = False
+            try:
+                self._save_atomically(file_or_filename)
+
+            except:
+                self.dirty = True
+                raise
+
+        return
+
+    ###########################################################################
+    # Protected 'Preferences' interface.
+    ###########################################################################
+
+    def _clear(self):
+        """ Remove all preferences from this node. """
+
+        if len(self._keys()) > 0:
+            super(_TrackedPreferences, self)._clear()
+            self._set_dirty()
+
+        return
+
+    def _create_child(self, name):
+        """ Create a child of this node with the specified name. """
+
+        self._lk.acquire()
+        child = self._children[name] = _TrackedPreferences(
+            name=name, parent=self
+        )
+        self._lk.release()
+
+        return child
+
+    def _remove(self, name):
+        """ Remove a preference value from this node. """
+
+        if name in self._keys():
+            super(_TrackedPreferences, self)._remove(name)
+            self._set_dirty()
+
+        return
+
+    def _set(self, key, value):
+        """ Set the value of a preference in this node. """
+
+        old = self._get(key)
+        super(_TrackedPreferences, self)._set(key, value)
+
+        # Preferences are always stored as strings.
+        if old != str(value):
+            self._set_dirty()
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _save_atomically(self, filename):
+        """ Save the preferences to a temporary file that replaces a file. """
+
+        # Do the import here so that we don't make 'ConfigObj' a requirement
+        # if preferences aren't ever persisted.
+        from configobj import ConfigObj
+
+        logger.debug('saving preferences to <%s>', filename)
+
+        # Just like 'Preferences.save', the preferences are merged into the
+        # existing contents of the file.
+        config_obj = ConfigObj(filename)
+        self._add_node_to_dictionary(self, config_obj)
+
+        directory, basename = os.path.split(os.path.abspath(filename))
+        fd, temporary_filename = tempfile.mkstemp(
+            prefix='.%s.' % basename, suffix='.tmp', dir=directory
+        )
+        try:
+            with os.fdopen(fd, 'w') as f:
+                config_obj.write(f)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if os.path.exists(filename):
+                shutil.copymode(filename, temporary_filename)
+
+            _replace(temporary_filename, filename)
+
+        except:
+            if os.path.exists(temporary_filename):
+                os.remove(temporary_filename)
+            raise
+
+        return
+
+    def _set_dirty(self):
+        """ Mark the root of the tree as dirty. """
+
+        node = self
+        while isinstance(node.parent, _TrackedPreferences):
+            node = node.parent
+
+        node.dirty = True
+
+        return
+
+
+def _replace(source, destination):
+    """ Rename a file, replacing any existing file. """
+
+    try:
+        os.rename(source, destination)
+
+    # On Windows, 'rename' won't replace an existing file.
+    except OSError:
+        if not os.path.exists(destination):
+            raise
+
+        os.remove(destination)
+        os.rename(source, destination)
+
+    return
+
+#### EOF ######################################################################
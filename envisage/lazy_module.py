@@ -0,0 +1,92 @@
+""" A module whose attributes are imported when they are first used. """
+
+
+# Standard library imports.
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """ A module whose attributes are imported when they are first used.
+
+    An 'api' module can replace itself with a lazy module so that importing it
+    is cheap, and only the parts of the API that are actually used are ever
+    imported. See 'install_lazy_module'.
+
+    """
+
+    def __getattr__(self, name):
+        """ Import an attribute that hasn't been imported yet. """
+
+        module_name = self.__dict__['_symbols'].get(name)
+        if module_name is None:
+            raise AttributeError(
+                "'module' object has no attribute '%s'" % name
+            )
+
+        # A non-empty 'fromlist' makes '__import__' return the module itself
+        # rather than the top-level package ('importlib' isn't available in
+        # Python 2.6).
+        value = getattr(__import__(module_name, fromlist=[name]), name)
+
+        # Only import each attribute once (after this, '__getattr__' is not
+        # called for it any more).
+        setattr(self, name, value)
+
+        return value
+
+    def __dir__(self):
+        """ Return the names of the module's attributes. """
+
+        return sorted(set(self.__dict__) | set(self._symbols))
+
+
+def install_lazy_module(name, symbols):
+    """ Replace a module with a lazy module.
+
+    'symbols' is a dictionary in the form::
+
+        { symbol_name : module_name }
+
+    where each module name is relative to the package that contains the
+    module being replaced, e.g. in 'foo/api.py'::
+
+        install_lazy_module(__name__, {
+            'Bar' : 'bar',      # from bar import Bar
+            'Baz' : 'baz.qux'   # from baz.qux import Baz
+        })
+
+    The module's public interface is unchanged ('from foo.api import Bar'
+    still works, as does 'from foo.api import *'), but 'bar' is only imported
+    when 'Bar' is first used.
+
+    Returns the lazy module.
+
+    """
+
+    module = sys.modules[name]
+    package = name.rpartition('.')[0]
+
+    lazy_module = LazyModule(name, module.__doc__)
+    lazy_module.__dict__.update(
+        {
+            '__file__'    : module.__file__,
+            '__package__' : package,
+            '__all__'     : sorted(symbols),
+
+            '_symbols'    : dict(
+                (symbol_name, '%s.%s' % (package, module_name))
+                for symbol_name, module_name in symbols.items()
+            ),
+
+            # Keep a reference to the replaced module (when a module is
+            # garbage collected, its globals are set to None).
+            '_module'     : module
+        }
+    )
+
+    sys.modules[name] = lazy_module
+
+    return lazy_module
+
+#### EOF ######################################################################
@@ -0,0 +1,104 @@
+""" A plugin activator that defers starting plugins until they are used. """
+
+
+# Standard library imports.
+import logging
+
+# Enthought library imports.
+from traits.api import provides
+
+# Local imports.
+from i_plugin_activator import IPluginActivator
+from plugin_activator import PluginActivator
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+# The Id of the extension point that plugins contribute service offers to.
+SERVICE_OFFERS = 'envisage.service_offers'
+
+
+@provides(IPluginActivator)
+class LazyPluginActivator(PluginActivator):
+    """ A plugin activator that defers starting plugins until they are used.
+
+    When the plugin manager starts a plugin that uses this activator, the
+    plugin has already been created and its contributions are available, but
+    its extension point traits are not connected, its services are not
+    registered and its 'start' method is not called. That all happens (just
+    as it does with the default activator) the first time that anybody asks
+    the application for:-
+
+    1) the extensions to one of the plugin's extension points
+    2) a service of one of the protocols that the plugin offers (either via
+       service offers or via 'service' traits)
+
+    If the plugin is never used then it is never started (and hence it is
+    not stopped either!). A plugin can opt in by setting its 'activator'
+    trait, e.g::
+
+        class MyPlugin(Plugin):
+            def _activator_default(self):
+                return LazyPluginActivator()
+
+    This only works with applications derived from 'Application', as they
+    are the ones that know when plugins are used.
+
+    """
+
+    ###########################################################################
+    # 'IPluginActivator' interface.
+    ###########################################################################
+
+    def start_plugin(self, plugin):
+        """ Start the specified plugin. """
+
+        extension_point_ids = [
+            extension_point.id
+            for extension_point in plugin.get_extension_points()
+        ]
+
+        plugin.application.defer_plugin_activation(
+            plugin,
+            lambda: super(LazyPluginActivator, self).start_plugin(plugin),
+            extension_point_ids = extension_point_ids,
+            protocols           = self._get_service_protocols(plugin)
+        )
+
+        return
+
+    def stop_plugin(self, plugin):
+        """ Stop the specified plugin. """
+
+        # If the plugin was never used then it was never really started!
+        if plugin.application.cancel_plugin_activation(plugin):
+            logger.debug('plugin %s was never activated', plugin.id)
+            result = None
+
+        else:
+            result = super(LazyPluginActivator, self).stop_plugin(plugin)
+
+        return result
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _get_service_protocols(self, plugin):
+        """ Return the protocols of all services that a plugin offers. """
+
+        protocols = [
+            service_offer.protocol
+            for service_offer in plugin.get_extensions(SERVICE_OFFERS)
+        ]
+
+        # Services can also be offered via the (deprecated) 'service' traits,
+        # which are registered in 'register_services'.
+        for trait in plugin.traits(service=True).values():
+            protocols.append(plugin._get_service_protocol(trait))
+
+        return protocols
+
+#### EOF ######################################################################
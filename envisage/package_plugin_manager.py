@@ -1,12 +1,16 @@
 """ A plugin manager that finds plugins in packages on the 'plugin_path'. """
 
 
-import logging, sys
+import json, logging, os, sys
 
 from apptools.io import File
-from traits.api import Directory, List, on_trait_change
+from traits.api import Bool, Dict, Directory, Instance, List, Str
+from traits.api import on_trait_change
 
+from i_import_manager import IImportManager
+from import_manager import ImportManager
 from plugin_manager import PluginManager
+from plugin_profiler import profile_phase
 
 
 logger = logging.getLogger(__name__)
@@ -27,11 +31,32 @@ class PackagePluginManager(PluginManager):
     then the module is imported and if it contains a callable 'XXXPlugin' it is
     called with no arguments and it must return a single plugin.
 
+    Either way, the modules must be imported to find out the plugins' Ids, so
+    plugins are imported even if they are then excluded. There are two ways
+    to avoid that:-
+
+    1) A package can contain a static manifest 'plugins.txt' that lists its
+    plugins' Ids and factories in the same syntax as egg entry points, e.g::
+
+        acme.foo = acme.foo.foo_plugin:FooPlugin
+        acme.foo.fred = acme.foo.fred.fred_plugin:FredPlugin
+
+    and then only the modules of the plugins that are included are imported
+    (the manifest is used instead of 'plugins.py' or 'xxx_plugin.py').
+
+    2) If 'scan_cache' is set then the Ids and factories of the plugins found
+    in 'xxx_plugin.py' modules are saved to that file, and the next time the
+    package is searched (if none of its files have changed) they are used
+    just as if they had come from a manifest.
+
     """
 
     # Plugin manifest.
     PLUGIN_MANIFEST = 'plugins.py'
 
+    # Static plugin manifest (this can be read without importing anything).
+    STATIC_PLUGIN_MANIFEST = 'plugins.txt'
+
     #### 'PackagePluginManager' protocol #######################################
 
     # A list of directories that will be searched to find plugins.
@@ -40,7 +65,36 @@ class PackagePluginManager(PluginManager):
     @on_trait_change('plugin_path[]')
     def _plugin_path_changed(self, obj, trait_name, removed, added):
         self._update_sys_dot_path(removed, added)
-        self.reset_traits(['_plugins'])
+        self._update_plugins(removed, added)
+
+    # The name of a file used to cache the Ids and factories of the plugins
+    # found in packages that don't have a static manifest. If this is empty
+    # (the default) nothing is cached.
+    scan_cache = Str
+
+    #### Private protocol #####################################################
+
+    # True once the plugins on the plugin path have been harvested (until
+    # then, changes to the plugin path don't have to be harvested
+    # incrementally).
+    _harvested = Bool(False)
+
+    # The import manager used to import plugin factories.
+    _import_manager = Instance(IImportManager, factory=ImportManager)
+
+    # The directory on the plugin path that each plugin was found in.
+    #
+    # { plugin : dirname }
+    _plugin_directories = Dict
+
+    # The plugins found in each package, keyed by the package directory.
+    #
+    # { package_dirname : {'signature' : [[filename, mtime], ...],
+    #                      'plugins'   : [[plugin_id, factory], ...]} }
+    _scan_index = Dict
+
+    # True if the scan index has changed since it was loaded.
+    _scan_index_changed = Bool(False)
 
     #### Protected 'PluginManager' protocol ###################################
 
@@ -52,6 +106,7 @@ class PackagePluginManager(PluginManager):
 
             if self._include_plugin(plugin.id)
         ]
+        self._harvested = True
 
         logger.debug('package plugin manager found plugins <%s>', plugins)
 
@@ -59,6 +114,68 @@ class PackagePluginManager(PluginManager):
 
     #### Private protocol #####################################################
 
+    def __scan_index_default(self):
+        """ Trait initializer. """
+
+        if len(self.scan_cache) == 0:
+            return {}
+
+        try:
+            with open(self.scan_cache) as f:
+                scan_index = json.load(f)
+
+        except (IOError, ValueError):
+            scan_index = {}
+
+        return scan_index
+
+    def _create_plugin(self, plugin_id, factory_path):
+        """ Create a plugin from the symbol path of its factory. """
+
+        with profile_phase(self.application, 'load', plugin_id):
+            factory = self._import_manager.import_symbol(factory_path)
+
+        with profile_phase(self.application, 'construct', plugin_id):
+            plugin = factory()
+
+        return plugin
+
+    def _get_package_signature(self, package_dirname):
+        """ Return a signature that changes when any file in a package does.
+
+        """
+
+        signature = []
+        for filename in sorted(os.listdir(package_dirname)):
+            if not filename.endswith('.pyc'):
+                path = os.path.join(package_dirname, filename)
+                signature.append([filename, os.path.getmtime(path)])
+
+        # Round-trip the signature through JSON so that it can be compared with
+        # one loaded from the scan cache.
+        return json.loads(json.dumps(signature))
+
+    def _get_plugin_entries(self, package_dirname):
+        """ Return the Ids and factories of the plugins in a package.
+
+        The entries come from the package's static manifest or, failing that,
+        from the scan index. If neither knows about the package then return
+        None (and the package must be searched by importing it).
+
+        """
+
+        manifest = os.path.join(package_dirname, self.STATIC_PLUGIN_MANIFEST)
+        if os.path.isfile(manifest):
+            return self._read_static_manifest(manifest)
+
+        if len(self.scan_cache) > 0:
+            entry = self._scan_index.get(package_dirname)
+            signature = self._get_package_signature(package_dirname)
+            if entry is not None and entry['signature'] == signature:
+                return entry['plugins']
+
+        return None
+
     def _get_plugins_module(self, package_name):
         """ Import 'plugins.py' from the package with the given name.
 
@@ -79,6 +196,19 @@ class PackagePluginManager(PluginManager):
     def _harvest_plugins_in_package(self, package_name, package_dirname):
         """ Harvest plugins found in the given package. """
 
+        # If we know the package's plugin Ids and factories without importing
+        # anything then we only import the plugins that are included.
+        entries = self._get_plugin_entries(package_dirname)
+        if entries is not None:
+            plugins = [
+                self._create_plugin(plugin_id, factory_path)
+                for plugin_id, factory_path in entries
+
+                if self._include_plugin(plugin_id)
+            ]
+
+            return plugins
+
         # If the package contains a 'plugins.py' module, then we import it and
         # look for a callable 'get_plugins' that takes no arguments and returns
         # a list of plugins (i.e. instances that implement 'IPlugin'!).
@@ -93,6 +223,7 @@ class PackagePluginManager(PluginManager):
         # do, call it with no arguments to get a plugin!
         else:
             plugins = []
+            entries = []
             logger.debug('Looking for plugins in %s' % package_dirname)
             for child in File(package_dirname).children or []:
                 if child.ext == '.py' and child.name.endswith('_plugin'):
@@ -106,25 +237,139 @@ class PackagePluginManager(PluginManager):
                     
                     factory = getattr(module, factory_name, None)
                     if factory is not None:
-                        plugins.append(factory())
-                    
+                        plugin = factory()
+                        plugins.append(plugin)
+                        entries.append([
+                            plugin.id,
+                            '%s.%s:%s' % (
+                                package_name, child.name, factory_name
+                            )
+                        ])
+
+            # Remember the plugins so that next time we don't have to import
+            # the package to find them.
+            if len(self.scan_cache) > 0:
+                self._scan_index[package_dirname] = {
+                    'signature' : self._get_package_signature(package_dirname),
+                    'plugins'   : entries
+                }
+                self._scan_index_changed = True
+
         return plugins
 
-    def _harvest_plugins_in_packages(self):
-        """ Harvest plugins found in packages on the plugin path. """
+    def _harvest_plugins_in_packages(self, dirnames=None):
+        """ Harvest plugins found in packages on the plugin path.
+
+        If a list of directories is specified then only the packages in those
+        directories are harvested.
+
+        """
+
+        if dirnames is None:
+            dirnames = self.plugin_path
 
         plugins = []
-        for dirname in self.plugin_path:
+        for dirname in dirnames:
             for child in File(dirname).children or []:
                 if child.is_package:
-                    plugins.extend(
-                        self._harvest_plugins_in_package(
-                            child.name, child.path
-                       ) 
+                    package_plugins = self._harvest_plugins_in_package(
+                        child.name, child.path
                     )
+                    for plugin in package_plugins:
+                        self._plugin_directories[plugin] = dirname
+
+                    plugins.extend(package_plugins)
+
+        if self._scan_index_changed:
+            self._save_scan_index()
 
         return plugins
+
+    def _read_static_manifest(self, filename):
+        """ Read the plugin Ids and factories from a static manifest.
+
+        Blank lines and comments are ignored, and malformed lines are skipped
+        (with a warning).
+
+        """
+
+        entries = []
+        with open(filename) as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.split('#', 1)[0].strip()
+                if len(line) == 0:
+                    continue
+
+                plugin_id, equals, factory_path = line.partition('=')
+                plugin_id    = plugin_id.strip()
+                factory_path = factory_path.strip()
+
+                if len(plugin_id) == 0 or len(factory_path) == 0:
+                    logger.warn(
+                        'ignoring malformed line %d in plugin manifest <%s>: '
+                        '%r', line_number, filename, line
+                    )
+                    continue
+
+                entries.append([plugin_id, factory_path])
+
+        return entries
+
+    def _save_scan_index(self):
+        """ Save the scan index to the scan cache. """
+
+        # Write to a temporary file first so that a half-written cache is
+        # never read (by another process, say).
+        tmp_filename = self.scan_cache + '.tmp'
+        try:
+            with open(tmp_filename, 'w') as f:
+                json.dump(self._scan_index, f)
+
+            if os.path.exists(self.scan_cache):
+                os.remove(self.scan_cache)
+            os.rename(tmp_filename, self.scan_cache)
+
+        except (IOError, OSError):
+            logger.exception('Error saving scan cache <%s>', self.scan_cache)
+
+        self._scan_index_changed = False
+
+        return
     
+    def _update_plugins(self, removed, added):
+        """ Update the plugins when directories are added to/removed from
+        the plugin path.
+
+        Only the plugins in the directories that were removed are removed
+        (firing 'plugin_removed') and only the directories that were added
+        are harvested (firing 'plugin_added' for each new plugin, which is
+        added to the end of the list of plugins).
+
+        """
+
+        # If the plugins haven't been harvested yet then they will be harvested
+        # from the new plugin path when they are.
+        if not self._harvested:
+            return
+
+        # If the whole plugin path was replaced then only the directories that
+        # are not in both the old and new paths have actually changed.
+        removed, added = (
+            [dirname for dirname in removed if dirname not in added],
+            [dirname for dirname in added if dirname not in removed]
+        )
+
+        for plugin in self._plugins[:]:
+            if self._plugin_directories.get(plugin) in removed:
+                del self._plugin_directories[plugin]
+                self.remove_plugin(plugin)
+
+        for plugin in self._harvest_plugins_in_packages(added):
+            if self._include_plugin(plugin.id):
+                self.add_plugin(plugin)
+
+        return
+
     def _update_sys_dot_path(self, removed, added):
         """ Add/remove the given entries from sys.path. """
         
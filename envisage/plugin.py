@@ -62,6 +62,15 @@ class Plugin(ExtensionProvider):
     # just set it!
     name = Str
 
+    # The Ids of the plugins that must be started before this one (and hence
+    # stopped after it).
+    #
+    # The plugin manager uses these to decide the order in which to start
+    # plugins and, if it starts plugins concurrently, which plugins can be
+    # started at the same time. Note that every plugin that comes after the
+    # core plugin implicitly requires it.
+    requires = List(Str)
+
     #### 'IExtensionPointUser' interface ######################################
 
     # The extension registry that the object's extension points are stored in.
@@ -243,6 +252,16 @@ class Plugin(ExtensionProvider):
 
         return
 
+    def get_service_ids(self):
+        """ Return the Ids of the services registered by the plugin.
+
+        These are the services that are unregistered when the plugin is
+        stopped.
+
+        """
+
+        return self._service_ids[:]
+
     def register_services(self):
         """ Register the services offered by the plugin. """
 
@@ -272,8 +291,8 @@ class Plugin(ExtensionProvider):
         service_ids = self._service_ids[:]
         service_ids.reverse()
 
-        for service_id in service_ids:
-            self.application.unregister_service(service_id)
+        if len(service_ids) > 0:
+            self.application.unregister_services(service_ids)
 
         # Just in case the plugin is started again!
         self._service_ids = []
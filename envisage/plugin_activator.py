@@ -6,6 +6,7 @@ from traits.api import HasTraits, provides
 
 # Local imports.
 from i_plugin_activator import IPluginActivator
+from plugin_profiler import profile_phase
 
 
 @provides(IPluginActivator)
@@ -19,30 +20,42 @@ class PluginActivator(HasTraits):
     def start_plugin(self, plugin):
         """ Start the specified plugin. """
 
+        application = plugin.application
+
         # Connect all of the plugin's extension point traits so that the plugin
         # will be notified if and when contributions are added or removed.
-        plugin.connect_extension_point_traits()
+        with profile_phase(application, 'connect_extension_point_traits',
+                           plugin.id):
+            plugin.connect_extension_point_traits()
 
         # Register all services.
-        plugin.register_services()
+        with profile_phase(application, 'register_services', plugin.id):
+            plugin.register_services()
 
         # Plugin specific start.
-        plugin.start()
+        with profile_phase(application, 'start', plugin.id):
+            result = plugin.start()
 
-        return
+        return result
 
     def stop_plugin(self, plugin):
         """ Stop the specified plugin. """
 
+        application = plugin.application
+
         # Plugin specific stop.
-        plugin.stop()
+        with profile_phase(application, 'stop', plugin.id):
+            result = plugin.stop()
 
         # Unregister all service.
-        plugin.unregister_services()
+        with profile_phase(application, 'unregister_services', plugin.id):
+            plugin.unregister_services()
 
         # Disconnect all of the plugin's extension point traits.
-        plugin.disconnect_extension_point_traits()
+        with profile_phase(application, 'disconnect_extension_point_traits',
+                           plugin.id):
+            plugin.disconnect_extension_point_traits()
 
-        return
+        return result
 
 #### EOF ######################################################################
@@ -0,0 +1,327 @@
+""" Utility functions for working with the dependencies between plugins. """
+
+
+# Standard library imports.
+import heapq, logging, Queue, threading, time
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+# The Id of the core plugin. Every plugin that comes after it implicitly
+# requires it (so that, even when plugins are started concurrently, the core
+# plugin is started before them just as it would be if they were started one
+# at a time).
+CORE_PLUGIN_ID = 'envisage.core'
+
+
+def get_requirements(plugins):
+    """ Return the plugins that each plugin requires.
+
+    Returns a dictionary in the form::
+
+        { plugin : [required_plugin, ...] }
+
+    Requirements on plugins that are not in the list are ignored (with a
+    warning), as the plugin may have been excluded deliberately.
+
+    Every plugin that comes after the core plugin in the list implicitly
+    requires it (plugins that come before it don't).
+
+    """
+
+    plugins = list(plugins)
+
+    plugins_by_id = {}
+    for plugin in plugins:
+        plugins_by_id.setdefault(plugin.id, []).append(plugin)
+
+    core_index = None
+    for index, plugin in enumerate(plugins):
+        if plugin.id == CORE_PLUGIN_ID:
+            core_index = index
+            break
+
+    requirements = {}
+    for index, plugin in enumerate(plugins):
+        required_ids = list(plugin.requires)
+        if core_index is not None and index > core_index \
+           and plugin.id != CORE_PLUGIN_ID:
+            required_ids.insert(0, CORE_PLUGIN_ID)
+
+        required = requirements[plugin] = []
+        for required_id in required_ids:
+            if required_id in plugins_by_id:
+                required.extend(plugins_by_id[required_id])
+
+            else:
+                logger.warn(
+                    'plugin <%s> requires unknown plugin <%s>',
+                    plugin.id, required_id
+                )
+
+    return requirements
+
+
+def get_start_order(plugins):
+    """ Return the plugins in the order that they should be started.
+
+    Every plugin is started after the plugins that it requires (including,
+    implicitly, the core plugin if it comes before the plugin in the list).
+    Otherwise the plugins are kept in the order that they were given in, so
+    if no plugin declares any requirements then the order is unchanged (even
+    if the core plugin isn't first). The order is always deterministic and
+    hence so is the (reverse) order in which the plugins are stopped.
+
+    Raise a 'ValueError' if the requirements are circular.
+
+    """
+
+    plugins = list(plugins)
+    requirements = get_requirements(plugins)
+
+    # The index of each plugin in the original list (used to keep the order
+    # as stable as possible).
+    indices = dict((plugin, index) for index, plugin in enumerate(plugins))
+
+    # The number of unstarted requirements of each plugin, and the plugins
+    # that are waiting for each plugin to start.
+    waiting_for = {}
+    dependents = dict((plugin, []) for plugin in plugins)
+    for plugin, required in requirements.items():
+        waiting_for[plugin] = len(required)
+        for required_plugin in required:
+            dependents[required_plugin].append(plugin)
+
+    ready = [
+        indices[plugin] for plugin in plugins if waiting_for[plugin] == 0
+    ]
+    heapq.heapify(ready)
+
+    start_order = []
+    while len(ready) > 0:
+        plugin = plugins[heapq.heappop(ready)]
+        start_order.append(plugin)
+
+        for dependent in dependents[plugin]:
+            waiting_for[dependent] -= 1
+            if waiting_for[dependent] == 0:
+                heapq.heappush(ready, indices[dependent])
+
+    if len(start_order) != len(plugins):
+        raise ValueError(
+            'circular plugin requirements between <%s>' % ', '.join(
+                plugin.id for plugin in plugins if waiting_for[plugin] > 0
+            )
+        )
+
+    return start_order
+
+
+def start_plugins_concurrently(plugins, start_plugin, max_threads):
+    """ Start plugins on a pool of threads.
+
+    'start_plugin' is a callable that takes a plugin and starts it.
+
+    A plugin is only started once all of the plugins that it requires have
+    been started, but plugins that don't depend on each other are started at
+    the same time (using at most 'max_threads' threads). If any plugin fails
+    to start then no more plugins are started and, once the plugins that are
+    already starting have done so, the exception is re-raised.
+
+    Returns the plugins in the order that they were started.
+
+    """
+
+    # Do the import here so that 'concurrent.futures' (the 'futures' package
+    # on Python 2) is only needed if plugins are actually started this way.
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    start_order = get_start_order(plugins)
+    requirements = get_requirements(start_order)
+
+    unstarted = list(start_order)
+    started = []
+    started_set = set()
+    starting = {}
+    exception = None
+
+    executor = ThreadPoolExecutor(max_workers=max_threads)
+    try:
+        while len(unstarted) > 0 or len(starting) > 0:
+            # Start every plugin whose requirements have all been started.
+            if exception is None:
+                for plugin in unstarted[:]:
+                    required = requirements[plugin]
+                    if started_set.issuperset(required):
+                        unstarted.remove(plugin)
+                        future = executor.submit(start_plugin, plugin)
+                        starting[future] = plugin
+
+            if len(starting) == 0:
+                break
+
+            done, not_done = wait(starting.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                plugin = starting.pop(future)
+                if future.exception() is None:
+                    started.append(plugin)
+                    started_set.add(plugin)
+
+                elif exception is None:
+                    exception = future.exception()
+
+    finally:
+        executor.shutdown(wait=True)
+
+    if exception is not None:
+        raise exception
+
+    return started
+
+
+def stop_plugins_with_deadlines(plugins, stop_plugin, max_threads,
+                                plugin_timeout=0, timeout=0):
+    """ Stop plugins on a pool of threads, giving up on any that overrun.
+
+    'stop_plugin' is a callable that takes a plugin and stops it.
+
+    A plugin is only stopped once all of the plugins that require it have
+    been stopped, but plugins that nothing else (still running) requires are
+    stopped at the same time (using at most 'max_threads' threads). With a
+    single thread the plugins are stopped in the reverse of the order that
+    they would be started in.
+
+    If 'plugin_timeout' is greater than zero then a plugin that takes longer
+    than that (in seconds) to stop is abandoned (i.e. it is left to finish on
+    its own thread, and plugins that it requires are then stopped anyway). If
+    'timeout' is greater than zero then once that long has passed, any
+    plugins that are still stopping are abandoned and any that haven't been
+    stopped yet are not stopped at all. The threads are daemon threads so an
+    abandoned plugin can't stop the process from exiting.
+
+    An exception raised when stopping a plugin is logged (rather than raised)
+    so that it doesn't prevent the other plugins from being stopped.
+
+    Returns a dictionary of the plugins that overran, in the form::
+
+        { plugin : seconds }
+
+    where 'seconds' is how long the plugin had been stopping when it was
+    abandoned, or None if it was never stopped.
+
+    """
+
+    # The requirements depend on the order of the plugins, so they are worked
+    # out from the start order (and not the reverse!).
+    start_order = get_start_order(plugins)
+    requirements = get_requirements(start_order)
+
+    stop_order = start_order[::-1]
+
+    # The plugins that require each plugin.
+    dependents = dict((plugin, []) for plugin in stop_order)
+    for plugin, required in requirements.items():
+        for required_plugin in required:
+            dependents[required_plugin].append(plugin)
+
+    # Each thread puts its plugin on this queue when the plugin has stopped.
+    finished = Queue.Queue()
+
+    def stop(plugin):
+        try:
+            stop_plugin(plugin)
+
+        except Exception:
+            logger.exception('error stopping plugin %s', plugin.id)
+
+        finished.put(plugin)
+
+    if timeout > 0:
+        deadline = time.time() + timeout
+
+    else:
+        deadline = None
+
+    unstopped = list(stop_order)
+    stopped = set()
+    stopping = {}
+    overruns = {}
+    while len(unstopped) > 0 or len(stopping) > 0:
+        now = time.time()
+
+        # Give up on everything that is left once the global deadline has
+        # passed.
+        if deadline is not None and now >= deadline:
+            for plugin, started_at in stopping.items():
+                overruns[plugin] = now - started_at
+
+            for plugin in unstopped:
+                overruns[plugin] = None
+
+            break
+
+        # Stop every plugin whose dependents have all been stopped (or
+        # abandoned).
+        for plugin in unstopped[:]:
+            if len(stopping) >= max_threads:
+                break
+
+            if stopped.issuperset(dependents[plugin]):
+                unstopped.remove(plugin)
+                stopping[plugin] = now
+
+                thread = threading.Thread(
+                    target=stop, args=(plugin,), name='stop %s' % plugin.id
+                )
+                thread.daemon = True
+                thread.start()
+
+        # Wait for a plugin to stop, or until the next deadline.
+        deadlines = []
+        if deadline is not None:
+            deadlines.append(deadline)
+
+        if plugin_timeout > 0:
+            deadlines.extend(
+                started_at + plugin_timeout
+                for started_at in stopping.values()
+            )
+
+        try:
+            if len(deadlines) > 0:
+                plugin = finished.get(timeout=max(0, min(deadlines) - now))
+
+            else:
+                plugin = finished.get()
+
+        except Queue.Empty:
+            pass
+
+        else:
+            # Ignore plugins that finish after they have been abandoned.
+            if stopping.pop(plugin, None) is not None:
+                stopped.add(plugin)
+
+        # Abandon any plugins that have overrun their own deadline.
+        if plugin_timeout > 0:
+            now = time.time()
+            for plugin, started_at in stopping.items():
+                if now - started_at >= plugin_timeout:
+                    del stopping[plugin]
+                    stopped.add(plugin)
+                    overruns[plugin] = now - started_at
+
+    for plugin, seconds in overruns.items():
+        if seconds is None:
+            logger.warn('plugin %s not stopped (out of time)', plugin.id)
+
+        else:
+            logger.warn(
+                'plugin %s abandoned after %.3fs stopping', plugin.id, seconds
+            )
+
+    return overruns
+
+#### EOF ######################################################################
@@ -1,14 +1,39 @@
 """ A plugin event. """
 
 
-# Enthought library imports.
-from traits.api import Instance, Vetoable
+class PluginEvent(object):
+    """ A plugin event.
 
+    This is a plain (slotted) object rather than a 'HasTraits' one because an
+    event is created every time a plugin is added, removed or replaced.
 
-class PluginEvent(Vetoable):
-    """ A plugin event. """
+    """
 
-    # The plugin that the event is for.
-    plugin = Instance('envisage.api.IPlugin')
+    __slots__ = ('plugin', 'old_plugin', 'plugins', 'veto')
+
+    def __init__(self, plugin=None, old_plugin=None, plugins=None, veto=False):
+        """ Constructor. """
+
+        # The plugin that the event is for.
+        self.plugin = plugin
+
+        # The plugin that 'plugin' replaced (only for 'plugin_replaced'
+        # events).
+        self.old_plugin = old_plugin
+
+        # The plugins that the event is for (only for 'plugins_added' and
+        # 'plugins_removed' events).
+        self.plugins = plugins if plugins is not None else []
+
+        # Should the request be vetoed? (for compatibility with the traits
+        # 'Vetoable' class that events used to be derived from).
+        self.veto = veto
+
+        return
+
+    def __repr__(self):
+        """ Return a string representation of the event. """
+
+        return 'PluginEvent(plugin=%r)' % (self.plugin,)
 
 #### EOF ######################################################################
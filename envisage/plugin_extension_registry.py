@@ -60,4 +60,28 @@ class PluginExtensionRegistry(ProviderExtensionRegistry):
 
         return
 
+    @on_trait_change('plugin_manager:plugins_added')
+    def _on_plugins_added(self, obj, trait_name, old, event):
+        """ Dynamic trait change handler. """
+
+        self.add_providers(event.plugins)
+
+        return
+
+    @on_trait_change('plugin_manager:plugins_removed')
+    def _on_plugins_removed(self, obj, trait_name, old, event):
+        """ Dynamic trait change handler. """
+
+        self.remove_providers(event.plugins)
+
+        return
+
+    @on_trait_change('plugin_manager:plugin_replaced')
+    def _on_plugin_replaced(self, obj, trait_name, old, event):
+        """ Dynamic trait change handler. """
+
+        self.replace_provider(event.old_plugin, event.plugin)
+
+        return
+
 #### EOF ######################################################################
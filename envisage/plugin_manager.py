@@ -1,21 +1,31 @@
 """ A simple plugin manager implementation. """
 
 
-from fnmatch import fnmatch
-import logging
+from fnmatch import translate
+import logging, os, re
 
-from traits.api import Event, HasTraits, Instance, List, Str, provides
+from traits.api import Any, Dict, Event, Float, HasTraits, Instance, Int
+from traits.api import List, Str
+from traits.api import on_trait_change, provides
 
 from i_application import IApplication
 from i_plugin import IPlugin
 from i_plugin_manager import IPluginManager
+from plugin_dependencies import get_start_order, start_plugins_concurrently
+from plugin_dependencies import stop_plugins_with_deadlines
 from plugin_event import PluginEvent
+from plugin_profiler import profile_phase
 
 
-
+# Logging.
 logger = logging.getLogger(__name__)
 
 
+# The flags used to match plugin Ids with 'fnmatch' patterns ('fnmatch' is
+# case-insensitive on platforms whose file names are).
+FNMATCH_FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+
+
 @provides(IPluginManager)
 class PluginManager(HasTraits):
     """ A simple plugin manager implementation.
@@ -35,6 +45,10 @@ class PluginManager(HasTraits):
     
     """
 
+    # The flags used when matching plugin Ids with the 'include' and 'exclude'
+    # patterns.
+    PATTERN_FLAGS = FNMATCH_FLAGS
+
     #### 'IPluginManager' protocol #############################################
 
     # Fired when a plugin has been added to the manager.
@@ -43,6 +57,17 @@ class PluginManager(HasTraits):
     # Fired when a plugin has been removed from the manager.
     plugin_removed = Event(PluginEvent)
 
+    # Fired (once) when plugins have been added to the manager by
+    # 'add_plugins'.
+    plugins_added = Event(PluginEvent)
+
+    # Fired (once) when plugins have been removed from the manager by
+    # 'remove_plugins'.
+    plugins_removed = Event(PluginEvent)
+
+    # Fired when a plugin has been replaced by another one.
+    plugin_replaced = Event(PluginEvent)
+
     #### 'PluginManager' protocol ##############################################
 
     # The application that the plugin manager is part of.
@@ -67,6 +92,55 @@ class PluginManager(HasTraits):
     # Each item in the list is actually an 'fnmatch' expression.
     include = List(Str)
 
+    @on_trait_change('include[], exclude[]')
+    def _patterns_changed(self):
+        """ Dynamic trait change handler. """
+
+        self._matchers = {}
+        self._reset_plugin_index()
+
+        return
+
+    # The maximum number of threads used to start plugins concurrently.
+    #
+    # Plugins are always started after the plugins that they require (see
+    # 'IPlugin.requires'), but if this is greater than zero, plugins that do
+    # not depend on each other are started at the same time. If it is zero
+    # (the default) then plugins are started one at a time in the calling
+    # thread.
+    start_threads = Int(0)
+
+    # The maximum number of threads used to stop plugins concurrently.
+    #
+    # Plugins are always stopped before the plugins that they require, but if
+    # this is greater than zero, plugins that nothing else requires are
+    # stopped at the same time.
+    stop_threads = Int(0)
+
+    # The number of seconds that stopping all of the plugins may take (0
+    # means no limit). Plugins that haven't been stopped by then are
+    # abandoned (see 'stop_overruns').
+    stop_timeout = Float(0)
+
+    # The number of seconds that stopping any one plugin may take (0 means no
+    # limit). A plugin that takes longer is abandoned and the plugins that it
+    # requires are stopped anyway.
+    #
+    # If any of 'stop_threads', 'stop_timeout' or 'plugin_stop_timeout' is
+    # greater than zero then plugins are stopped on separate threads, and an
+    # exception raised by a plugin's 'stop' method is logged rather than
+    # raised. Otherwise, plugins are stopped one at a time in the calling
+    # thread.
+    plugin_stop_timeout = Float(0)
+
+    # The plugins that overran when the manager was last stopped, in the form:
+    #
+    # { plugin_id : seconds }
+    #
+    # where 'seconds' is how long the plugin had been stopping when it was
+    # abandoned, or None if it was never stopped.
+    stop_overruns = Dict(Str, Any)
+
     #### 'object' protocol #####################################################
 
     def __init__(self, plugins=None, **traits):
@@ -90,13 +164,7 @@ class PluginManager(HasTraits):
     def __iter__(self):
         """ Return an iterator over the manager's plugins. """
 
-        plugins = [
-            plugin for plugin in self._plugins
-
-            if self._include_plugin(plugin.id)
-        ]
-        
-        return iter(plugins)
+        return iter(self._get_included_plugins())
 
     #### 'IPluginManager' protocol #############################################
 
@@ -108,20 +176,27 @@ class PluginManager(HasTraits):
 
         return
 
+    def add_plugins(self, plugins):
+        """ Add several plugins to the manager (in order). """
+
+        plugins = list(plugins)
+
+        self._plugins.extend(plugins)
+        self.plugins_added = PluginEvent(plugins=plugins)
+
+        return
+
     def get_plugin(self, plugin_id):
         """ Return the plugin with the specified Id. """
 
-        for plugin in self._plugins:
-            if plugin_id == plugin.id:
-                if not self._include_plugin(plugin.id):
-                    plugin = None
-                    
-                break
+        if self._plugin_index is None:
+            plugin_index = {}
+            for plugin in self._get_included_plugins():
+                plugin_index.setdefault(plugin.id, plugin)
 
-        else:
-            plugin = None
+            self._plugin_index = plugin_index
 
-        return plugin
+        return self._plugin_index.get(plugin_id)
 
     def remove_plugin(self, plugin):
         """ Remove a plugin from the manager. """
@@ -131,10 +206,52 @@ class PluginManager(HasTraits):
 
         return
 
+    def remove_plugins(self, plugins):
+        """ Remove several plugins from the manager. """
+
+        plugins = list(plugins)
+
+        positions = dict(
+            (id(plugin), index) for index, plugin in enumerate(self._plugins)
+        )
+        for plugin in plugins:
+            if id(plugin) not in positions:
+                raise ValueError('plugin %s is not in the manager' % plugin.id)
+
+        # Delete each run of consecutive plugins in one go (starting from the
+        # end so that the positions of the others don't change).
+        indices = sorted(set(positions[id(plugin)] for plugin in plugins))
+        while len(indices) > 0:
+            stop = start = indices.pop()
+            while len(indices) > 0 and indices[-1] == start - 1:
+                start = indices.pop()
+
+            del self._plugins[start:stop + 1]
+
+        self.plugins_removed = PluginEvent(plugins=plugins)
+
+        return
+
+    def replace_plugin(self, old, new):
+        """ Replace a plugin with another one. """
+
+        self._plugins[self._plugins.index(old)] = new
+        self.plugin_replaced = PluginEvent(plugin=new, old_plugin=old)
+
+        return
+
     def start(self):
         """ Start the plugin manager. """
 
-        map(lambda plugin: self.start_plugin(plugin), self._plugins)
+        start_order = get_start_order(self._plugins)
+
+        if self.start_threads > 0:
+            start_plugins_concurrently(
+                start_order, self.start_plugin, self.start_threads
+            )
+
+        else:
+            map(lambda plugin: self.start_plugin(plugin), start_order)
 
         return
 
@@ -144,22 +261,38 @@ class PluginManager(HasTraits):
         plugin = plugin or self.get_plugin(plugin_id)
         if plugin is not None:
             logger.debug('plugin %s starting', plugin.id)
-            plugin.activator.start_plugin(plugin)
+            with profile_phase(self.application, 'start_plugin', plugin.id):
+                result = plugin.activator.start_plugin(plugin)
             logger.debug('plugin %s started', plugin.id)
 
         else:
             raise SystemError('no such plugin %s' % plugin_id)
 
-        return
+        return result
 
     def stop(self):
         """ Stop the plugin manager. """
 
-        # We stop the plugins in the reverse order that they were started.
-        stop_order = self._plugins[:]
-        stop_order.reverse()
+        # We stop the plugins in the reverse order that they were started (or
+        # would have been started if they were started one at a time).
+        if self.stop_threads > 0 or self.stop_timeout > 0 \
+           or self.plugin_stop_timeout > 0:
+            overruns = stop_plugins_with_deadlines(
+                self._plugins, self.stop_plugin, max(1, self.stop_threads),
+                self.plugin_stop_timeout, self.stop_timeout
+            )
+
+        else:
+            overruns = {}
+
+            stop_order = get_start_order(self._plugins)
+            stop_order.reverse()
 
-        map(lambda plugin: self.stop_plugin(plugin), stop_order)
+            map(lambda plugin: self.stop_plugin(plugin), stop_order)
+
+        self.stop_overruns = dict(
+            (plugin.id, seconds) for plugin, seconds in overruns.items()
+        )
 
         return
 
@@ -169,13 +302,14 @@ class PluginManager(HasTraits):
         plugin = plugin or self.get_plugin(plugin_id)
         if plugin is not None:
             logger.debug('plugin %s stopping', plugin.id)
-            plugin.activator.stop_plugin(plugin)
+            with profile_phase(self.application, 'stop_plugin', plugin.id):
+                result = plugin.activator.stop_plugin(plugin)
             logger.debug('plugin %s stopped', plugin.id)
 
         else:
             raise SystemError('no such plugin %s' % plugin_id)
 
-        return
+        return result
 
     #### Protected 'PluginManager' #############################################
 
@@ -184,6 +318,7 @@ class PluginManager(HasTraits):
     def __plugins_changed(self, trait_name, old, new):
         """ Static trait change handler. """
 
+        self._reset_plugin_index()
         self._update_plugin_application(old, new)
 
         return
@@ -191,10 +326,31 @@ class PluginManager(HasTraits):
     def __plugins_items_changed(self, trait_name, old, new):
         """ Static trait change handler. """
 
+        self._reset_plugin_index()
         self._update_plugin_application(new.removed, new.added)
 
         return
 
+    def _get_included_plugins(self):
+        """ Return the plugins that are included (in order).
+
+        The list is cached until the plugins or the 'include' or 'exclude'
+        patterns change (and a new list is built then, so it is safe to
+        iterate over the returned list while plugins are being added or
+        removed).
+
+        """
+
+        included_plugins = self._included_plugins
+        if included_plugins is None:
+            included_plugins = self._included_plugins = [
+                plugin for plugin in self._plugins
+
+                if self._include_plugin(plugin.id)
+            ]
+
+        return included_plugins
+
     def _include_plugin(self, plugin_id):
         """ Return True if the plugin should be included.
 
@@ -207,8 +363,48 @@ class PluginManager(HasTraits):
 
         return self._is_included(plugin_id) and not self._is_excluded(plugin_id)
     
+    def _translate_pattern(self, pattern):
+        """ Translate an 'include' or 'exclude' pattern into a regular
+        expression.
+
+        """
+
+        return translate(pattern)
+
     #### Private protocol ######################################################
 
+    # The plugins that are included (None until they are needed).
+    _included_plugins = Any
+
+    # The compiled 'include' and 'exclude' patterns.
+    #
+    # { 'include' or 'exclude' : regular expression }
+    _matchers = Dict
+
+    # The included plugins by Id (None until they are needed).
+    #
+    # { plugin_id : plugin }
+    _plugin_index = Any
+
+    def _get_matcher(self, trait_name):
+        """ Return the regular expression that matches any of the patterns
+        in the 'include' or 'exclude' list.
+
+        """
+
+        matcher = self._matchers.get(trait_name)
+        if matcher is None:
+            patterns = getattr(self, trait_name)
+            matcher = self._matchers[trait_name] = re.compile(
+                '|'.join(
+                    '(?:%s)' % self._translate_pattern(pattern)
+                    for pattern in patterns
+                ),
+                self.PATTERN_FLAGS
+            )
+
+        return matcher
+
     def _is_excluded(self, plugin_id):
         """ Return True if the plugin Id is excluded.
 
@@ -220,11 +416,7 @@ class PluginManager(HasTraits):
         if len(self.exclude) == 0:
             return False
 
-        for pattern in self.exclude:
-            if fnmatch(plugin_id, pattern):
-                return True
-
-        return False
+        return self._get_matcher('exclude').match(plugin_id) is not None
 
     def _is_included(self, plugin_id):
         """ Return True if the plugin Id is included.
@@ -237,11 +429,18 @@ class PluginManager(HasTraits):
         if len(self.include) == 0:
             return True
 
-        for pattern in self.include:
-            if fnmatch(plugin_id, pattern):
-                return True
+        return self._get_matcher('include').match(plugin_id) is not None
+
+    def _reset_plugin_index(self):
+        """ Forget the included plugins (they are worked out again when
+        they are next needed).
 
-        return False
+        """
+
+        self._included_plugins = None
+        self._plugin_index = None
+
+        return
 
     def _update_plugin_application(self, removed, added):
         """ Update the 'application' trait of plugins added/removed. """
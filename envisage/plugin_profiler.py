@@ -0,0 +1,598 @@
+""" A profiler that times each phase of each plugin's lifecycle. """
+
+
+# Standard library imports.
+from contextlib import contextmanager
+import json, logging, os, thread, threading, time
+
+# Enthought library imports.
+from traits.api import Any, Bool, Dict, HasTraits, Int, List, Str
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+class PhaseRecord(object):
+    """ The timing of a single phase (of a single plugin). """
+
+    __slots__ = (
+        'phase', 'plugin_id', 'start', 'duration', 'thread_id', 'memory'
+    )
+
+    def __init__(self, phase, plugin_id, start, duration, thread_id,
+                 memory=None):
+        """ Constructor. """
+
+        self.phase     = phase
+        self.plugin_id = plugin_id
+        self.start     = start
+        self.duration  = duration
+        self.thread_id = thread_id
+
+        # The number of bytes allocated (and not freed) during the phase (or
+        # None if memory isn't being measured, or couldn't be measured for
+        # this phase).
+        self.memory    = memory
+
+        return
+
+    def __repr__(self):
+        """ Return a string representation of the record. """
+
+        return 'PhaseRecord(%r, %r, %.6f)' % (
+            self.phase, self.plugin_id, self.duration
+        )
+
+
+class PluginProfiler(HasTraits):
+    """ A profiler that times each phase of each plugin's lifecycle.
+
+    Profiling is switched on by giving an application a profiler, e.g::
+
+        profiler    = PluginProfiler()
+        application = Application(profiler=profiler, plugins=[...])
+        application.run()
+
+        profiler.save_chrome_trace('startup.json')
+
+    The phases that are timed are:-
+
+    - 'load'         (importing the plugin class from an entry point)
+    - 'construct'    (creating the plugin)
+    - 'start_plugin' (the whole of starting a plugin, which includes:-)
+      - 'connect_extension_point_traits'
+      - 'register_services'
+      - 'start'
+    - 'stop_plugin'  (the whole of stopping a plugin, which includes:-)
+      - 'stop'
+      - 'unregister_services'
+      - 'disconnect_extension_point_traits'
+
+    and the application's own 'application_start', 'application_stop' and
+    'save_preferences' phases (which have no plugin Id).
+
+    If an application has no profiler then the only cost at each of the hook
+    points is an attribute lookup.
+
+    """
+
+    #### 'PluginProfiler' interface ###########################################
+
+    # The timings of every phase that has finished, in the order that they
+    # finished.
+    records = List(PhaseRecord)
+
+    ###########################################################################
+    # 'PluginProfiler' interface.
+    ###########################################################################
+
+    def clear(self):
+        """ Forget all timings recorded so far. """
+
+        with self._lock:
+            self.records = []
+
+        return
+
+    def get_chrome_trace(self):
+        """ Return the timings as a Chrome trace.
+
+        The trace is a dictionary in the 'trace event' format that can be
+        loaded into 'chrome://tracing' (or any other trace viewer that
+        understands it). Phases of the same plugin that are nested (e.g.
+        'start' inside 'start_plugin') show up as nested slices.
+
+        """
+
+        pid = os.getpid()
+
+        # All times are relative to the start of the earliest phase.
+        origin = min([record.start for record in self.records] or [0])
+
+        trace_events = []
+        for record in self.records:
+            if record.plugin_id is None:
+                name = record.phase
+
+            else:
+                name = '%s %s' % (record.plugin_id, record.phase)
+
+            args = {'phase' : record.phase, 'plugin' : record.plugin_id}
+            if record.memory is not None:
+                args['memory'] = record.memory
+
+            trace_events.append(
+                {
+                    'name' : name,
+                    'cat'  : 'envisage',
+                    'ph'   : 'X',
+                    'ts'   : (record.start - origin) * 1e6,
+                    'dur'  : record.duration * 1e6,
+                    'pid'  : pid,
+                    'tid'  : record.thread_id,
+                    'args' : args
+                }
+            )
+
+        return {'traceEvents' : trace_events, 'displayTimeUnit' : 'ms'}
+
+    def get_report(self):
+        """ Return the total time spent in each phase, by plugin.
+
+        Returns a dictionary in the form::
+
+            { plugin_id : { phase : seconds } }
+
+        The application's own phases are under the plugin Id None.
+
+        """
+
+        report = {}
+        for record in self.records:
+            phases = report.setdefault(record.plugin_id, {})
+            phases[record.phase] = (
+                phases.get(record.phase, 0) + record.duration
+            )
+
+        return report
+
+    @contextmanager
+    def phase(self, phase, plugin_id=None):
+        """ A context manager that times a phase.
+
+        e.g::
+
+            with profiler.phase('start', plugin.id):
+                plugin.start()
+
+        The phase is recorded even if it raises an exception.
+
+        """
+
+        memory_before = self._start_measuring_memory(phase, plugin_id)
+
+        start = time.time()
+        try:
+            yield
+
+        finally:
+            duration = time.time() - start
+            memory = self._stop_measuring_memory(
+                phase, plugin_id, memory_before
+            )
+
+            record = PhaseRecord(
+                phase, plugin_id, start, duration, thread.get_ident(), memory
+            )
+
+            # Phases can finish on several threads at the same time (e.g.
+            # when plugins are started concurrently).
+            with self._lock:
+                self.records.append(record)
+
+    def save_chrome_trace(self, filename):
+        """ Save the timings as a Chrome trace in a JSON file. """
+
+        with open(filename, 'w') as f:
+            json.dump(self.get_chrome_trace(), f)
+
+        logger.debug('plugin profile saved to <%s>', filename)
+
+        return
+
+    ###########################################################################
+    # Protected 'PluginProfiler' interface.
+    ###########################################################################
+
+    def _start_measuring_memory(self, phase, plugin_id):
+        """ Called at the start of a phase (before it is timed).
+
+        Returns whatever '_stop_measuring_memory' needs to work out how much
+        memory the phase used. By default memory is not measured.
+
+        """
+
+        return None
+
+    def _stop_measuring_memory(self, phase, plugin_id, memory_before):
+        """ Called at the end of a phase (after it is timed).
+
+        Returns the number of bytes allocated (and not freed) during the
+        phase, or None if memory is not measured.
+
+        """
+
+        return None
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    # The lock that guards the profiler's results when phases finish on
+    # several threads at the same time.
+    _lock = Any
+
+    def __lock_default(self):
+        """ Trait initializer. """
+
+        return threading.RLock()
+
+
+class PluginMemoryProfiler(PluginProfiler):
+    """ A profiler that also measures the memory used by each plugin.
+
+    Every phase that the 'PluginProfiler' times (importing and creating
+    each plugin, starting it etc) also records how much memory was allocated
+    (and not freed) during it. This makes the profiler (much) slower and so
+    it is only meant to be used when diagnosing an application's footprint,
+    e.g::
+
+        profiler    = PluginMemoryProfiler()
+        application = Application(profiler=profiler, plugins=[...])
+        application.start()
+
+        # { plugin_id : { phase : bytes } }
+        print profiler.get_memory_report()
+
+        # { plugin_id : [service_id, ...] }
+        print profiler.get_service_report(application)
+
+        profiler.close()
+
+    If the 'tracemalloc' module is available then it is used to measure the
+    memory allocated by Python (and tracing is started if it isn't already
+    running, in which case 'close' stops it again). Otherwise, the process's
+    resident set size is used, which also includes memory allocated outside
+    of Python but is much coarser.
+
+    Either way, memory is measured for the whole process, so it can't be
+    attributed to a phase while a phase on another thread is running too
+    (e.g. when plugins are started concurrently, see
+    'PluginManager.start_threads'). Such phases are still timed, but their
+    memory is not measured (i.e. it is None) and a warning is logged.
+
+    """
+
+    #### 'PluginMemoryProfiler' interface #####################################
+
+    # The allocation sites that allocated the most memory during each phase
+    # (only if 'top_allocations' is greater than zero and 'tracemalloc' is
+    # available).
+    #
+    # { (plugin_id, phase) : [str, ...] }
+    allocations = Dict
+
+    # How memory is measured ('tracemalloc', 'rss' or '' if it can't be
+    # measured on this platform).
+    memory_source = Str
+
+    # The number of allocation sites to record for each phase (0 means none).
+    # This uses 'tracemalloc' snapshots which are expensive!
+    top_allocations = Int(0)
+
+    ###########################################################################
+    # 'object' interface.
+    ###########################################################################
+
+    def __init__(self, **traits):
+        """ Constructor. """
+
+        super(PluginMemoryProfiler, self).__init__(**traits)
+
+        try:
+            import tracemalloc
+
+        except ImportError:
+            tracemalloc = None
+
+        if tracemalloc is not None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+
+            self._tracemalloc = tracemalloc
+            self.memory_source = 'tracemalloc'
+
+        elif _get_rss() is not None:
+            self.memory_source = 'rss'
+
+        return
+
+    ###########################################################################
+    # 'PluginProfiler' interface.
+    ###########################################################################
+
+    def clear(self):
+        """ Forget all timings recorded so far. """
+
+        super(PluginMemoryProfiler, self).clear()
+
+        with self._lock:
+            self.allocations = {}
+
+        return
+
+    ###########################################################################
+    # 'PluginMemoryProfiler' interface.
+    ###########################################################################
+
+    def close(self):
+        """ Stop measuring memory.
+
+        If the profiler started 'tracemalloc' tracing then it is stopped (if
+        it was already running then it is left alone). The memory recorded so
+        far is kept, but phases that finish after this are not measured.
+
+        """
+
+        if self._started_tracing:
+            self._tracemalloc.stop()
+            self._started_tracing = False
+
+        self._tracemalloc = None
+        self.memory_source = ''
+
+        return
+
+    def get_memory_report(self):
+        """ Return the memory used by each phase, by plugin.
+
+        Returns a dictionary in the form::
+
+            { plugin_id : { phase : bytes } }
+
+        Memory used by a phase includes that used by any phases nested in it
+        (e.g. 'start_plugin' includes 'start').
+
+        """
+
+        report = {}
+        for record in self.records:
+            if record.memory is None:
+                continue
+
+            phases = report.setdefault(record.plugin_id, {})
+            phases[record.phase] = phases.get(record.phase, 0) + record.memory
+
+        return report
+
+    def get_service_report(self, application):
+        """ Return the Ids of the live services registered by each plugin.
+
+        This includes the services that a plugin registers itself (via
+        'register_service' or 'service' traits) and those registered from the
+        service offers that it contributes.
+
+        Returns a dictionary in the form::
+
+            { plugin_id : [service_id, ...] }
+
+        """
+
+        # The Ids of the services that were registered from service offers
+        # (by the core plugin).
+        service_offer_ids = {}
+        for plugin in application:
+            if hasattr(plugin, 'get_service_offer_ids'):
+                service_offer_ids.update(plugin.get_service_offer_ids())
+
+        # The core plugin registers services from service offers on behalf
+        # of the plugins that contribute the offers.
+        offered_service_ids = set(service_offer_ids.values())
+
+        report = {}
+        for plugin in application:
+            # Plugins that don't derive from 'Plugin' might not say which
+            # services they registered.
+            if hasattr(plugin, 'get_service_ids'):
+                service_ids = [
+                    service_id for service_id in plugin.get_service_ids()
+                    if service_id not in offered_service_ids
+                ]
+
+            else:
+                service_ids = []
+
+            for service_offer in self._get_service_offers(plugin):
+                service_id = service_offer_ids.get(service_offer)
+                if service_id is not None:
+                    service_ids.append(service_id)
+
+            report[plugin.id] = service_ids
+
+        return report
+
+    ###########################################################################
+    # Protected 'PluginProfiler' interface.
+    ###########################################################################
+
+    def _start_measuring_memory(self, phase, plugin_id):
+        """ Called at the start of a phase (before it is timed). """
+
+        # Memory can't be measured (or the profiler has been closed).
+        if self.memory_source == '':
+            return None
+
+        # Keep track of whether the phase overlaps with a phase on another
+        # thread.
+        overlap = {'overlapped' : False}
+        thread_id = thread.get_ident()
+        with self._lock:
+            for other_thread_id, other_overlap in self._active_phases:
+                if other_thread_id != thread_id:
+                    other_overlap['overlapped'] = True
+                    overlap['overlapped'] = True
+
+            self._active_phases.append((thread_id, overlap))
+
+        if self._tracemalloc is not None:
+            if self.top_allocations > 0:
+                snapshot = self._tracemalloc.take_snapshot()
+
+            else:
+                snapshot = None
+
+            memory_before = (
+                self._tracemalloc.get_traced_memory()[0], snapshot, overlap
+            )
+
+        else:
+            memory_before = (_get_rss(), None, overlap)
+
+        return memory_before
+
+    def _stop_measuring_memory(self, phase, plugin_id, memory_before):
+        """ Called at the end of a phase (after it is timed). """
+
+        if memory_before is None:
+            return None
+
+        size_before, snapshot_before, overlap = memory_before
+
+        with self._lock:
+            self._active_phases = [
+                active_phase for active_phase in self._active_phases
+                if active_phase[1] is not overlap
+            ]
+
+        # Any memory allocated by the other thread(s) would be attributed to
+        # this phase too.
+        if overlap['overlapped']:
+            if not self._warned_about_overlaps:
+                logger.warn(
+                    'memory not measured for phases that run at the same '
+                    'time as phases on other threads'
+                )
+                self._warned_about_overlaps = True
+
+            return None
+
+        # The profiler was closed while the phase was running.
+        if self.memory_source == '':
+            return None
+
+        if self._tracemalloc is not None:
+            size = self._tracemalloc.get_traced_memory()[0]
+
+            if snapshot_before is not None:
+                snapshot = self._tracemalloc.take_snapshot()
+                statistics = snapshot.compare_to(snapshot_before, 'lineno')
+                with self._lock:
+                    self.allocations[(plugin_id, phase)] = [
+                        str(statistic)
+                        for statistic in statistics[:self.top_allocations]
+                    ]
+
+        else:
+            size = _get_rss()
+
+        if size is None or size_before is None:
+            return None
+
+        return size - size_before
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    # The phases that are currently in progress, in the form:
+    #
+    # [(thread_id, overlap), ...]
+    #
+    # where 'overlap' is a dictionary that records whether the phase has
+    # overlapped with a phase on another thread.
+    _active_phases = List
+
+    # Did the profiler start 'tracemalloc' tracing?
+    _started_tracing = Bool(False)
+
+    # The 'tracemalloc' module (None if it isn't available, or the profiler
+    # has been closed).
+    _tracemalloc = Any
+
+    # Has a warning been logged about phases that overlap?
+    _warned_about_overlaps = Bool(False)
+
+    def _get_service_offers(self, plugin):
+        """ Return the service offers that a plugin contributes. """
+
+        try:
+            service_offers = plugin.get_extensions('envisage.service_offers')
+
+        except Exception:
+            logger.exception(
+                'error getting service offers from plugin %s', plugin.id
+            )
+            service_offers = []
+
+        return service_offers
+
+
+def _get_rss():
+    """ Return the resident set size of the process in bytes.
+
+    Returns None if it can't be found (it is only available on platforms
+    with '/proc').
+
+    """
+
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+    except (IOError, OSError, ValueError, AttributeError):
+        rss = None
+
+    return rss
+
+
+class _NullPhase(object):
+    """ The context manager used when profiling is switched off. """
+
+    def __enter__(self):
+        return
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+# The (shared, stateless) context manager used when profiling is switched off.
+_null_phase = _NullPhase()
+
+
+def profile_phase(application, phase, plugin_id=None):
+    """ Return a context manager that times a phase of a plugin's lifecycle.
+
+    If the application (which can be None) does not have a profiler then the
+    context manager does nothing.
+
+    """
+
+    profiler = getattr(application, 'profiler', None)
+    if profiler is None:
+        return _null_phase
+
+    return profiler.phase(phase, plugin_id)
+
+#### EOF ######################################################################
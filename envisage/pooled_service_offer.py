@@ -0,0 +1,54 @@
+""" An offer to provide a pool of service objects. """
+
+
+# Enthought library imports.
+from traits.api import Bool, Int
+
+# Local imports.
+from service_offer import ServiceOffer
+from service_pool import ServicePool
+
+
+class PooledServiceOffer(ServiceOffer):
+    """ An offer to provide a pool of service objects.
+
+    Instead of registering the factory itself (and hence getting exactly one
+    service object), a 'ServicePool' that uses the factory to create its
+    objects is registered. This is useful for stateful services that are not
+    thread-safe (e.g. parsers or database sessions).
+
+    See the documentation for 'ServicePool' for more details.
+
+    """
+
+    #### 'PooledServiceOffer' interface #######################################
+
+    # The maximum number of objects in the pool (0 means no limit).
+    max_size = Int(0)
+
+    # The number of objects that are created as soon as the pool is first
+    # used.
+    min_size = Int(0)
+
+    # If True then a thread is given back the same object that it used last
+    # time, if it is available.
+    thread_affinity = Bool(True)
+
+    ###########################################################################
+    # 'PooledServiceOffer' interface.
+    ###########################################################################
+
+    def create_pool(self):
+        """ Create the pool that is registered in place of the factory. """
+
+        pool = ServicePool(
+            factory         = self.factory,
+            properties      = self.properties,
+            max_size        = self.max_size,
+            min_size        = self.min_size,
+            thread_affinity = self.thread_affinity
+        )
+
+        return pool
+
+#### EOF ######################################################################
@@ -0,0 +1,98 @@
+""" A plugin that runs another plugin in a child process. """
+
+
+# Enthought library imports.
+from traits.api import Dict, Instance, Str
+
+# Local imports.
+from i_plugin_activator import IPluginActivator
+from plugin import Plugin
+from process_plugin_activator import ProcessPluginActivator
+
+
+class ProcessPlugin(Plugin):
+    """ A plugin that runs another plugin in a child process.
+
+    This is useful for plugins that do CPU-heavy work (in their 'start'
+    method or in their services) as the work is done without holding the
+    application's GIL, e.g::
+
+        application = Application(
+            plugins = [
+                CorePlugin(),
+                ProcessPlugin(
+                    id           = 'acme.solver',
+                    plugin_class = 'acme.solver.solver_plugin:SolverPlugin'
+                )
+            ]
+        )
+
+    The process plugin stands in for the actual plugin in the application:
+    the actual plugin's contributions and services are forwarded to the
+    application via the process plugin (see 'ProcessPluginActivator' for the
+    details).
+
+    Note that the actual plugin runs in an application of its own that only
+    contains a core plugin and the actual plugin. The parent application's
+    contributions to the plugin's extension points are copied to the child,
+    but the plugin can't use any of the parent application's services.
+
+    """
+
+    #### 'IPlugin' interface ##################################################
+
+    # The activator used to start and stop the plugin.
+    activator = Instance(IPluginActivator, ProcessPluginActivator())
+
+    #### 'ProcessPlugin' interface ############################################
+
+    # The symbol path of the class of the plugin to run in the child process.
+    plugin_class = Str
+
+    # The traits to create the plugin with (these must be picklable).
+    plugin_traits = Dict
+
+    #### Private interface ####################################################
+
+    # The contributions forwarded from the child process.
+    #
+    # { extension_point_id : [extension, ...] }
+    _contributions = Dict
+
+    ###########################################################################
+    # 'IExtensionProvider' interface.
+    ###########################################################################
+
+    def get_extensions(self, extension_point_id):
+        """ Return the provider's extensions to an extension point. """
+
+        return list(self._contributions.get(extension_point_id, []))
+
+    ###########################################################################
+    # 'ProcessPlugin' interface.
+    ###########################################################################
+
+    def forward_contributions(self, contributions):
+        """ Replace the contributions forwarded from the child process.
+
+        'contributions' is a dictionary in the form::
+
+            { extension_point_id : [extension, ...] }
+
+        """
+
+        old = self._contributions
+        self._contributions = contributions
+
+        for extension_point_id in set(old) | set(contributions):
+            removed = old.get(extension_point_id, [])
+            added   = contributions.get(extension_point_id, [])
+            if len(removed) > 0 or len(added) > 0:
+                self._fire_extension_point_changed(
+                    extension_point_id, added, removed,
+                    slice(0, max(len(removed), len(added)))
+                )
+
+        return
+
+#### EOF ######################################################################
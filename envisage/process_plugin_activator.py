@@ -0,0 +1,718 @@
+""" A plugin activator that runs plugins in child processes. """
+
+
+# Standard library imports.
+import cPickle, inspect, logging, multiprocessing, threading, traceback
+
+# Enthought library imports.
+from apptools.preferences.api import ScopedPreferences
+from traits.api import Dict, Float, List, provides
+
+# Local imports.
+from extension_point import ExtensionPoint
+from extension_provider import ExtensionProvider
+from i_plugin_activator import IPluginActivator
+from import_manager import ImportManager
+from plugin_activator import PluginActivator
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+# The Id of the extension point that plugins contribute service offers to.
+SERVICE_OFFERS = 'envisage.service_offers'
+
+
+@provides(IPluginActivator)
+class ProcessPluginActivator(PluginActivator):
+    """ A plugin activator that runs plugins in child processes.
+
+    This activator is used by 'ProcessPlugin's. When the plugin is started, a
+    child process is created that starts the plugin named by the process
+    plugin's 'plugin_class' trait (in an application of its own, along with
+    a core plugin). The child application only contains those two plugins,
+    so:-
+
+    - the parent application's contributions to the plugin's extension
+      points are forwarded to the child before the plugin is started, and
+      again whenever they change. They are copied, so they must be
+      picklable (any that aren't are not forwarded and a warning is
+      logged). While the plugin is running, any of its extension points
+      that the parent application doesn't already know about are added to
+      the parent's extension registry.
+
+    - the plugin can only use the services registered in the child (i.e.
+      its own and those of the child's core plugin), *not* the services
+      registered in the parent application.
+
+    Once the plugin has been started:-
+
+    1) the plugin's contributions are forwarded to the parent application as
+       contributions of the process plugin. Contributions are copied (so they
+       must be picklable) and they are a snapshot of the contributions when
+       the plugin was started. Service offers are *not* forwarded, as the
+       services are provided by the child (see below).
+
+    2) every service in the child's service registry is registered in the
+       parent's registry as a proxy. Calling a method on the proxy (or any
+       other attribute whose value is callable, e.g. a static method) calls
+       it on the actual service in the child process (and so the arguments
+       and the result must be picklable). Reading any other attribute of the
+       proxy asks the child for a copy of the service's attribute (so it
+       should be avoided in tight loops).
+
+    Calls to the services of a single plugin are handled one at a time, but
+    the child processes don't share the parent's GIL and so several plugins
+    (and the parent application) can use different cores. When the plugin
+    is stopped, its contributions and services are removed and the child
+    process exits.
+
+    The child reads the application's preferences, but it never saves them
+    (that is left to the parent application).
+
+    """
+
+    #### 'ProcessPluginActivator' interface ###################################
+
+    # How long (in seconds) to wait for a child process to exit when its
+    # plugin is stopped before terminating it.
+    stop_timeout = Float(10.0)
+
+    #### Private interface ####################################################
+
+    # The Ids of the extension points added to the parent application on
+    # behalf of each plugin.
+    #
+    # { plugin : [extension_point_id, ...] }
+    _extension_point_ids = Dict
+
+    # The child process that hosts each plugin.
+    #
+    # { plugin : _PluginHost }
+    _hosts = Dict
+
+    ###########################################################################
+    # 'IPluginActivator' interface.
+    ###########################################################################
+
+    def start_plugin(self, plugin):
+        """ Start the specified plugin. """
+
+        application = plugin.application
+
+        host = _PluginHost(
+            plugin.plugin_class, plugin.plugin_traits, application.id
+        )
+        try:
+            contributions, services = host.start(
+                lambda extension_point_ids: self._add_extension_points(
+                    plugin, extension_point_ids
+                )
+            )
+
+        except:
+            self._remove_extension_points(plugin)
+            raise
+
+        self._hosts[plugin] = host
+
+        # Keep the child up to date with the parent's contributions to the
+        # plugin's extension points.
+        for extension_point_id in host.extension_point_ids:
+            application.add_extension_point_listener(
+                host.forward_extensions, extension_point_id
+            )
+
+        # Register a proxy for each of the child's services. The Ids are saved
+        # on the plugin so that they are unregistered when it is stopped.
+        for service_id, protocol_name, properties in services:
+            proxy = ServiceProxy(host, service_id, protocol_name)
+            plugin._service_ids.append(
+                plugin.application.register_service(
+                    protocol_name, proxy, properties
+                )
+            )
+
+        plugin.forward_contributions(contributions)
+
+        return super(ProcessPluginActivator, self).start_plugin(plugin)
+
+    def stop_plugin(self, plugin):
+        """ Stop the specified plugin. """
+
+        result = super(ProcessPluginActivator, self).stop_plugin(plugin)
+
+        plugin.forward_contributions({})
+
+        host = self._hosts.pop(plugin, None)
+        if host is not None:
+            for extension_point_id in host.extension_point_ids:
+                plugin.application.remove_extension_point_listener(
+                    host.forward_extensions, extension_point_id
+                )
+
+            host.stop(self.stop_timeout)
+
+        self._remove_extension_points(plugin)
+
+        return result
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _add_extension_points(self, plugin, extension_point_ids):
+        """ Add a plugin's extension points to the parent application.
+
+        Only the extension points that the application doesn't already know
+        about are added.
+
+        Returns the application's (picklable) contributions to the extension
+        points in the form::
+
+            { extension_point_id : [extension, ...] }
+
+        """
+
+        application = plugin.application
+
+        added = self._extension_point_ids[plugin] = []
+        for extension_point_id in extension_point_ids:
+            if application.get_extension_point(extension_point_id) is None:
+                application.add_extension_point(
+                    ExtensionPoint(List, id=extension_point_id)
+                )
+                added.append(extension_point_id)
+
+        return _get_application_contributions(
+            application, extension_point_ids
+        )
+
+    def _remove_extension_points(self, plugin):
+        """ Remove the extension points added on behalf of a plugin. """
+
+        for extension_point_id in self._extension_point_ids.pop(plugin, []):
+            plugin.application.remove_extension_point(extension_point_id)
+
+        return
+
+
+class ServiceProxy(object):
+    """ A proxy for a service that lives in a child process.
+
+    The proxy passes 'isinstance' checks for the protocol that the service
+    was registered with, so the service registry treats it just like the
+    actual service.
+
+    """
+
+    def __init__(self, host, service_id, protocol_name):
+        """ Constructor. """
+
+        self._host          = host
+        self._service_id    = service_id
+        self._protocol_name = protocol_name
+
+        return
+
+    @property
+    def __class__(self):
+        """ The protocol that the service was registered with. """
+
+        return ImportManager().import_symbol(self._protocol_name)
+
+    def __getattr__(self, name):
+        """ Return a proxy for a method or a copy of an attribute. """
+
+        # Don't ask the child for the special methods that are looked up by
+        # things like 'copy' and 'pickle'.
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        # The child tells us whether the attribute is callable (in which case
+        # it is called in the child) or sends us a copy of its value.
+        kind, value = self._host.request('getattr', self._service_id, name)
+        if kind == 'method':
+            host, service_id = self._host, self._service_id
+
+            def method(*args, **kw):
+                return host.request('call', service_id, name, args, kw)
+
+            method.__name__ = name
+
+            # A service's methods don't change so they are only looked up
+            # once.
+            self.__dict__[name] = value = method
+
+        return value
+
+    def __repr__(self):
+        """ Return a string representation of the proxy. """
+
+        return '<ServiceProxy %s %d>' % (self._protocol_name, self._service_id)
+
+
+class _PluginHost(object):
+    """ The parent's end of a child process that hosts a plugin. """
+
+    def __init__(self, plugin_class, plugin_traits, application_id):
+        """ Constructor. """
+
+        self._connection, child_connection = multiprocessing.Pipe()
+
+        self._process = multiprocessing.Process(
+            target = _serve,
+            args   = (
+                child_connection, plugin_class, plugin_traits, application_id
+            ),
+            name   = 'envisage plugin %s' % plugin_class
+        )
+
+        # Don't let a child process keep the application alive.
+        self._process.daemon = True
+
+        # The child handles one request at a time.
+        self._lock = threading.Lock()
+
+        # Only the child uses this end of the pipe.
+        self._child_connection = child_connection
+
+        # The Ids of the extension points offered by the plugin (these are
+        # known once the child has been started).
+        self.extension_point_ids = []
+
+        return
+
+    def forward_extensions(self, extension_registry, event):
+        """ Forward the parent's contributions to an extension point.
+
+        This is an extension point listener.
+
+        """
+
+        extension_point_id = event.extension_point_id
+        contributions = _get_application_contributions(
+            extension_registry, [extension_point_id]
+        )
+
+        try:
+            self.request(
+                'extensions', extension_point_id,
+                contributions.get(extension_point_id, [])
+            )
+
+        except Exception:
+            logger.exception(
+                'error forwarding contributions to <%s> to plugin process %s',
+                extension_point_id, self._process.name
+            )
+
+        return
+
+    def request(self, command, *args):
+        """ Send a request to the child and return its reply.
+
+        If the request raised an exception in the child then it is re-raised.
+
+        """
+
+        with self._lock:
+            self._connection.send((command,) + args)
+            value = self._receive()
+
+        return value
+
+    def start(self, get_contributions):
+        """ Start the child process (and hence the plugin).
+
+        'get_contributions' is a callable that takes a list of the Ids of the
+        extension points offered by the plugin and returns the parent's
+        (picklable) contributions to them in the form::
+
+            { extension_point_id : [extension, ...] }
+
+        Returns a tuple in the form (contributions, services).
+
+        """
+
+        self._process.start()
+        self._child_connection.close()
+
+        try:
+            # The child tells us about the plugin's extension points as soon
+            # as it has created the plugin.
+            self.extension_point_ids = self._receive()
+
+            contributions, services = self.request(
+                'start', get_contributions(self.extension_point_ids)
+            )
+
+        except:
+            # Closing our end of the pipe tells the child to give up if it is
+            # still waiting for us.
+            self._connection.close()
+            self._process.join()
+            raise
+
+        return contributions, services
+
+    def stop(self, timeout):
+        """ Stop the plugin (and hence the child process). """
+
+        try:
+            self.request('stop')
+
+        except (EOFError, IOError):
+            logger.warn('plugin process %s already exited', self._process.name)
+
+        except Exception:
+            logger.exception('error stopping plugin process')
+
+        self._connection.close()
+
+        self._process.join(timeout)
+        if self._process.is_alive():
+            logger.warn('terminating plugin process %s', self._process.name)
+            self._process.terminate()
+
+        return
+
+    def _receive(self):
+        """ Receive a reply from the child.
+
+        If the reply is an exception raised in the child then it is re-raised.
+
+        """
+
+        status, value = self._connection.recv()
+        if status == 'error':
+            raise value
+
+        return value
+
+
+class _ForwardedExtensionProvider(ExtensionProvider):
+    """ The provider of the parent's contributions in a child process. """
+
+    # The parent's contributions.
+    #
+    # { extension_point_id : [extension, ...] }
+    contributions = Dict
+
+    ###########################################################################
+    # 'IExtensionProvider' interface.
+    ###########################################################################
+
+    def get_extensions(self, extension_point_id):
+        """ Return the provider's extensions to an extension point. """
+
+        return list(self.contributions.get(extension_point_id, []))
+
+    ###########################################################################
+    # '_ForwardedExtensionProvider' interface.
+    ###########################################################################
+
+    def set_extensions(self, extension_point_id, extensions):
+        """ Replace the parent's contributions to an extension point. """
+
+        removed = self.contributions.get(extension_point_id, [])
+        self.contributions[extension_point_id] = extensions
+
+        if len(removed) > 0 or len(extensions) > 0:
+            self._fire_extension_point_changed(
+                extension_point_id, extensions, removed,
+                slice(0, max(len(removed), len(extensions)))
+            )
+
+        return
+
+
+class _HostPreferences(ScopedPreferences):
+    """ The preferences of the application in a child process.
+
+    The parent application owns the preferences files, so the child never
+    writes to them.
+
+    """
+
+    def save(self, file_or_filename=None):
+        """ Save the node's preferences to a file. """
+
+        return
+
+
+def _serve(connection, plugin_class, plugin_traits, application_id):
+    """ Host a plugin (this is the main function of the child process). """
+
+    # Do the imports here as they are only needed in the child.
+    from application import Application
+    from core_plugin import CorePlugin
+
+    try:
+        plugin = ImportManager().import_symbol(plugin_class)(**plugin_traits)
+
+        application = Application(
+            id          = application_id,
+            plugins     = [CorePlugin(), plugin],
+            preferences = _HostPreferences()
+        )
+
+    except Exception as exc:
+        _send(connection, _get_error_reply(exc))
+
+        return
+
+    _send(
+        connection,
+        ('ok', [
+            extension_point.id
+            for extension_point in plugin.get_extension_points()
+        ])
+    )
+
+    try:
+        # The parent always asks us to start the plugin next (along with its
+        # contributions to the plugin's extension points).
+        command, contributions = connection.recv()
+
+    # The parent has gone away!
+    except (EOFError, IOError):
+        return
+
+    try:
+        provider = _ForwardedExtensionProvider(contributions=contributions)
+        application.extension_registry.add_provider(provider)
+
+        application.start()
+
+        reply = (
+            'ok', (_get_contributions(plugin), _get_services(application))
+        )
+
+    except Exception as exc:
+        _send(connection, _get_error_reply(exc))
+
+        return
+
+    _send(connection, reply)
+
+    while True:
+        try:
+            message = connection.recv()
+
+        # The parent has gone away!
+        except (EOFError, IOError):
+            break
+
+        command = message[0]
+        try:
+            if command == 'stop':
+                application.stop()
+                reply = ('ok', None)
+
+            elif command == 'getattr':
+                service_id, name = message[1:]
+                value = getattr(_get_service(application, service_id), name)
+
+                # Anything callable (not just methods, but e.g. functions
+                # stored in attributes and static methods) is called in the
+                # child, as functions can't be copied to the parent.
+                if callable(value):
+                    reply = ('ok', ('method', None))
+
+                elif _is_picklable(value):
+                    reply = ('ok', ('value', value))
+
+                else:
+                    raise TypeError(
+                        'attribute %r of service <%d> is not picklable: %r' % (
+                            name, service_id, value
+                        )
+                    )
+
+            elif command == 'extensions':
+                extension_point_id, extensions = message[1:]
+                provider.set_extensions(extension_point_id, extensions)
+                reply = ('ok', None)
+
+            elif command == 'call':
+                service_id, name, args, kw = message[1:]
+                method = getattr(_get_service(application, service_id), name)
+                reply = ('ok', method(*args, **kw))
+
+            else:
+                raise ValueError('unknown command %r' % command)
+
+        except Exception as exc:
+            reply = _get_error_reply(exc)
+
+        _send(connection, reply)
+
+        if command == 'stop':
+            break
+
+    connection.close()
+
+    return
+
+
+def _get_application_contributions(extension_registry, extension_point_ids):
+    """ Return the (picklable) contributions to some extension points.
+
+    'extension_registry' is anything that has a 'get_extensions' method
+    (e.g. an application).
+
+    Returns a dictionary in the form::
+
+        { extension_point_id : [extension, ...] }
+
+    """
+
+    contributions = {}
+    for extension_point_id in extension_point_ids:
+        extensions = extension_registry.get_extensions(extension_point_id)
+        if _is_picklable(extensions):
+            contributions[extension_point_id] = extensions
+
+        else:
+            logger.warn(
+                'contributions to <%s> are not picklable so they are not '
+                'forwarded to the plugin process', extension_point_id
+            )
+
+    return contributions
+
+
+def _get_contributions(plugin):
+    """ Return the (picklable) contributions of a plugin.
+
+    Returns a dictionary in the form::
+
+        { extension_point_id : [extension, ...] }
+
+    """
+
+    extension_point_ids = set(
+        trait.contributes_to
+        for trait in plugin.traits(
+            contributes_to=lambda value: value is not None
+        ).values()
+    )
+
+    for name, value in inspect.getmembers(plugin, inspect.ismethod):
+        extension_point_id = getattr(value, '__extension_point__', None)
+        if extension_point_id is not None:
+            extension_point_ids.add(extension_point_id)
+
+    # The plugin's services are proxied instead.
+    extension_point_ids.discard(SERVICE_OFFERS)
+
+    contributions = {}
+    for extension_point_id in extension_point_ids:
+        extensions = list(plugin.get_extensions(extension_point_id))
+        if _is_picklable(extensions):
+            contributions[extension_point_id] = extensions
+
+        else:
+            logger.warn(
+                'contributions of plugin %s to <%s> are not picklable',
+                plugin.id, extension_point_id
+            )
+
+    return contributions
+
+
+def _get_error_reply(exc):
+    """ Return the reply for an exception raised in the child.
+
+    This must be called from the 'except' clause that caught the exception.
+    If the exception can't be copied to the parent then it is replaced with a
+    'RuntimeError' that contains the formatted traceback.
+
+    """
+
+    # Format the traceback now, before trying to pickle the exception
+    # replaces the current exception.
+    formatted = traceback.format_exc()
+
+    # Some exceptions can be pickled but not unpickled (e.g. if their
+    # constructor takes different arguments to those in 'args').
+    try:
+        cPickle.loads(cPickle.dumps(exc, cPickle.HIGHEST_PROTOCOL))
+
+    except Exception:
+        exc = RuntimeError(
+            'error in plugin process (%s is not picklable):\n%s' % (
+                type(exc).__name__, formatted
+            )
+        )
+
+    return ('error', exc)
+
+
+def _get_service(application, service_id):
+    """ Return a service (calling its factory if necessary). """
+
+    registry = application.service_registry
+    protocol_name, obj, properties = registry._services[service_id]
+
+    return registry._resolve_factory(
+        registry._get_actual_protocol(protocol_name), protocol_name, obj,
+        properties, service_id
+    )
+
+
+def _get_services(application):
+    """ Return the services registered in an application.
+
+    Returns a list of tuples in the form::
+
+        [(service_id, protocol_name, properties), ...]
+
+    Properties that are not picklable are not returned.
+
+    """
+
+    services = []
+    for service_id, (protocol_name, obj, properties) in sorted(
+        application.service_registry._services.items()
+    ):
+        if not _is_picklable(properties):
+            logger.warn(
+                'properties of service <%d> are not picklable', service_id
+            )
+            properties = {}
+
+        services.append((service_id, protocol_name, properties))
+
+    return services
+
+
+def _is_picklable(obj):
+    """ Return True if an object can be pickled. """
+
+    try:
+        cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL)
+
+    except Exception:
+        return False
+
+    return True
+
+
+def _send(connection, reply):
+    """ Send a reply to the parent.
+
+    If the reply can't be pickled then an exception is sent instead.
+
+    """
+
+    if not _is_picklable(reply):
+        reply = ('error', TypeError('reply is not picklable: %r' % (reply,)))
+
+    connection.send(reply)
+
+    return
+
+#### EOF ######################################################################
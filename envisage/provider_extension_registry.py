@@ -49,6 +49,16 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         return
 
+    def add_providers(self, providers):
+        """ Add several extension providers (in order). """
+
+        events = self._add_providers(providers)
+
+        for extension_point_id, (refs, added, index) in events.items():
+            self._call_listeners(refs, extension_point_id, added, [], index)
+
+        return
+
     def get_providers(self):
         """ Return all of the providers in the registry. """
 
@@ -68,6 +78,37 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         return
 
+    def remove_providers(self, providers):
+        """ Remove several extension providers.
+
+        Raise a 'ValueError' if any of the providers are not in the registry.
+
+        """
+
+        events = self._remove_providers(providers)
+
+        for extension_point_id, refs, removed, index in events:
+            self._call_listeners(refs, extension_point_id, [], removed, index)
+
+        return
+
+    def replace_provider(self, old, new, key=None):
+        """ Replace an extension provider with another one.
+
+        Raise a 'ValueError' if the old provider is not in the registry.
+
+        """
+
+        events = self._replace_provider(old, new, key)
+
+        for extension_point_id, event in events.items():
+            refs, added, removed, index = event
+            self._call_listeners(
+                refs, extension_point_id, added, removed, index
+            )
+
+        return
+
     ###########################################################################
     # Protected 'ExtensionRegistry' interface.
     ###########################################################################
@@ -126,6 +167,43 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         return events
 
+    def _add_providers(self, providers):
+        """ Add several new providers. """
+
+        providers = list(providers)
+
+        # Add the providers' extension points.
+        for provider in providers:
+            self._add_provider_extension_points(provider)
+
+        # Each provider can contribute to multiple extension points, so we
+        # build up a dictionary of the 'ExtensionPointChanged' events that we
+        # need to fire (with one event for *all* of the providers'
+        # contributions to each extension point).
+        events = {}
+
+        # Do the providers contribute any extensions to an extension point
+        # that has already been accessed?
+        for extension_point_id, extensions in self._extensions.items():
+            index = sum(map(len, extensions))
+
+            added = []
+            for provider in providers:
+                new = provider.get_extensions(extension_point_id)
+                added.extend(new)
+                extensions.append(new)
+
+            # We only need fire an event for this extension point if the
+            # providers contribute any extensions.
+            if len(added) > 0:
+                refs  = self._get_listener_refs(extension_point_id)
+                events[extension_point_id] = (refs, added, index)
+
+        # And finally, tag them onto the list of providers.
+        self._providers.extend(providers)
+
+        return events
+
     def _add_provider_extensions(self, provider):
         """ Add a provider's extensions to the registry. """
 
@@ -172,6 +250,76 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         return events
 
+    def _remove_providers(self, providers):
+        """ Remove several providers.
+
+        Returns a list of the 'ExtensionPointChanged' events that need to be
+        fired (in order), in the form::
+
+            [(extension_point_id, refs, removed, index), ...]
+
+        """
+
+        providers = list(providers)
+
+        # Find the indices of the providers in the provider list. Their
+        # contributions are at the same indices in the extensions list of
+        # lists.
+        positions = dict(
+            (id(provider), index)
+            for index, provider in enumerate(self._providers)
+        )
+        for provider in providers:
+            if id(provider) not in positions:
+                raise ValueError(
+                    'provider %s is not in the registry' % provider
+                )
+
+        indices = set(positions[id(provider)] for provider in providers)
+
+        # Each run of contributions that are next to each other (ignoring any
+        # providers in between that don't contribute anything) is removed in a
+        # single event.
+        events = []
+        for extension_point_id, extensions in self._extensions.items():
+            remaining = []
+            offset = 0
+            removed = []
+            for index, contributions in enumerate(extensions):
+                if index in indices:
+                    removed.extend(contributions)
+                    continue
+
+                if len(contributions) > 0:
+                    if len(removed) > 0:
+                        refs = self._get_listener_refs(extension_point_id)
+                        events.append(
+                            (extension_point_id, refs, removed, offset)
+                        )
+                        removed = []
+
+                    offset += len(contributions)
+
+                remaining.append(contributions)
+
+            if len(removed) > 0:
+                refs = self._get_listener_refs(extension_point_id)
+                events.append((extension_point_id, refs, removed, offset))
+
+            extensions[:] = remaining
+
+        # Remove the providers' extension points.
+        for provider in providers:
+            self._remove_provider_extension_points(provider, {})
+
+        # And finally take them out of the list of providers.
+        self._providers[:] = [
+            provider for index, provider in enumerate(self._providers)
+            if index not in indices
+        ]
+
+        return events
+
     def _remove_provider_extensions(self, provider):
         """ Remove a provider's extensions from the registry. """
 
@@ -200,6 +348,61 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         return events
 
+    def _replace_provider(self, old, new, key):
+        """ Replace a provider. """
+
+        # By default contributions are compared by value.
+        if key is None:
+            key = lambda extension: extension
+
+        # Find the index of the provider in the provider list. Its
+        # contributions are at the same index in the extensions list of lists.
+        index = self._providers.index(old)
+
+        self._remove_provider_extension_points(old, {})
+        self._add_provider_extension_points(new)
+
+        # Each provider can contribute to multiple extension points, so we
+        # build up a dictionary of the 'ExtensionPointChanged' events that we
+        # need to fire.
+        events = {}
+
+        # Does either provider contribute any extensions to an extension point
+        # that has already been accessed?
+        for extension_point_id, extensions in self._extensions.items():
+            old_extensions = extensions[index]
+            new_extensions = new.get_extensions(extension_point_id)[:]
+            extensions[index] = new_extensions
+
+            old_keys = [key(extension) for extension in old_extensions]
+            new_keys = [key(extension) for extension in new_extensions]
+
+            # Only the contributions between the ones that are the same at the
+            # start and at the end of both lists have actually changed.
+            start = 0
+            while start < min(len(old_keys), len(new_keys)) \
+                  and old_keys[start] == new_keys[start]:
+                start += 1
+
+            end = 0
+            while end < min(len(old_keys), len(new_keys)) - start \
+                  and old_keys[-end-1] == new_keys[-end-1]:
+                end += 1
+
+            removed = old_extensions[start:len(old_extensions)-end]
+            added   = new_extensions[start:len(new_extensions)-end]
+
+            # We only need fire an event for this extension point if anything
+            # actually changed.
+            if len(added) > 0 or len(removed) > 0:
+                offset = sum(map(len, extensions[:index])) + start
+                refs   = self._get_listener_refs(extension_point_id)
+                events[extension_point_id] = (refs, added, removed, offset)
+
+        self._providers[index] = new
+
+        return events
+
     def _remove_provider_extension_points(self, provider, events):
         """ Remove a provider's extension points from the registry. """
 
@@ -2,7 +2,7 @@
 
 
 # Standard library imports.
-import logging
+import logging, weakref
 
 # Enthought library imports.
 from traits.api import TraitType
@@ -18,6 +18,13 @@ class Service(TraitType):
     Note that this is a trait *type* and hence does *NOT* have traits itself
     (i.e. it does *not* inherit from 'HasTraits').
 
+    By default, the service is looked up the first time the trait is accessed
+    and then cached (per object) until a service is registered with, or
+    unregistered from, the object's service registry. The cache is *not*
+    invalidated if the properties of a service, or the attributes used in a
+    query, change. If the service must be looked up every time the trait is
+    accessed, use 'cache=False'.
+
     """
 
     ###########################################################################
@@ -25,7 +32,8 @@ class Service(TraitType):
     ###########################################################################
 
     def __init__(
-        self, protocol=None, query='', minimize='', maximize='', **metadata
+        self, protocol=None, query='', minimize='', maximize='', cache=True,
+        **metadata
     ):
         """ Constructor. """
 
@@ -43,6 +51,21 @@ class Service(TraitType):
         # The optional name of the trait/property to maximize.
         self._maximize = maximize
 
+        # The resolved services (if caching is enabled), grouped by the
+        # service registry that they were looked up in (so that invalidating
+        # the services of a registry is cheap).
+        #
+        # { service_registry : { obj : service } }
+        if cache:
+            self._cache = weakref.WeakKeyDictionary()
+
+        else:
+            self._cache = None
+
+        # The service registries that we are listening to (so that we can
+        # invalidate the cache when services are registered/unregistered).
+        self._service_registries = weakref.WeakKeyDictionary()
+
         return
 
     ###########################################################################
@@ -54,11 +77,28 @@ class Service(TraitType):
 
         service_registry = self._get_service_registry(obj)
 
-        obj = service_registry.get_service(
+        if self._cache is not None:
+            # The object may have been moved to a different service registry
+            # (e.g. a plugin added to a different application) since the
+            # service was cached, in which case it isn't found here.
+            services = self._cache.get(service_registry)
+            if services is not None and obj in services:
+                return services[obj]
+
+        service = service_registry.get_service(
             self._protocol, self._query, self._minimize, self._maximize
         )
 
-        return obj
+        if self._cache is not None:
+            self._listen_to_service_registry(service_registry)
+            services = self._cache.get(service_registry)
+            if services is None:
+                services = self._cache[service_registry] = \
+                    weakref.WeakKeyDictionary()
+
+            services[obj] = service
+
+        return service
 
     def set(self, obj, name, value):
         """ Trait type setter. """
@@ -83,4 +123,28 @@ class Service(TraitType):
 
         return service_registry
 
+    def _listen_to_service_registry(self, service_registry):
+        """ Invalidate the cache when the registry's services change. """
+
+        # Bulk (un)registrations fire 'registered' ('unregistered') for each
+        # service before the bulk event, but only the first of these events
+        # finds anything to invalidate.
+        if service_registry not in self._service_registries:
+            for trait_name in ['registered', 'unregistered',
+                               'services_registered', 'services_unregistered']:
+                service_registry.on_trait_change(
+                    self._on_service_registry_changed, trait_name
+                )
+
+            self._service_registries[service_registry] = True
+
+        return
+
+    def _on_service_registry_changed(self, service_registry, trait_name, new):
+        """ Dynamic trait change handler. """
+
+        self._cache.pop(service_registry, None)
+
+        return
+
 #### EOF ######################################################################
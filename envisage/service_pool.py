@@ -0,0 +1,265 @@
+""" A pool of service objects that can be shared between threads. """
+
+
+# Standard library imports.
+from contextlib import contextmanager
+import logging, threading, time
+
+# Enthought library imports.
+from traits.api import Any, Bool, Callable, Dict, Either, HasTraits, Int
+from traits.api import List, Str
+
+# Local imports.
+from import_manager import ImportManager
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+class ServicePoolExhaustedError(Exception):
+    """ Raised when no service can be checked out of a pool in time. """
+
+
+class ServicePool(HasTraits):
+    """ A pool of service objects that can be shared between threads.
+
+    A service registry normally holds exactly *one* object per registration.
+    That is fine for thread-safe services, but if a service is stateful
+    (e.g. a parser or a database session) then threads that use it must take
+    turns. A pool holds several objects created by the same factory, and each
+    thread checks one out for its exclusive use and checks it back in when it
+    is done, e.g::
+
+        pool = application.get_service_pool(IParser)
+
+        with pool.checked_out() as parser:
+            parser.parse(...)
+
+    A pool is registered with the service registry using
+    'register_service_pool' (usually via a 'PooledServiceOffer') and it is
+    kept separate from ordinary services, i.e. it is only ever returned by
+    'get_service_pool' (and never by 'get_service').
+
+    """
+
+    #### 'ServicePool' interface ##############################################
+
+    # A callable (or a string that can be used to import a callable) that
+    # creates the pooled objects.
+    #
+    # e.g::
+    #
+    #   callable(**properties) -> Any
+    factory = Either(Str, Callable)
+
+    # The maximum number of objects in the pool (0 means no limit). When this
+    # many objects are checked out, 'checkout' blocks until one is checked
+    # back in.
+    max_size = Int(0)
+
+    # The number of objects that are created as soon as the pool is first
+    # used (this allows a pool to be 'warmed up' by a single checkout).
+    min_size = Int(0)
+
+    # The properties passed as keyword arguments to the factory.
+    properties = Dict
+
+    # If True then a thread is given back the same object that it used last
+    # time, if it is available (this keeps any per-thread state, caches etc.
+    # in the object warm).
+    thread_affinity = Bool(True)
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    # The objects that are currently checked out.
+    #
+    # { id(obj) : obj }
+    _checked_out = Dict
+
+    # The condition used to synchronize checkouts and checkins.
+    _condition = Any
+
+    # The objects that are waiting to be checked out (the most recently
+    # checked in object is last).
+    _idle = List
+
+    # The thread that each object was last checked out by.
+    #
+    # { id(obj) : thread }
+    _owners = Dict
+
+    # The number of objects that have been (or are being) created.
+    _size = Int(0)
+
+    ###########################################################################
+    # 'ServicePool' interface.
+    ###########################################################################
+
+    def checkin(self, obj):
+        """ Return an object to the pool.
+
+        Raise a 'ValueError' if the object is not checked out of the pool.
+
+        """
+
+        with self._condition:
+            if id(obj) not in self._checked_out:
+                raise ValueError('object <%s> is not checked out' % obj)
+
+            del self._checked_out[id(obj)]
+            self._idle.append(obj)
+            self._condition.notify()
+
+        return
+
+    def checkout(self, timeout=None):
+        """ Take an object out of the pool for the caller's exclusive use.
+
+        If the pool is already at its maximum size and all of its objects are
+        checked out then block until one is checked in. If a 'timeout' (in
+        seconds) is specified and no object is checked in before it expires
+        then raise a 'ServicePoolExhaustedError'.
+
+        The object must be returned to the pool using 'checkin'.
+
+        """
+
+        self._fill()
+
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        with self._condition:
+            while True:
+                obj = self._take_idle_object()
+                if obj is not None:
+                    break
+
+                # If the pool can grow then reserve a place for a new object
+                # and create it outside of the lock (factories can be slow!).
+                if self.max_size == 0 or self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                if timeout is None:
+                    self._condition.wait()
+
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise ServicePoolExhaustedError(
+                            'no object available from pool <%s>' % self
+                        )
+
+                    self._condition.wait(remaining)
+
+        if obj is None:
+            obj = self._create_reserved_object()
+
+        with self._condition:
+            self._checked_out[id(obj)] = obj
+            self._owners[id(obj)] = threading.current_thread()
+
+        return obj
+
+    @contextmanager
+    def checked_out(self, timeout=None):
+        """ A context manager that checks an object out and back in again.
+
+        e.g::
+
+            with pool.checked_out() as parser:
+                parser.parse(...)
+
+        """
+
+        obj = self.checkout(timeout)
+        try:
+            yield obj
+
+        finally:
+            self.checkin(obj)
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    #### Trait initializers ###################################################
+
+    def __condition_default(self):
+        """ Trait initializer. """
+
+        return threading.Condition(threading.RLock())
+
+    #### Methods ##############################################################
+
+    def _create_object(self):
+        """ Use the factory to create a new object. """
+
+        # If the factory is specified as a symbol path then import it.
+        factory = self.factory
+        if isinstance(factory, basestring):
+            factory = ImportManager().import_symbol(factory)
+
+        obj = factory(**self.properties)
+        logger.debug('pool <%s> created <%s>', self, obj)
+
+        return obj
+
+    def _create_reserved_object(self):
+        """ Create an object for a place that has already been reserved. """
+
+        try:
+            obj = self._create_object()
+
+        except:
+            # Give the place back so that somebody else can try.
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+
+            raise
+
+        return obj
+
+    def _fill(self):
+        """ Make sure that the pool contains at least 'min_size' objects. """
+
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    break
+
+                self._size += 1
+
+            obj = self._create_reserved_object()
+
+            with self._condition:
+                self._idle.append(obj)
+                self._condition.notify()
+
+        return
+
+    def _take_idle_object(self):
+        """ Take an idle object from the pool (or None if there isn't one).
+
+        The caller must hold the condition's lock.
+
+        """
+
+        if len(self._idle) == 0:
+            return None
+
+        # Prefer the object that the current thread used last.
+        if self.thread_affinity:
+            current_thread = threading.current_thread()
+            for index in range(len(self._idle) - 1, -1, -1):
+                if self._owners.get(id(self._idle[index])) is current_thread:
+                    return self._idle.pop(index)
+
+        return self._idle.pop()
+
+#### EOF ######################################################################
@@ -2,11 +2,11 @@
 
 
 # Standard library imports.
-import logging
+import bisect, logging, threading
 
 # Enthought library imports.
-from traits.api import Dict, Event, HasTraits, Int, Undefined, provides, \
-    Interface
+from traits.api import Any, Dict, Event, HasTraits, Int, List, Str, \
+    Undefined, provides, Interface
 
 # Local imports.
 from i_service_registry import IServiceRegistry
@@ -33,6 +33,36 @@ class ServiceRegistry(HasTraits):
     # An event that is fired when a service is unregistered.
     unregistered = Event
 
+    # An event that is fired when services are registered in bulk (the value
+    # is the list of the new service Ids).
+    services_registered = Event
+
+    # An event that is fired when services are unregistered in bulk (the
+    # value is the list of the service Ids).
+    services_unregistered = Event
+
+    ####  'ServiceRegistry' interface #########################################
+
+    # The executor used by 'get_service_async' and 'get_services_async' to
+    # resolve services (and hence to call any service factories) away from
+    # the calling thread. This can be any object with a 'submit' method that
+    # returns a future (e.g. a 'concurrent.futures.Executor').
+    #
+    # By default, a thread pool is created the first time it is needed.
+    executor = Any
+
+    # The names of the attributes that services are commonly ranked by (i.e.
+    # that are used as the 'minimize' or 'maximize' arguments to
+    # 'get_service' and 'get_services').
+    #
+    # For each of these attributes the registry maintains an ordered index of
+    # the services registered against each protocol so that ranked lookups do
+    # not have to sort all of the matching services on every call. The index
+    # is updated when services are registered and unregistered, and when the
+    # attribute of a 'HasTraits' service changes. The ranking attribute of any
+    # other kind of service must not change while it is registered.
+    ranking_attributes = List(Str)
+
     ####  Private interface ###################################################
 
     # The services in the registry.
@@ -54,6 +84,25 @@ class ServiceRegistry(HasTraits):
     # invocations so this is simply an ever increasing integer!).
     _service_id = Int
 
+    # The lock that guards the registry's own data structures (the services
+    # and the ranking indexes) when services are requested from multiple
+    # threads at the same time. It is only ever held briefly (and never while
+    # a service factory is being called).
+    _lock = Any
+
+    # The locks that make sure that each service factory is only called once,
+    # even if the service is requested by several threads at the same time.
+    # Each service has its own lock so that a slow factory only holds up
+    # lookups of the *same* service.
+    #
+    # { service_id : lock }
+    _factory_locks = Dict
+
+    # The ordered indexes used for ranked lookups.
+    #
+    # { (protocol_name, attribute) : _RankingIndex }
+    _ranking_indexes = Dict
+
     ###########################################################################
     # 'IServiceRegistry' interface.
     ###########################################################################
@@ -74,15 +123,31 @@ class ServiceRegistry(HasTraits):
     def get_service(self, protocol, query='', minimize='', maximize=''):
         """ Return at most one service that matches the specified query. """
 
-        services = self.get_services(protocol, query, minimize, maximize)
-        if len(services) > 0:
-            service = services[0]
+        # If the services are ranked by an indexed attribute then we can just
+        # take the first match in the index.
+        if self._is_ranking_indexed(minimize, maximize):
+            services = self._get_ranked_services(
+                protocol, query, minimize, maximize
+            )
+            service = next(services, None)
 
         else:
-            service = None
+            services = self.get_services(protocol, query, minimize, maximize)
+            if len(services) > 0:
+                service = services[0]
+
+            else:
+                service = None
 
         return service
 
+    def get_service_async(self, protocol, query='', minimize='', maximize=''):
+        """ Return a future for at most one service that matches the query. """
+
+        return self.executor.submit(
+            self.get_service, protocol, query, minimize, maximize
+        )
+
     def get_service_from_id(self, service_id):
         """ Return the service with the specified id. """
 
@@ -97,21 +162,21 @@ class ServiceRegistry(HasTraits):
     def get_services(self, protocol, query='', minimize='', maximize=''):
         """ Return all services that match the specified query. """
 
+        # If the services are ranked by an indexed attribute then the index
+        # already has them in the right order.
+        if self._is_ranking_indexed(minimize, maximize):
+            return list(
+                self._get_ranked_services(protocol, query, minimize, maximize)
+            )
+
         services = []
         for service_id, (name, obj, properties) in self._services.items():
             if self._get_protocol_name(protocol) == name:
-                # If the protocol is a string then we need to import it!
-                if isinstance(protocol, basestring):
-                    actual_protocol = ImportManager().import_symbol(protocol)
-
-                # Otherwise, it is an actual protocol, so just use it!
-                else:
-                    actual_protocol = protocol
-
                 # If the registered service is actually a factory then use it
                 # to create the actual object.
                 obj = self._resolve_factory(
-                    actual_protocol, name, obj, properties, service_id
+                    self._get_actual_protocol(protocol), name, obj, properties,
+                    service_id
                 )
 
                 # If a query was specified then only add the service if it
@@ -129,6 +194,29 @@ class ServiceRegistry(HasTraits):
 
         return services
 
+    def get_services_async(self, protocol, query='', minimize='', maximize=''):
+        """ Return a future for all services that match the query. """
+
+        return self.executor.submit(
+            self.get_services, protocol, query, minimize, maximize
+        )
+
+    def get_service_pool(self, protocol, query=''):
+        """ Return at most one service pool that matches the query. """
+
+        pool_protocol_name = self._get_pool_protocol_name(protocol)
+
+        pool = None
+        for service_id, (name, obj, properties) in sorted(
+            self._services.items()
+        ):
+            if name == pool_protocol_name:
+                if len(query) == 0 or self._eval_query(obj, properties, query):
+                    pool = obj
+                    break
+
+        return pool
+
     def get_service_properties(self, service_id):
         """ Return the dictionary of properties associated with a service. """
 
@@ -144,19 +232,38 @@ class ServiceRegistry(HasTraits):
     def register_service(self, protocol, obj, properties=None):
         """ Register a service. """
 
-        protocol_name = self._get_protocol_name(protocol)
+        service_id = self._add_service(protocol, obj, properties)
+        self._fire_event('registered', service_id)
 
-        # Make sure each service gets its own properties dictionary.
-        if properties is None:
-            properties = {}
+        return service_id
 
-        service_id = self._next_service_id()
-        self._services[service_id] = (protocol_name, obj, properties)
-        self.registered = service_id
+    def register_service_pool(self, protocol, pool, properties=None):
+        """ Register a pool of services. """
 
-        logger.debug('service <%d> registered %s', service_id, protocol_name)
+        return self.register_service(
+            self._get_pool_protocol_name(protocol), pool, properties
+        )
 
-        return service_id
+    def register_services(self, services):
+        """ Register multiple services. """
+
+        service_ids = [
+            self._add_service(protocol, obj, properties)
+
+            for protocol, obj, properties in services
+        ]
+
+        # Listeners only hear about the services once they are all
+        # registered. 'registered' is still fired for each service so that
+        # existing listeners see every service, but internal listeners (e.g.
+        # the cache of the 'Service' trait type) only do any work for the
+        # first of these events.
+        for service_id in service_ids:
+            self._fire_event('registered', service_id)
+
+        self._fire_event('services_registered', service_ids)
+
+        return service_ids
 
     def set_service_properties(self, service_id, properties):
         """ Set the dictionary of properties associated with a service. """
@@ -173,14 +280,60 @@ class ServiceRegistry(HasTraits):
     def unregister_service(self, service_id):
         """ Unregister a service. """
 
-        try:
-            protocol, obj, properties = self._services.pop(service_id)
-            self.unregistered = service_id
+        self._check_service_id(service_id)
+        self._remove_service(service_id)
+        self._fire_event('unregistered', service_id)
 
-            logger.debug('service <%d> unregistered', service_id)
+        return
 
-        except KeyError:
-            raise ValueError('no service with id <%d>' % service_id)
+    def unregister_services(self, service_ids):
+        """ Unregister multiple services. """
+
+        # Check all of the Ids first so that we don't unregister some of the
+        # services and then fail.
+        service_ids = list(service_ids)
+        for service_id in service_ids:
+            self._check_service_id(service_id)
+
+        for service_id in service_ids:
+            self._remove_service(service_id)
+
+        # As for 'register_services', 'unregistered' is still fired for each
+        # service.
+        for service_id in service_ids:
+            self._fire_event('unregistered', service_id)
+
+        self._fire_event('services_unregistered', service_ids)
+
+        return
+
+    ###########################################################################
+    # 'ServiceRegistry' interface.
+    ###########################################################################
+
+    #### Trait initializers ###################################################
+
+    def _executor_default(self):
+        """ Trait initializer. """
+
+        # Do the import here so that 'concurrent.futures' (the 'futures'
+        # package on Python 2) is only needed if services are actually
+        # requested asynchronously.
+        from concurrent.futures import ThreadPoolExecutor
+
+        return ThreadPoolExecutor(max_workers=4)
+
+    #### Methods ##############################################################
+
+    def _fire_event(self, trait_name, value):
+        """ Fire one of the registry's events.
+
+        This is a hook for registries that need to deliver events in a
+        particular way (e.g. on an event loop).
+
+        """
+
+        setattr(self, trait_name, value)
 
         return
 
@@ -188,6 +341,89 @@ class ServiceRegistry(HasTraits):
     # Private interface.
     ###########################################################################
 
+    #### Trait initializers ###################################################
+
+    def __lock_default(self):
+        """ Trait initializer. """
+
+        return threading.RLock()
+
+    #### Methods ##############################################################
+
+    def _add_service(self, protocol, obj, properties):
+        """ Add a service without firing any events.
+
+        Returns the new service Id.
+
+        """
+
+        protocol_name = self._get_protocol_name(protocol)
+
+        # Make sure each service gets its own properties dictionary.
+        if properties is None:
+            properties = {}
+
+        # Services can be registered from several threads at once.
+        with self._lock:
+            service_id = self._next_service_id()
+            self._services[service_id] = (protocol_name, obj, properties)
+
+            # The service will be added to any ranking indexes for the
+            # protocol the next time that they are used.
+            for index in self._get_ranking_indexes(protocol_name):
+                index.pending.add(service_id)
+
+        logger.debug('service <%d> registered %s', service_id, protocol_name)
+
+        return service_id
+
+    def _add_to_ranking_index(self, index, attribute, service_id, obj):
+        """ Add a (resolved) service to a ranking index. """
+
+        index.add(service_id, getattr(obj, attribute))
+
+        # If the service has traits then we can find out when the value of
+        # the attribute changes, in which case the service is simply added
+        # to the index again the next time that it is used.
+        if isinstance(obj, HasTraits):
+            def attribute_changed():
+                """ Dynamic trait change handler. """
+
+                with self._lock:
+                    index.discard(service_id)
+                    index.pending.add(service_id)
+
+                return
+
+            index.watch(service_id, obj, attribute, attribute_changed)
+
+        return
+
+    def _call_factory(self, factory, properties):
+        """ Call a service factory to create the actual service. """
+
+        # A service factory is any callable that takes two arguments, the
+        # first is the protocol, the second is the (possibly empty)
+        # dictionary of properties that were registered with the service.
+        #
+        # If the factory is specified as a symbol path then import it.
+        if isinstance(factory, basestring):
+            factory = ImportManager().import_symbol(factory)
+
+        return factory(**properties)
+
+    def _check_service_id(self, service_id):
+        """ Check that a service with the given Id is registered.
+
+        Raise a 'ValueError' if it is not.
+
+        """
+
+        if service_id not in self._services:
+            raise ValueError('no service with id <%d>' % service_id)
+
+        return
+
     def _create_namespace(self, service, properties):
         """ Create a namespace in which to evaluate a query. """
 
@@ -213,6 +449,29 @@ class ServiceRegistry(HasTraits):
 
         return result
 
+    def _get_actual_protocol(self, protocol):
+        """ Returns the actual protocol (importing it if necessary). """
+
+        # If the protocol is a string then we need to import it!
+        if isinstance(protocol, basestring):
+            actual_protocol = ImportManager().import_symbol(protocol)
+
+        # Otherwise, it is an actual protocol, so just use it!
+        else:
+            actual_protocol = protocol
+
+        return actual_protocol
+
+    def _get_pool_protocol_name(self, protocol_or_name):
+        """ Returns the name that pools for a protocol are registered with.
+
+        This is never a valid symbol path, so pools can't be confused with
+        ordinary services (or service factories!).
+
+        """
+
+        return 'pool:%s' % self._get_protocol_name(protocol_or_name)
+
     def _get_protocol_name(self, protocol_or_name):
         """ Returns the full class name for a protocol. """
 
@@ -226,6 +485,96 @@ class ServiceRegistry(HasTraits):
 
         return name
 
+    def _get_ranked_services(self, protocol, query, minimize, maximize):
+        """ Return an iterator over services in the order of a ranking index.
+
+        Only services that match the query are returned.
+
+        """
+
+        attribute = minimize or maximize
+        index = self._get_ranking_index(protocol, attribute)
+        for service_id in index.get_service_ids(reverse=(minimize == '')):
+            # The service may have been unregistered since we took the
+            # snapshot of the index.
+            if service_id not in self._services:
+                continue
+
+            name, obj, properties = self._services[service_id]
+            if len(query) == 0 or self._eval_query(obj, properties, query):
+                yield obj
+
+        return
+
+    def _get_ranking_index(self, protocol, attribute):
+        """ Return an up-to-date ranking index for a protocol. """
+
+        protocol_name = self._get_protocol_name(protocol)
+
+        with self._lock:
+            index = self._ranking_indexes.get((protocol_name, attribute))
+            if index is None:
+                index = _RankingIndex()
+                index.pending.update(
+                    service_id
+
+                    for service_id, (name, obj, properties)
+                    in self._services.items()
+
+                    if name == protocol_name
+                )
+                self._ranking_indexes[(protocol_name, attribute)] = index
+
+            pending = [
+                (service_id, self._services[service_id])
+                for service_id in sorted(index.pending)
+                if service_id in self._services
+            ]
+
+        # Add any services registered since the index was last used. Note
+        # that this has to resolve any service factories to find the value of
+        # the attribute (which is done without holding the registry lock).
+        resolved = [
+            (
+                service_id,
+                self._resolve_factory(
+                    self._get_actual_protocol(protocol), name, obj, properties,
+                    service_id
+                )
+            )
+            for service_id, (name, obj, properties) in pending
+        ]
+
+        with self._lock:
+            for service_id, obj in resolved:
+                # The service may have been unregistered (or already added by
+                # another thread) in the meantime.
+                if service_id in index.pending:
+                    self._add_to_ranking_index(
+                        index, attribute, service_id, obj
+                    )
+                    index.pending.discard(service_id)
+
+        return index
+
+    def _get_ranking_indexes(self, protocol_name):
+        """ Return all existing ranking indexes for a protocol. """
+
+        indexes = [
+            index for (name, attribute), index in self._ranking_indexes.items()
+
+            if name == protocol_name
+        ]
+
+        return indexes
+
+    def _is_ranking_indexed(self, minimize, maximize):
+        """ Return True if services are ranked by an indexed attribute. """
+
+        attribute = minimize or maximize
+
+        return attribute != '' and attribute in self.ranking_attributes
+
     def _is_service_factory(self, protocol, obj):
         """ Is the object a factory for services supporting the protocol? """
 
@@ -238,30 +587,134 @@ class ServiceRegistry(HasTraits):
     def _next_service_id(self):
         """ Returns the next service ID. """
 
-        self._service_id += 1
+        with self._lock:
+            self._service_id += 1
+            service_id = self._service_id
+
+        return service_id
+
+    def _remove_service(self, service_id):
+        """ Remove a service without firing any events. """
+
+        with self._lock:
+            protocol, obj, properties = self._services.pop(service_id)
+            self._factory_locks.pop(service_id, None)
+
+            for index in self._get_ranking_indexes(protocol):
+                index.discard(service_id)
+
+        logger.debug('service <%d> unregistered', service_id)
 
-        return self._service_id
+        return
 
     def _resolve_factory(self, protocol, name, obj, properties, service_id):
         """ If 'obj' is a factory then use it to create the actual service. """
 
         # Is the registered service actually a service *factory*?
         if self._is_service_factory(protocol, obj):
-            # A service factory is any callable that takes two arguments, the
-            # first is the protocol, the second is the (possibly empty)
-            # dictionary of properties that were registered with the service.
-            #
-            # If the factory is specified as a symbol path then import it.
-            if isinstance(obj, basestring):
-                obj = ImportManager().import_symbol(obj)
+            with self._lock:
+                factory_lock = self._factory_locks.get(service_id)
+                if factory_lock is None:
+                    factory_lock = threading.Lock()
+                    self._factory_locks[service_id] = factory_lock
+
+            # Only lookups of this service wait while the factory is called.
+            with factory_lock:
+                # Another thread may have called the factory while we were
+                # waiting for the lock, in which case we just use the service
+                # that it created.
+                with self._lock:
+                    if service_id in self._services:
+                        name, obj, properties = self._services[service_id]
+
+                if self._is_service_factory(protocol, obj):
+                    obj = self._call_factory(obj, properties)
+
+                    # The resulting service object replaces the factory in the
+                    # cache (i.e. the factory will not get called again unless
+                    # it is unregistered first). If the service was
+                    # unregistered while the factory was running then it stays
+                    # unregistered.
+                    with self._lock:
+                        if service_id in self._services:
+                            self._services[service_id] = (
+                                name, obj, properties
+                            )
 
-            obj = obj(**properties)
+        return obj
 
-            # The resulting service object replaces the factory in the cache
-            # (i.e. the factory will not get called again unless it is
-            # unregistered first).
-            self._services[service_id] = (name, obj, properties)
 
-        return obj
+class _RankingIndex(object):
+    """ An ordered index of services by the value of one of their attributes.
+
+    This is a private helper for the service registry (which takes care of
+    any locking).
+
+    """
+
+    def __init__(self):
+        """ Constructor. """
+
+        # The Ids of any services that still need to be added to the index.
+        self.pending = set()
+
+        # The indexed services in ascending order.
+        #
+        # [(value, service_id)]
+        self._entries = []
+
+        # The value that each indexed service was added with.
+        #
+        # { service_id : value }
+        self._values = {}
+
+        # The services whose attribute values are being watched.
+        #
+        # { service_id : (obj, attribute, handler) }
+        self._watched = {}
+
+        return
+
+    def add(self, service_id, value):
+        """ Add a service to the index. """
+
+        bisect.insort(self._entries, (value, service_id))
+        self._values[service_id] = value
+
+        return
+
+    def discard(self, service_id):
+        """ Remove a service from the index (if it is there!). """
+
+        self.pending.discard(service_id)
+
+        if service_id in self._values:
+            entry = (self._values.pop(service_id), service_id)
+            del self._entries[bisect.bisect_left(self._entries, entry)]
+
+        if service_id in self._watched:
+            obj, attribute, handler = self._watched.pop(service_id)
+            obj.on_trait_change(handler, attribute, remove=True)
+
+        return
+
+    def get_service_ids(self, reverse=False):
+        """ Return the Ids of the indexed services in order. """
+
+        if reverse:
+            entries = reversed(self._entries)
+
+        else:
+            entries = self._entries
+
+        return [service_id for value, service_id in entries]
+
+    def watch(self, service_id, obj, attribute, handler):
+        """ Call a handler when the indexed attribute of a service changes. """
+
+        obj.on_trait_change(handler, attribute)
+        self._watched[service_id] = (obj, attribute, handler)
+
+        return
 
 #### EOF ######################################################################
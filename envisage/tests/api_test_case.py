@@ -0,0 +1,122 @@
+""" Tests for the (lazy) API module. """
+
+
+# Standard library imports.
+import os, subprocess, sys
+
+# Enthought library imports.
+import envisage
+from traits.testing.unittest_tools import unittest
+
+
+# The directory that contains the 'envisage' package.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(envisage.__file__)))
+
+
+# A script that imports the API (and optionally uses all of it), and prints
+# whether the core of Envisage and 'pkg_resources' have been imported.
+IMPORT_SCRIPT = """
+import sys
+
+import envisage.api
+if %r:
+    for name in envisage.api.__all__:
+        getattr(envisage.api, name)
+
+print 'envisage.application' in sys.modules
+print 'pkg_resources' in sys.modules
+"""
+
+
+def run_import_script(use_api):
+    """ Run the import script in a new interpreter.
+
+    Returns a tuple in the form:-
+
+        (core_imported, pkg_resources_imported)
+
+    """
+
+    environ = dict(os.environ)
+    environ['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + filter(None, [environ.get('PYTHONPATH')])
+    )
+
+    # 'subprocess.check_output' isn't available in Python 2.6.
+    process = subprocess.Popen(
+        [sys.executable, '-c', IMPORT_SCRIPT % use_api], env=environ,
+        stdout=subprocess.PIPE
+    )
+    output = process.communicate()[0]
+    if process.returncode != 0:
+        raise RuntimeError('import script failed (%d)' % process.returncode)
+
+    core_imported, pkg_resources_imported = output.split()
+
+    return core_imported == 'True', pkg_resources_imported == 'True'
+
+
+class APITestCase(unittest.TestCase):
+    """ Tests for the (lazy) API module. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_public_names(self):
+        """ public names """
+
+        import envisage.api
+        from envisage.api import Application
+        from envisage.application import Application as _Application
+
+        self.assertIs(_Application, Application)
+        self.assertIs(_Application, envisage.api.Application)
+
+        for name in envisage.api.__all__:
+            self.assertIn(name, dir(envisage.api))
+            self.assertIsNot(None, getattr(envisage.api, name))
+
+        self.failUnlessRaises(AttributeError, getattr, envisage.api, 'bogus')
+
+        return
+
+    def test_api_is_imported_when_used(self):
+        """ api is imported when used """
+
+        core_imported, pkg_resources_imported = run_import_script(
+            use_api=False
+        )
+
+        # Importing the API doesn't import anything until it is used.
+        self.assertFalse(core_imported)
+        self.assertFalse(pkg_resources_imported)
+
+        core_imported, pkg_resources_imported = run_import_script(
+            use_api=True
+        )
+
+        self.assertTrue(core_imported)
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
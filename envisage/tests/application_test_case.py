@@ -2,13 +2,15 @@
 
 
 # Standard library imports.
-import os, shutil, unittest
+import os, shutil, sys, tempfile, unittest
 
 # Enthought library imports.
 from traits.etsconfig.api import ETSConfig
 from envisage.api import Application, ExtensionPoint
-from envisage.api import Plugin, PluginManager
-from traits.api import Bool, Int, List
+from envisage.api import IPluginManager, Plugin, PluginManager
+from envisage.core_plugin import CorePlugin
+from envisage.plugin_event import PluginEvent
+from traits.api import Any, Bool, Event, HasTraits, Int, List, provides
 
 # Local imports.
 #
@@ -110,6 +112,89 @@ class PluginC(Plugin):
     x  = List(Int, [98, 99, 100], contributes_to='a.x')
 
 
+@provides(IPluginManager)
+class SimplePluginManager(HasTraits):
+    """ A plugin manager that can only add and remove one plugin at a time.
+
+    """
+
+    application = Any
+
+    plugin_added = Event(PluginEvent)
+
+    plugin_removed = Event(PluginEvent)
+
+    plugins = List
+
+    def __iter__(self):
+        """ Return an iterator over the manager's plugins. """
+
+        return iter(self.plugins)
+
+    def add_plugin(self, plugin):
+        """ Add a plugin to the manager. """
+
+        plugin.application = self.application
+        self.plugins.append(plugin)
+        self.plugin_added = PluginEvent(plugin=plugin)
+
+        return
+
+    def get_plugin(self, plugin_id):
+        """ Return the plugin with the specified Id. """
+
+        for plugin in self.plugins:
+            if plugin.id == plugin_id:
+                return plugin
+
+        return None
+
+    def remove_plugin(self, plugin):
+        """ Remove a plugin from the manager. """
+
+        self.plugins.remove(plugin)
+        self.plugin_removed = PluginEvent(plugin=plugin)
+
+        return
+
+
+# The source of a plugin module that is reloaded by the tests.
+RELOADABLE_PLUGIN_MODULE = """
+from envisage.api import Plugin, ServiceOffer
+from traits.api import Bool, HasTraits, Interface, List
+
+
+class IGreeter(Interface):
+    pass
+
+
+class Greeter(HasTraits):
+
+    greeting = %r
+
+
+class ReloadablePlugin(Plugin):
+
+    id = 'reloadable'
+
+    greetings = List(%r, contributes_to='a.x')
+
+    service_offers = List(contributes_to='envisage.service_offers')
+
+    def _service_offers_default(self):
+        return [ServiceOffer(protocol=IGreeter, factory=Greeter)]
+
+    started = Bool(False)
+    stopped = Bool(False)
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+"""
+
+
 class ApplicationTestCase(unittest.TestCase):
     """ Tests for applications and plugins. """
 
@@ -464,6 +549,120 @@ class ApplicationTestCase(unittest.TestCase):
 
         return
 
+    def test_reload_plugin(self):
+        """ reload plugin """
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        sys.path.insert(0, tmpdir)
+        self.addCleanup(sys.path.remove, tmpdir)
+        self.addCleanup(sys.modules.pop, 'reloadable_plugin', None)
+
+        def write_module(greeting, greetings):
+            filename = os.path.join(tmpdir, 'reloadable_plugin.py')
+            with open(filename, 'w') as f:
+                f.write(RELOADABLE_PLUGIN_MODULE % (greeting, greetings))
+
+            # Make sure that a stale '.pyc' isn't used (the source might be
+            # rewritten within the resolution of its modification time).
+            if os.path.exists(filename + 'c'):
+                os.remove(filename + 'c')
+
+        write_module('hello', [1, 2, 3])
+        protocol = 'reloadable_plugin.IGreeter'
+        from reloadable_plugin import ReloadablePlugin
+
+        a = PluginA()
+        b = PluginB()
+        old = ReloadablePlugin(name='Greeter')
+        application = TestApplication(plugins=[CorePlugin(), a, b, old])
+        application.start()
+
+        self.assertEqual([1, 2, 3, 1, 2, 3], a.x)
+        self.assertEqual(
+            'hello', application.get_service(protocol).greeting
+        )
+
+        # Listeners are only weakly referenced so keep hold of this one!
+        events = []
+        def listener(extension_registry, event):
+            events.append(event)
+
+        application.add_extension_point_listener(listener, 'a.x')
+
+        # Change the code and reload the plugin.
+        write_module('bonjour', [1, 42, 3])
+        new = application.reload_plugin('reloadable')
+
+        self.assertIsNot(old, new)
+        self.assertTrue(old.stopped)
+        self.assertTrue(new.started)
+        self.assertIs(new, application.get_plugin('reloadable'))
+        self.assertEqual([a, b, new], list(application)[1:])
+
+        # Traits set on the old plugin are kept.
+        self.assertEqual('Greeter', new.name)
+
+        # Listeners only see the contribution that actually changed.
+        self.assertEqual(1, len(events))
+        self.assertEqual([42], events[0].added)
+        self.assertEqual([2], events[0].removed)
+        self.assertEqual(4, events[0].index)
+        self.assertEqual([1, 2, 3, 1, 42, 3], a.x)
+
+        # The service offered by the old plugin has been replaced.
+        greeters = application.get_services(protocol)
+        self.assertEqual(
+            ['bonjour'], [greeter.greeting for greeter in greeters]
+        )
+
+        # A factory can create the new plugin however it likes.
+        def factory(klass, plugin):
+            return klass(id=plugin.id, name=plugin.name.upper())
+
+        newer = application.reload_plugin('reloadable', factory=factory)
+        self.assertEqual('GREETER', newer.name)
+        self.assertTrue(newer.started)
+
+        self.failUnlessRaises(SystemError, application.reload_plugin, 'bogus')
+
+        return
+
+    def test_plugin_manager_without_bulk_operations(self):
+        """ plugin manager without bulk operations """
+
+        a = PluginA()
+        b = PluginB()
+        c = PluginC()
+
+        plugin_manager = SimplePluginManager()
+        tracker = EventTracker(
+            subscriptions = [
+                (plugin_manager, 'plugin_added'),
+                (plugin_manager, 'plugin_removed')
+            ]
+        )
+
+        # The plugins are added one at a time.
+        application = TestApplication(
+            plugin_manager=plugin_manager, plugins=[a, b]
+        )
+        self.assertEqual([a, b], list(application))
+        self.assertEqual(['plugin_added', 'plugin_added'], tracker.event_names)
+        self.assertEqual([1, 2, 3], application.get_extensions('a.x'))
+
+        application.add_plugins([c])
+        self.assertEqual([1, 2, 3, 98, 99, 100], a.x)
+
+        application.remove_plugins([b, c])
+        self.assertEqual([a], list(application))
+        self.assertEqual(
+            ['plugin_removed', 'plugin_removed'], tracker.event_names[3:]
+        )
+        self.assertEqual([], a.x)
+
+        return
+
     def test_set_plugin_manager_at_contruction_time(self):
         """ set plugin manager at construction time"""
 
@@ -0,0 +1,193 @@
+""" Tests for the asyncio application. """
+
+
+# Standard library imports.
+import threading, time
+
+# Enthought library imports.
+from envisage.api import AsyncioApplication, Plugin
+from envisage.asyncio_application import get_asyncio
+from traits.api import Any, Float
+from traits.testing.unittest_tools import unittest
+
+
+try:
+    asyncio = get_asyncio()
+
+except ImportError:
+    asyncio = None
+
+
+class SleepyPlugin(Plugin):
+    """ A plugin whose 'start' and 'stop' methods return coroutines. """
+
+    # How long the plugin's coroutines take.
+    delay = Float(0.2)
+
+    # The events that have happened to the plugin (shared by all plugins).
+    events = Any
+
+    def start(self):
+        """ Start the plugin. """
+
+        self.events.append(('starting', self.id, time.time()))
+
+        return self._then(self.delay, 'started')
+
+    def stop(self):
+        """ Stop the plugin. """
+
+        self.events.append(('stopping', self.id, time.time()))
+
+        return self._then(self.delay, 'stopped')
+
+    def _then(self, delay, event):
+        """ Return a future that records an event after a delay. """
+
+        loop = self.application.loop
+        future = asyncio.Future(loop=loop)
+
+        def done():
+            self.events.append((event, self.id, time.time()))
+            future.set_result(None)
+
+        loop.call_later(delay, done)
+
+        return future
+
+
+class FailingPlugin(Plugin):
+    """ A plugin whose coroutine fails when it starts. """
+
+    id = 'failing'
+
+    def start(self):
+        """ Start the plugin. """
+
+        loop = self.application.loop
+        future = asyncio.Future(loop=loop)
+        loop.call_soon(future.set_exception, ValueError('failed'))
+
+        return future
+
+
+@unittest.skipIf(asyncio is None, 'neither asyncio nor trollius available')
+class AsyncioApplicationTestCase(unittest.TestCase):
+    """ Tests for the asyncio application. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        self.loop = asyncio.new_event_loop()
+        self.events = []
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        self.loop.close()
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_independent_plugins_start_concurrently(self):
+        """ independent plugins start concurrently """
+
+        a = SleepyPlugin(id='a', events=self.events)
+        b = SleepyPlugin(id='b', events=self.events)
+        application = AsyncioApplication(loop=self.loop, plugins=[a, b])
+
+        self.assertTrue(application.start())
+
+        # Both plugins were started before either of them had finished.
+        self.assertEqual(
+            ['starting', 'starting', 'started', 'started'],
+            [event for event, plugin_id, when in self.events]
+        )
+
+        application.stop()
+
+        return
+
+    def test_plugin_starts_after_its_requirements(self):
+        """ plugin starts after its requirements """
+
+        a = SleepyPlugin(id='a', events=self.events, requires=['b'])
+        b = SleepyPlugin(id='b', events=self.events)
+        application = AsyncioApplication(loop=self.loop, plugins=[a, b])
+
+        self.assertTrue(application.start())
+        self.assertEqual(
+            [
+                ('starting', 'b'), ('started', 'b'),
+                ('starting', 'a'), ('started', 'a')
+            ],
+            [(event, plugin_id) for event, plugin_id, when in self.events]
+        )
+
+        # Plugins are stopped in the reverse order.
+        del self.events[:]
+        self.assertTrue(application.stop())
+        self.assertEqual(
+            [
+                ('stopping', 'a'), ('stopped', 'a'),
+                ('stopping', 'b'), ('stopped', 'b')
+            ],
+            [(event, plugin_id) for event, plugin_id, when in self.events]
+        )
+
+        return
+
+    def test_failing_coroutine(self):
+        """ failing coroutine """
+
+        a = SleepyPlugin(id='a', events=self.events, requires=['failing'])
+        application = AsyncioApplication(
+            loop=self.loop, plugins=[a, FailingPlugin()]
+        )
+
+        self.failUnlessRaises(ValueError, application.start)
+
+        # The plugin that requires the failed plugin was never started.
+        self.assertEqual([], self.events)
+
+        return
+
+    def test_service_events_are_delivered_on_the_loop(self):
+        """ service events are delivered on the loop """
+
+        application = AsyncioApplication(loop=self.loop)
+
+        threads = []
+        def listener(service_id):
+            threads.append(threading.current_thread())
+            self.loop.stop()
+
+        application.service_registry.on_trait_change(listener, 'registered')
+
+        # Register a service from another thread while the loop is running.
+        self.loop.call_soon(
+            lambda: threading.Thread(
+                target=application.register_service, args=('foo', 42)
+            ).start()
+        )
+        self.loop.run_forever()
+
+        self.assertEqual([threading.current_thread()], threads)
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
@@ -129,6 +129,37 @@ class CompositePluginManagerTestCase(unittest.TestCase):
         
         return
 
+    def test_plugins_are_started_in_requirement_order(self):
+
+        # A plugin in one plugin manager requires a plugin in another.
+        red    = SimplePlugin(id='red', requires=['yellow'])
+        yellow = SimplePlugin(id='yellow')
+
+        plugin_manager = CompositePluginManager(
+            plugin_managers=[
+                PluginManager(plugins=[red]), PluginManager(plugins=[yellow])
+            ]
+        )
+
+        def listener(obj, trait_name, old, new):
+            events.append((obj.id, trait_name))
+
+        events = []
+        for plugin in [red, yellow]:
+            plugin.on_trait_change(listener, 'started,stopped')
+
+        self._test_start_and_stop(plugin_manager, ['red', 'yellow'])
+
+        # 'yellow' is started first and hence stopped last.
+        expected = [
+            ('yellow', 'started'), ('red', 'started'),
+            ('red', 'started'), ('red', 'stopped'),
+            ('yellow', 'started'), ('yellow', 'stopped')
+        ]
+        self.assertEqual(expected, events)
+
+        return
+
     def test_application_gets_propogated_to_plugin_managers(self):
 
         application = Application()
@@ -173,6 +204,135 @@ class CompositePluginManagerTestCase(unittest.TestCase):
         
         return
     
+    def test_merged_plugins_are_kept_in_order(self):
+        a = PluginManager(plugins=[SimplePlugin(id='a1')])
+        b = PluginManager(plugins=[SimplePlugin(id='b1')])
+        c = PluginManager(plugins=[SimplePlugin(id='c1')])
+
+        composite_plugin_manager = CompositePluginManager(
+            plugin_managers = [a, b, c]
+        )
+        self.assertEqual(
+            ['a1', 'b1', 'c1'], self._plugin_ids(composite_plugin_manager)
+        )
+
+        # Plugins added to a plugin manager appear after its other plugins.
+        b.add_plugin(SimplePlugin(id='b2'))
+        self.assertEqual(
+            ['a1', 'b1', 'b2', 'c1'],
+            self._plugin_ids(composite_plugin_manager)
+        )
+        b2 = composite_plugin_manager.get_plugin('b2')
+        self.assertIs(b2, b.get_plugin('b2'))
+
+        b.remove_plugin(b2)
+        self.assertEqual(
+            ['a1', 'b1', 'c1'], self._plugin_ids(composite_plugin_manager)
+        )
+        self.assertEqual(None, composite_plugin_manager.get_plugin('b2'))
+
+        # Changing a plugin manager's patterns is reflected too.
+        c.exclude = ['c*']
+        self.assertEqual(
+            ['a1', 'b1'], self._plugin_ids(composite_plugin_manager)
+        )
+        self.assertEqual(None, composite_plugin_manager.get_plugin('c1'))
+
+        return
+
+    def test_add_and_remove_plugins(self):
+        a = PluginManager()
+        b = PluginManager()
+
+        composite_plugin_manager = CompositePluginManager(
+            plugin_managers = [a, b]
+        )
+
+        # By default, plugins are added to the first plugin manager.
+        foo = SimplePlugin(id='foo')
+        composite_plugin_manager.add_plugin(foo)
+        self.assertIs(foo, a.get_plugin('foo'))
+        self.assertIs(foo, composite_plugin_manager.get_plugin('foo'))
+
+        composite_plugin_manager.default_plugin_manager = b
+        bar = SimplePlugin(id='bar')
+        composite_plugin_manager.add_plugin(bar)
+        self.assertIs(bar, b.get_plugin('bar'))
+        self.assertEqual(
+            ['foo', 'bar'], self._plugin_ids(composite_plugin_manager)
+        )
+
+        # Plugins are removed from the plugin manager that they belong to.
+        composite_plugin_manager.remove_plugin(foo)
+        self.assertEqual(None, a.get_plugin('foo'))
+        self.assertEqual(['bar'], self._plugin_ids(composite_plugin_manager))
+
+        self.failUnlessRaises(
+            ValueError, composite_plugin_manager.remove_plugin, foo
+        )
+
+        # There must be a plugin manager to add plugins to!
+        self.failUnlessRaises(
+            SystemError, CompositePluginManager().add_plugin, foo
+        )
+
+        return
+
+    def test_default_plugin_manager_must_be_a_plugin_manager(self):
+        a = PluginManager()
+        b = PluginManager()
+
+        composite_plugin_manager = CompositePluginManager(
+            plugin_managers = [a]
+        )
+
+        # Plugins added to 'b' would never be seen by the composite.
+        self.failUnlessRaises(
+            ValueError, setattr, composite_plugin_manager,
+            'default_plugin_manager', b
+        )
+
+        # The constructor can't check it (the plugin managers might not have
+        # been set yet), but adding a plugin does.
+        composite_plugin_manager = CompositePluginManager(
+            plugin_managers = [a], default_plugin_manager = b
+        )
+        self.failUnlessRaises(
+            ValueError, composite_plugin_manager.add_plugin,
+            SimplePlugin(id='foo')
+        )
+        self.assertEqual(None, b.get_plugin('foo'))
+
+        composite_plugin_manager = CompositePluginManager(
+            plugin_managers = [a, b], default_plugin_manager = b
+        )
+        composite_plugin_manager.add_plugin(SimplePlugin(id='foo'))
+        self.assertEqual(['foo'], self._plugin_ids(composite_plugin_manager))
+
+        return
+
+    def test_replacing_a_plugin_managers_plugins(self):
+        a = PluginManager(plugins=[SimplePlugin(id='a1')])
+        b = PluginManager(plugins=[SimplePlugin(id='b1')])
+
+        composite_plugin_manager = CompositePluginManager(
+            plugin_managers = [a, b]
+        )
+        self.assertEqual(
+            ['a1', 'b1'], self._plugin_ids(composite_plugin_manager)
+        )
+        self.assertEqual('a1', composite_plugin_manager.get_plugin('a1').id)
+
+        # e.g. when a subclass harvests its plugins.
+        a._plugins = [SimplePlugin(id='a2')]
+        self.assertEqual(
+            ['a2', 'b1'], self._plugin_ids(composite_plugin_manager)
+        )
+        self.assertEqual(None, composite_plugin_manager.get_plugin('a1'))
+        self.assertEqual('a2', composite_plugin_manager.get_plugin('a2').id)
+
+        return
+
     def test_correct_exception_propagated_from_plugin_manager(self):
         plugin_manager = CompositePluginManager(
             plugin_managers=[RaisingPluginManager()]
@@ -182,6 +342,11 @@ class CompositePluginManagerTestCase(unittest.TestCase):
 
     #### Private protocol #####################################################
 
+    def _plugin_ids(self, plugin_manager):
+        """ Return the Ids of the plugins in the plugin manager. """
+
+        return [plugin.id for plugin in plugin_manager]
+
     def _plugin_count(self, plugin_manager):
         """ Return how many plugins the plugin manager contains. """
 
@@ -2,11 +2,13 @@
 
 import glob
 import sys
-from os.path import basename, dirname, join
+from os.path import basename, dirname, exists, join
 import pkg_resources
 import shutil
 import tempfile
+import zipfile
 
+from envisage import egg_basket_plugin_manager
 from envisage.egg_basket_plugin_manager import EggBasketPluginManager
 from traits.testing.unittest_tools import unittest
 
@@ -156,6 +158,45 @@ class EggBasketPluginManagerTestCase(unittest.TestCase):
 
         return
 
+    def test_only_harvest_directories_added_to_the_plugin_path(self):
+        # Split the eggs between two directories (the eggs in the second
+        # directory require the egg in the first).
+        foo_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, foo_dir)
+        bar_and_baz_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, bar_and_baz_dir)
+
+        shutil.copy(join(self.eggs_dir, self._egg_name('acme.foo')), foo_dir)
+        for name in ['acme.bar', 'acme.baz']:
+            shutil.copy(join(self.eggs_dir, self._egg_name(name)),
+                        bar_and_baz_dir)
+
+        plugin_manager = EggBasketPluginManager(plugin_path=[foo_dir])
+        foo = plugin_manager.get_plugin('acme.foo')
+        self.assertNotEqual(None, foo)
+
+        added = []
+        plugin_manager.on_trait_change(
+            lambda event: added.append(event.plugin.id), 'plugin_added'
+        )
+        removed = []
+        plugin_manager.on_trait_change(
+            lambda event: removed.append(event.plugin.id), 'plugin_removed'
+        )
+
+        plugin_manager.plugin_path.append(bar_and_baz_dir)
+        self.assertEqual(['acme.bar', 'acme.baz'], added)
+        self.assertEqual([], removed)
+        self.assertIs(foo, plugin_manager.get_plugin('acme.foo'))
+
+        del plugin_manager.plugin_path[1]
+        self.assertEqual(['acme.bar', 'acme.baz'], removed)
+        self.assertEqual(
+            ['acme.foo'], [plugin.id for plugin in plugin_manager]
+        )
+
+        return
+
     def test_ignore_broken_plugins_raises_exceptions_by_default(self):
         plugin_manager = EggBasketPluginManager(
             plugin_path = [self.bad_eggs_dir, self.eggs_dir],
@@ -224,6 +265,106 @@ class EggBasketPluginManagerTestCase(unittest.TestCase):
 
         return
 
+    def test_precompile_eggs(self):
+
+        eggs_dir = self._create_unzipped_eggdir()
+
+        # Add a module that the plugin doesn't import so that we can tell that
+        # it was compiled in advance (and not just by importing it).
+        unused = join(eggs_dir, self._egg_name('acme.foo'), 'acme', 'foo')
+        open(join(unused, 'unused.py'), 'w').close()
+
+        plugin_manager = EggBasketPluginManager(
+            plugin_path          = [eggs_dir],
+            precompile_processes = 2
+        )
+
+        # The plugins are still created in egg order.
+        expected = [
+            plugin.id
+            for plugin in EggBasketPluginManager(plugin_path=[self.eggs_dir])
+        ]
+        self._test_start_and_stop(plugin_manager, expected)
+
+        self.assertTrue(exists(join(unused, 'unused.pyc')))
+
+        return
+
+    def test_discovery_cache(self):
+
+        eggs_dir = self._create_unzipped_eggdir()
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        discovery_cache = join(tmpdir, 'eggs.json')
+
+        # Count how many times the plugin path is actually scanned.
+        scans = []
+        def add_eggs_on_path(*args):
+            scans.append(args)
+            return original(*args)
+
+        original = egg_basket_plugin_manager.add_eggs_on_path
+        egg_basket_plugin_manager.add_eggs_on_path = add_eggs_on_path
+        self.addCleanup(
+            setattr, egg_basket_plugin_manager, 'add_eggs_on_path', original
+        )
+
+        def get_plugin_ids():
+            plugin_manager = EggBasketPluginManager(
+                plugin_path     = [eggs_dir],
+                discovery_cache = discovery_cache
+            )
+
+            return [plugin.id for plugin in plugin_manager]
+
+        expected = [
+            plugin.id
+            for plugin in EggBasketPluginManager(plugin_path=[self.eggs_dir])
+        ]
+        del scans[:]
+
+        # The first time, the path is scanned and the cache is written.
+        self.assertEqual(expected, get_plugin_ids())
+        self.assertTrue(len(scans) > 0)
+        self.assertTrue(exists(discovery_cache))
+
+        # The second time, the cache is used.
+        del scans[:]
+        self.assertEqual(expected, get_plugin_ids())
+        self.assertEqual([], scans)
+
+        # Any change to the plugin path makes the cache stale.
+        open(join(eggs_dir, 'README.txt'), 'w').close()
+        self.assertEqual(expected, get_plugin_ids())
+        self.assertTrue(len(scans) > 0)
+
+        # So does any change to the distributions that the eggs are resolved
+        # against (e.g. the ones installed in site-packages).
+        del scans[:]
+        self.assertEqual(expected, get_plugin_ids())
+        self.assertEqual([], scans)
+
+        working_set = pkg_resources.WorkingSet([])
+        for distribution in pkg_resources.working_set:
+            working_set.add(distribution)
+
+        working_set.add(
+            pkg_resources.Distribution(
+                location=tmpdir, project_name='acme.extra', version='1.0'
+            )
+        )
+
+        self.addCleanup(
+            setattr, pkg_resources, 'working_set', pkg_resources.working_set
+        )
+        pkg_resources.working_set = working_set
+
+        self.assertEqual(expected, get_plugin_ids())
+        self.assertTrue(len(scans) > 0)
+
+        return
+
     #### Private protocol #####################################################
 
     def _test_start_and_stop(self, plugin_manager, expected):
@@ -289,6 +430,33 @@ class EggBasketPluginManagerTestCase(unittest.TestCase):
 
         return tmpdir
 
+    def _create_unzipped_eggdir(self):
+        """ Unzip the good eggs into a new temp dir and return the directory.
+
+        """
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+
+        for name in ['acme.bar', 'acme.baz', 'acme.foo']:
+            egg_name = self._egg_name(name)
+            egg = zipfile.ZipFile(join(self.eggs_dir, egg_name))
+            try:
+                for filename in egg.namelist():
+                    # Leave out any bytecode!
+                    if not filename.endswith('.pyc'):
+                        egg.extract(filename, join(tmpdir, egg_name))
+
+            finally:
+                egg.close()
+
+        return tmpdir
+
+    def _egg_name(self, name):
+        """ Return the file name of a test egg for this version of Python. """
+
+        return '%s-0.1a1-py%d.%d.egg' % ((name,) + sys.version_info[:2])
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
@@ -61,6 +61,72 @@ class ImportManagerTestCase(unittest.TestCase):
 
         return
 
+    def test_symbol_cache(self):
+        """ symbol cache """
+
+        import tarfile
+
+        import_manager = ImportManager()
+        import_manager.clear_symbol_cache('tarfile')
+
+        def get_stats():
+            return import_manager.get_symbol_cache_stats()
+
+        misses = get_stats()['misses']
+        symbol = import_manager.import_symbol('tarfile:TarFile.open')
+        self.assertEqual(symbol, tarfile.TarFile.open)
+        self.assertEqual(misses + 1, get_stats()['misses'])
+
+        # The symbol is cached (for all import managers).
+        hits = get_stats()['hits']
+        symbol = self.import_manager.import_symbol('tarfile:TarFile.open')
+        self.assertEqual(symbol, tarfile.TarFile.open)
+        self.assertEqual(hits + 1, get_stats()['hits'])
+        self.assertEqual(misses + 1, get_stats()['misses'])
+
+        # Discarding the symbols from the module means it is imported again.
+        import_manager.clear_symbol_cache('tarfile')
+        import_manager.import_symbol('tarfile:TarFile.open')
+        self.assertEqual(misses + 2, get_stats()['misses'])
+
+        self.assertTrue(get_stats()['size'] <= get_stats()['max_size'])
+
+        return
+
+    def test_least_recently_used_symbols_are_discarded(self):
+        """ least recently used symbols are discarded """
+
+        from envisage.import_manager import _SymbolCache
+
+        cache = _SymbolCache(max_size=2)
+        cache.set('a', 'm', 1)
+        cache.set('b', 'm', 2)
+
+        # Using 'a' makes 'b' the least recently used.
+        for i in range(10):
+            self.assertEqual(('m', 1), cache.get('a'))
+
+        cache.set('c', 'm', 3)
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual(('m', 1), cache.get('a'))
+        self.assertEqual(('m', 3), cache.get('c'))
+        self.assertEqual(2, cache.get_stats()['size'])
+
+        cache.clear('m')
+        self.assertEqual(0, cache.get_stats()['size'])
+
+        return
+
+    def test_import_missing_attribute(self):
+        """ import missing attribute """
+
+        self.failUnlessRaises(
+            AttributeError, self.import_manager.import_symbol,
+            'tarfile:TarFile.bogus'
+        )
+
+        return
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
@@ -0,0 +1,159 @@
+""" Tests for the incremental preferences. """
+
+
+# Standard library imports.
+import os, shutil, tempfile
+
+# Enthought library imports.
+from envisage.api import Application
+from envisage.incremental_preferences import IncrementalPreferences
+from traits.testing.unittest_tools import unittest
+
+
+class IncrementalPreferencesTestCase(unittest.TestCase):
+    """ Tests for the incremental preferences. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'preferences.ini')
+
+        self.preferences = IncrementalPreferences(
+            application_preferences_filename=self.filename
+        )
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        shutil.rmtree(self.tmpdir)
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_unchanged_preferences_are_not_saved(self):
+        """ unchanged preferences are not saved """
+
+        self.preferences.save()
+        self.assertFalse(os.path.exists(self.filename))
+
+        self.preferences.set('acme.ui.bgcolor', 'red')
+        self.preferences.save()
+        self.assertEqual({'acme.ui': {'bgcolor': 'red'}}, self._read())
+
+        # Overwrite the file behind the preferences' back. If the preferences
+        # haven't changed since they were saved then the file is left alone.
+        with open(self.filename, 'w') as f:
+            f.write('# unchanged\n')
+
+        self.preferences.set('acme.ui.bgcolor', 'red')
+        self.preferences.save()
+        self.assertEqual('# unchanged\n', open(self.filename).read())
+
+        # Changes anywhere in the tree are saved.
+        self.preferences.set('acme.workbench.size', 10)
+        self.preferences.save()
+        self.assertEqual(
+            {'acme.ui': {'bgcolor': 'red'}, 'acme.workbench': {'size': '10'}},
+            self._read()
+        )
+
+        # Changes to the (non-persistent) default scope aren't saved.
+        open(self.filename, 'w').close()
+        self.preferences.set('default/acme.ui.fgcolor', 'green')
+        self.preferences.save()
+        self.assertEqual({}, self._read())
+
+        return
+
+    def test_save_is_atomic(self):
+        """ save is atomic """
+
+        self.preferences.set('acme.ui.bgcolor', 'red')
+        self.preferences.save()
+
+        # Only the preferences file is left behind (no temporary files).
+        self.assertEqual(['preferences.ini'], os.listdir(self.tmpdir))
+
+        # If the save fails then the file is untouched (and the preferences
+        # are still dirty so they will be saved next time).
+        self.preferences.set('acme.ui.bgcolor', 'blue')
+
+        def fail(source, destination):
+            raise OSError('boom')
+
+        import envisage.incremental_preferences as incremental_preferences
+        replace = incremental_preferences._replace
+        incremental_preferences._replace = fail
+        try:
+            self.failUnlessRaises(OSError, self.preferences.save)
+
+        finally:
+            incremental_preferences._replace = replace
+
+        self.assertEqual({'acme.ui': {'bgcolor': 'red'}}, self._read())
+        self.assertEqual(['preferences.ini'], os.listdir(self.tmpdir))
+
+        self.preferences.save()
+        self.assertEqual({'acme.ui': {'bgcolor': 'blue'}}, self._read())
+
+        return
+
+    def test_save_in_background(self):
+        """ save in background """
+
+        self.preferences.set('acme.ui.bgcolor', 'red')
+        self.preferences.save_in_background()
+
+        self.assertTrue(self.preferences.wait(timeout=5.0))
+        self.assertEqual({'acme.ui': {'bgcolor': 'red'}}, self._read())
+
+        return
+
+    def test_application_saves_in_background(self):
+        """ application saves in background """
+
+        application = Application(
+            id                             = 'incremental.preferences.test',
+            preferences                    = self.preferences,
+            save_preferences_in_background = True
+        )
+        application.start()
+
+        self.preferences.set('acme.ui.bgcolor', 'red')
+        application.stop()
+
+        self.assertTrue(self.preferences.wait(timeout=5.0))
+        self.assertEqual({'acme.ui': {'bgcolor': 'red'}}, self._read())
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _read(self):
+        """ Read the preferences file. """
+
+        from configobj import ConfigObj
+
+        return dict(
+            (name, dict(section))
+            for name, section in ConfigObj(self.filename).items()
+        )
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
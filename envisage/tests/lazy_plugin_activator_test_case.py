@@ -0,0 +1,178 @@
+""" Tests for the lazy plugin activator. """
+
+
+# Enthought library imports.
+from envisage.api import Application, ExtensionPoint, LazyPluginActivator
+from envisage.api import Plugin, ServiceOffer
+from envisage.core_plugin import CorePlugin
+from traits.api import Any, HasTraits, Instance, Interface, List, provides
+from traits.testing.unittest_tools import unittest
+
+
+class IFoo(Interface):
+    """ A service offered by a lazy plugin. """
+
+
+@provides(IFoo)
+class Foo(HasTraits):
+    """ A service offered by a lazy plugin. """
+
+
+class IBar(Interface):
+    """ A service offered via a (deprecated) service trait. """
+
+
+@provides(IBar)
+class Bar(HasTraits):
+    """ A service offered via a (deprecated) service trait. """
+
+
+class LazyPlugin(Plugin):
+    """ A plugin that is only started when it is used. """
+
+    id = 'lazy'
+
+    # The log that the plugin records its lifecycle in.
+    log = Any
+
+    # An extension point offered by the plugin.
+    greetings = ExtensionPoint(List, id='lazy.greetings')
+
+    # A service offered via a service offer.
+    service_offers = List(contributes_to='envisage.service_offers')
+
+    def _service_offers_default(self):
+        """ Trait initializer. """
+
+        return [ServiceOffer(protocol=IFoo, factory=Foo)]
+
+    # A service offered via a service trait.
+    bar = Instance(Bar, (), service=True, service_protocol=IBar)
+
+    def _activator_default(self):
+        """ Trait initializer. """
+
+        return LazyPluginActivator()
+
+    def start(self):
+        """ Start the plugin. """
+
+        self.log.append(('start', self.id))
+
+        return
+
+    def stop(self):
+        """ Stop the plugin. """
+
+        self.log.append(('stop', self.id))
+
+        return
+
+
+class GreetingPlugin(Plugin):
+    """ A plugin that contributes to the lazy plugin's extension point. """
+
+    id = 'greeting'
+
+    greetings = List(['hello'], contributes_to='lazy.greetings')
+
+
+class TestApplication(Application):
+    """ The type of application used in the tests. """
+
+    id = 'lazy.plugin.activator.test'
+
+
+class LazyPluginActivatorTestCase(unittest.TestCase):
+    """ Tests for the lazy plugin activator. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        self.log = []
+        self.plugin = LazyPlugin(log=self.log)
+        self.application = TestApplication(
+            plugins=[CorePlugin(), self.plugin, GreetingPlugin()]
+        )
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_unused_plugin_is_never_started_or_stopped(self):
+        """ unused plugin is never started or stopped """
+
+        self.application.start()
+        self.assertEqual([], self.log)
+
+        # The plugin's contributions are available before it is started.
+        self.assertEqual(None, self.application.get_service(Foo))
+
+        self.application.stop()
+        self.assertEqual([], self.log)
+
+        return
+
+    def test_service_offer_lookup_activates_plugin(self):
+        """ service offer lookup activates plugin """
+
+        self.application.start()
+
+        foo = self.application.get_service(IFoo)
+        self.assertEqual(Foo, type(foo))
+        self.assertEqual([('start', 'lazy')], self.log)
+
+        # The plugin is only started once.
+        self.application.get_services(IFoo)
+        self.assertEqual([('start', 'lazy')], self.log)
+
+        self.application.stop()
+        self.assertEqual([('start', 'lazy'), ('stop', 'lazy')], self.log)
+
+        return
+
+    def test_service_trait_lookup_activates_plugin(self):
+        """ service trait lookup activates plugin """
+
+        self.application.start()
+
+        # Lookups by name work too.
+        name = IBar.__module__ + '.IBar'
+        self.assertIs(self.plugin.bar, self.application.get_service(name))
+        self.assertEqual([('start', 'lazy')], self.log)
+
+        self.application.stop()
+        self.assertEqual(None, self.application.get_service(IBar))
+
+        return
+
+    def test_extension_point_read_activates_plugin(self):
+        """ extension point read activates plugin """
+
+        self.application.start()
+
+        self.assertEqual(['hello'], self.plugin.greetings)
+        self.assertEqual([('start', 'lazy')], self.log)
+
+        self.application.stop()
+        self.assertEqual([('start', 'lazy'), ('stop', 'lazy')], self.log)
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
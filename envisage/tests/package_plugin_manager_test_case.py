@@ -1,12 +1,34 @@
 """ Tests for the 'Package' plugin manager. """
 
 
-from os.path import dirname, join
+from os.path import dirname, exists, join
+import os, shutil, sys, tempfile
 
 from envisage.package_plugin_manager import PackagePluginManager
 from traits.testing.unittest_tools import unittest
 
 
+# The source of a plugin module created by the tests.
+PLUGIN_MODULE = """
+from envisage.api import Plugin
+from traits.api import Bool
+
+
+class %sPlugin(Plugin):
+
+    id = '%s'
+
+    started = Bool(False)
+    stopped = Bool(False)
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+"""
+
+
 class PackagePluginManagerTestCase(unittest.TestCase):
     """ Tests for the 'Package' plugin manager. """
 
@@ -18,11 +40,25 @@ class PackagePluginManagerTestCase(unittest.TestCase):
         # The location of the 'plugins' test data directory.
         self.plugins_dir = join(dirname(__file__), 'plugins')
 
+        # A directory for packages created by the tests.
+        self.tmpdir = tempfile.mkdtemp()
+
         return
 
     def tearDown(self):
         """ Called immediately after each test method has been called. """
 
+        # Undo any side-effects: the plugin manager modifies sys.path, and
+        # the packages created by the tests are imported.
+        if self.tmpdir in sys.path:
+            sys.path.remove(self.tmpdir)
+
+        for name in sys.modules.keys():
+            if name.startswith('fruitbowl'):
+                del sys.modules[name]
+
+        shutil.rmtree(self.tmpdir)
+
         return
         
     #### Tests ################################################################
@@ -137,8 +173,120 @@ class PackagePluginManagerTestCase(unittest.TestCase):
 
         return
     
+    def test_static_manifest_only_imports_included_plugins(self):
+        self._create_package(
+            'fruitbowl_manifest', ['kiwi', 'lime'],
+            manifest=[
+                'kiwi = fruitbowl_manifest.kiwi_plugin:KiwiPlugin',
+                '# Comments and blank lines are ignored.',
+                '',
+                '   ',
+                '# Malformed lines are skipped.',
+                'orange',
+                'melon =',
+                '= fruitbowl_manifest.lime_plugin:LimePlugin',
+                'lime = fruitbowl_manifest.lime_plugin:LimePlugin'
+            ]
+        )
+
+        plugin_manager = PackagePluginManager(
+            plugin_path = [self.tmpdir],
+            exclude     = ['lime']
+        )
+
+        self._test_start_and_stop(plugin_manager, ['kiwi'])
+
+        # The excluded plugin's module was never imported.
+        self.assertIn('fruitbowl_manifest.kiwi_plugin', sys.modules)
+        self.assertNotIn('fruitbowl_manifest.lime_plugin', sys.modules)
+
+        return
+
+    def test_scan_cache(self):
+        package_dirname = self._create_package(
+            'fruitbowl_scanned', ['kiwi', 'lime']
+        )
+        scan_cache = join(tempfile.mkdtemp(), 'scan.json')
+        self.addCleanup(shutil.rmtree, dirname(scan_cache))
+
+        def get_plugin_ids(**traits):
+            plugin_manager = PackagePluginManager(
+                plugin_path = [self.tmpdir],
+                scan_cache  = scan_cache,
+                **traits
+            )
+
+            return sorted(plugin.id for plugin in plugin_manager)
+
+        # The first time, the package is imported and the cache is written.
+        self.assertEqual(['kiwi', 'lime'], get_plugin_ids())
+        self.assertTrue(exists(scan_cache))
+
+        # The second time, excluded plugins are not imported.
+        del sys.modules['fruitbowl_scanned.lime_plugin']
+        self.assertEqual(['kiwi'], get_plugin_ids(exclude=['lime']))
+        self.assertNotIn('fruitbowl_scanned.lime_plugin', sys.modules)
+
+        # Any change to the package makes the cache stale (so the package is
+        # imported again).
+        open(join(package_dirname, 'README.txt'), 'w').close()
+        self.assertEqual(['kiwi'], get_plugin_ids(exclude=['lime']))
+        self.assertIn('fruitbowl_scanned.lime_plugin', sys.modules)
+
+        return
+
+    def test_only_harvest_directories_added_to_the_plugin_path(self):
+        self._create_package('fruitbowl_extra', ['kiwi'])
+
+        plugin_manager = PackagePluginManager(plugin_path=[self.plugins_dir])
+        pear = plugin_manager.get_plugin('pear')
+        self.assertNotEqual(None, pear)
+
+        added = []
+        plugin_manager.on_trait_change(
+            lambda event: added.append(event.plugin.id), 'plugin_added'
+        )
+        removed = []
+        plugin_manager.on_trait_change(
+            lambda event: removed.append(event.plugin.id), 'plugin_removed'
+        )
+
+        plugin_manager.plugin_path.append(self.tmpdir)
+        self.assertEqual(['kiwi'], added)
+        self.assertEqual([], removed)
+        self.assertIs(pear, plugin_manager.get_plugin('pear'))
+
+        del plugin_manager.plugin_path[0]
+        self.assertItemsEqual(['banana', 'orange', 'pear'], removed)
+        self.assertEqual(['kiwi'], [plugin.id for plugin in plugin_manager])
+
+        return
+
     #### Private protocol #####################################################
 
+    def _create_package(self, package_name, plugin_ids, manifest=None):
+        """ Create a package of plugins in the temporary directory.
+
+        Returns the package directory.
+
+        """
+
+        package_dirname = join(self.tmpdir, package_name)
+        os.mkdir(package_dirname)
+        open(join(package_dirname, '__init__.py'), 'w').close()
+
+        for plugin_id in plugin_ids:
+            module = join(package_dirname, '%s_plugin.py' % plugin_id)
+            with open(module, 'w') as f:
+                f.write(PLUGIN_MODULE % (plugin_id.capitalize(), plugin_id))
+
+        if manifest is not None:
+            with open(join(package_dirname, 'plugins.txt'), 'w') as f:
+                f.write('\n'.join(manifest))
+
+        return package_dirname
+
+
     def _test_start_and_stop(self, plugin_manager, expected):
         """ Make sure the plugin manager starts and stops the expected plugins.
 
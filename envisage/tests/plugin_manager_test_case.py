@@ -1,11 +1,22 @@
 """ Tests for the plugin manager. """
 
 
+# Standard library imports.
+import threading
+
 # Enthought library imports.
 from envisage.api import Plugin, PluginManager
-from traits.api import Bool
+from traits.api import Any, Bool
 from traits.testing.unittest_tools import unittest
 
+# The concurrent start uses 'concurrent.futures' (the 'futures' package on
+# Python 2).
+try:
+    import concurrent.futures as futures
+
+except ImportError:
+    futures = None
+
 
 class SimplePlugin(Plugin):
     """ A simple plugin. """
@@ -54,6 +65,46 @@ class BadPlugin(Plugin):
         raise 1/0
 
 
+class RecordingPlugin(Plugin):
+    """ A plugin that records when it is started and stopped. """
+
+    #### 'RecordingPlugin' interface ##########################################
+
+    # The list that the plugin appends to when it is started or stopped (this
+    # is shared between plugins so it can't be a 'List' trait).
+    log = Any
+
+    # An optional callable that is called when the plugin is started.
+    on_start = Any
+
+    # An optional callable that is called when the plugin is stopped.
+    on_stop = Any
+
+    ###########################################################################
+    # 'IPlugin' interface.
+    ###########################################################################
+
+    def start(self):
+        """ Start the plugin. """
+
+        if self.on_start is not None:
+            self.on_start()
+
+        self.log.append(('start', self.id))
+
+        return
+
+    def stop(self):
+        """ Stop the plugin. """
+
+        if self.on_stop is not None:
+            self.on_stop()
+
+        self.log.append(('stop', self.id))
+
+        return
+
+
 class PluginManagerTestCase(unittest.TestCase):
     """ Tests for the plugin manager. """
 
@@ -252,6 +303,367 @@ class PluginManagerTestCase(unittest.TestCase):
 
         return
 
+    def test_plugin_index_reflects_changes(self):
+        """ plugin index reflects changes """
+
+        foo = SimplePlugin(id='foo')
+        bar = SimplePlugin(id='bar')
+        baz = SimplePlugin(id='baz')
+
+        plugin_manager = PluginManager(plugins=[foo, bar])
+        self.assertEqual([foo, bar], list(plugin_manager))
+        self.assertIs(bar, plugin_manager.get_plugin('bar'))
+
+        # Adding and removing plugins.
+        plugin_manager.add_plugin(baz)
+        self.assertIs(baz, plugin_manager.get_plugin('baz'))
+
+        # It is safe to remove plugins while iterating over them.
+        for plugin in plugin_manager:
+            if plugin.id == 'bar':
+                plugin_manager.remove_plugin(plugin)
+
+        self.assertEqual([foo, baz], list(plugin_manager))
+        self.assertEqual(None, plugin_manager.get_plugin('bar'))
+
+        # Changing the patterns.
+        plugin_manager.exclude = ['b*']
+        self.assertEqual([foo], list(plugin_manager))
+        self.assertEqual(None, plugin_manager.get_plugin('baz'))
+
+        plugin_manager.exclude.append('f?o')
+        self.assertEqual([], list(plugin_manager))
+
+        plugin_manager.exclude = []
+        plugin_manager.include = ['baz', 'foo']
+        self.assertEqual([foo, baz], list(plugin_manager))
+        self.assertIs(foo, plugin_manager.get_plugin('foo'))
+
+        return
+
+    def test_start_and_stop_in_requirement_order(self):
+        """ start and stop in requirement order """
+
+        log = []
+        plugin_manager = PluginManager(
+            plugins = [
+                RecordingPlugin(id='foo', log=log, requires=['bar', 'baz']),
+                RecordingPlugin(id='bar', log=log, requires=['baz']),
+                RecordingPlugin(id='baz', log=log),
+                RecordingPlugin(id='fred', log=log, requires=['bogus'])
+            ]
+        )
+
+        plugin_manager.start()
+        plugin_manager.stop()
+
+        expected = [
+            ('start', 'baz'), ('start', 'bar'), ('start', 'foo'),
+            ('start', 'fred'),
+            ('stop', 'fred'), ('stop', 'foo'), ('stop', 'bar'),
+            ('stop', 'baz')
+        ]
+        self.assertEqual(expected, log)
+
+        return
+
+    def test_core_plugin_requirement(self):
+        """ core plugin requirement """
+
+        log = []
+
+        # Plugins that come after the core plugin implicitly require it.
+        plugin_manager = PluginManager(
+            plugins = [
+                RecordingPlugin(id='envisage.core', log=log),
+                RecordingPlugin(id='foo', log=log),
+                RecordingPlugin(id='bar', log=log)
+            ]
+        )
+
+        plugin_manager.start()
+        plugin_manager.stop()
+
+        expected = [
+            ('start', 'envisage.core'), ('start', 'foo'), ('start', 'bar'),
+            ('stop', 'bar'), ('stop', 'foo'), ('stop', 'envisage.core')
+        ]
+        self.assertEqual(expected, log)
+
+        # Plugins that come before it don't (so if no plugin declares any
+        # requirements the order is unchanged).
+        del log[:]
+        plugin_manager = PluginManager(
+            plugins = [
+                RecordingPlugin(id='foo', log=log),
+                RecordingPlugin(id='envisage.core', log=log),
+                RecordingPlugin(id='bar', log=log)
+            ]
+        )
+
+        plugin_manager.start()
+        plugin_manager.stop()
+
+        expected = [
+            ('start', 'foo'), ('start', 'envisage.core'), ('start', 'bar'),
+            ('stop', 'bar'), ('stop', 'envisage.core'), ('stop', 'foo')
+        ]
+        self.assertEqual(expected, log)
+
+        return
+
+    @unittest.skipIf(futures is None, 'concurrent.futures is not available')
+    def test_core_plugin_is_stopped_last_concurrently(self):
+        """ core plugin is stopped last concurrently """
+
+        log = []
+        plugin_manager = PluginManager(
+            stop_threads = 4,
+            plugins = [
+                RecordingPlugin(id='envisage.core', log=log),
+                RecordingPlugin(id='foo', log=log),
+                RecordingPlugin(id='bar', log=log)
+            ]
+        )
+
+        plugin_manager.start()
+        del log[:]
+        plugin_manager.stop()
+
+        self.assertEqual(('stop', 'envisage.core'), log[-1])
+        self.assertEqual(3, len(log))
+
+        return
+
+    def test_circular_requirements(self):
+        """ circular requirements """
+
+        plugin_manager = PluginManager(
+            plugins = [
+                SimplePlugin(id='foo', requires=['bar']),
+                SimplePlugin(id='bar', requires=['foo']),
+            ]
+        )
+
+        self.failUnlessRaises(ValueError, plugin_manager.start)
+
+        return
+
+    @unittest.skipIf(futures is None, 'concurrent.futures is not available')
+    def test_start_concurrently(self):
+        """ start concurrently """
+
+        # 'foo' and 'bar' can only start if they are started at the same
+        # time, and 'baz' requires both of them.
+        foo_starting = threading.Event()
+        bar_starting = threading.Event()
+
+        def start_foo():
+            foo_starting.set()
+            bar_starting.wait(10)
+            self.assertTrue(bar_starting.is_set())
+
+        def start_bar():
+            bar_starting.set()
+            foo_starting.wait(10)
+            self.assertTrue(foo_starting.is_set())
+
+        log = []
+        plugin_manager = PluginManager(
+            start_threads = 2,
+            plugins = [
+                RecordingPlugin(id='baz', log=log, requires=['foo', 'bar']),
+                RecordingPlugin(id='foo', log=log, on_start=start_foo),
+                RecordingPlugin(id='bar', log=log, on_start=start_bar)
+            ]
+        )
+
+        plugin_manager.start()
+        self.assertEqual(('start', 'baz'), log[-1])
+        self.assertEqual(3, len(log))
+
+        # Plugins are stopped in the reverse of the order that they would be
+        # started one at a time.
+        del log[:]
+        plugin_manager.stop()
+
+        expected = [('stop', 'baz'), ('stop', 'bar'), ('stop', 'foo')]
+        self.assertEqual(expected, log)
+
+        return
+
+    @unittest.skipIf(futures is None, 'concurrent.futures is not available')
+    def test_start_concurrently_errors(self):
+        """ start concurrently errors """
+
+        log = []
+        plugin_manager = PluginManager(
+            start_threads = 2,
+            plugins = [
+                BadPlugin(id='bad'),
+                RecordingPlugin(id='foo', log=log, requires=['bad']),
+            ]
+        )
+
+        self.failUnlessRaises(ZeroDivisionError, plugin_manager.start)
+
+        # Plugins that require the bad plugin are not started.
+        self.assertEqual([], log)
+
+        return
+
+    def test_add_and_remove_plugins(self):
+        """ add and remove plugins """
+
+        a = SimplePlugin(id='a')
+        plugin_manager = PluginManager(plugins=[a])
+
+        added = []
+        plugin_manager.on_trait_change(
+            lambda event: added.append(event), 'plugin_added'
+        )
+
+        events = []
+        plugin_manager.on_trait_change(
+            lambda event: events.append(event), 'plugins_added'
+        )
+        plugin_manager.on_trait_change(
+            lambda event: events.append(event), 'plugins_removed'
+        )
+
+        # Add several plugins at once.
+        plugins = [SimplePlugin(id=id) for id in ['b', 'c', 'd', 'e']]
+        plugin_manager.add_plugins(iter(plugins))
+
+        self.assertEqual(
+            ['a', 'b', 'c', 'd', 'e'], [plugin.id for plugin in plugin_manager]
+        )
+        self.assertEqual([], added)
+        self.assertEqual(1, len(events))
+        self.assertEqual(plugins, events[0].plugins)
+
+        # Remove several plugins at once.
+        b, c, d, e = plugins
+        del events[:]
+        plugin_manager.remove_plugins([e, b, d])
+
+        self.assertEqual(['a', 'c'], [plugin.id for plugin in plugin_manager])
+        self.assertEqual(1, len(events))
+        self.assertEqual([e, b, d], events[0].plugins)
+
+        # If any of the plugins aren't in the manager then none of them are
+        # removed.
+        self.failUnlessRaises(
+            ValueError, plugin_manager.remove_plugins, [c, b]
+        )
+        self.assertEqual(['a', 'c'], [plugin.id for plugin in plugin_manager])
+
+        return
+
+    def test_stop_concurrently(self):
+        """ stop concurrently """
+
+        # 'foo' and 'bar' can only stop if they are stopped at the same time,
+        # and they can only be stopped after 'baz' (which requires them).
+        foo_stopping = threading.Event()
+        bar_stopping = threading.Event()
+
+        def stop_foo():
+            foo_stopping.set()
+            bar_stopping.wait(10)
+            self.assertTrue(bar_stopping.is_set())
+
+        def stop_bar():
+            bar_stopping.set()
+            foo_stopping.wait(10)
+            self.assertTrue(foo_stopping.is_set())
+
+        log = []
+        plugin_manager = PluginManager(
+            stop_threads = 2,
+            plugins = [
+                RecordingPlugin(id='baz', log=log, requires=['foo', 'bar']),
+                RecordingPlugin(id='foo', log=log, on_stop=stop_foo),
+                RecordingPlugin(id='bar', log=log, on_stop=stop_bar)
+            ]
+        )
+
+        plugin_manager.start()
+        del log[:]
+        plugin_manager.stop()
+
+        self.assertEqual(('stop', 'baz'), log[0])
+        self.assertEqual(3, len(log))
+        self.assertEqual({}, plugin_manager.stop_overruns)
+
+        return
+
+    def test_plugin_stop_timeout(self):
+        """ plugin stop timeout """
+
+        # Let the hanging plugin finish when the test is over.
+        hang = threading.Event()
+        self.addCleanup(hang.set)
+
+        def stop_bad():
+            raise ZeroDivisionError
+
+        log = []
+        plugin_manager = PluginManager(
+            plugin_stop_timeout = 0.05,
+            plugins = [
+                RecordingPlugin(id='foo', log=log),
+                RecordingPlugin(
+                    id='hang', log=log, requires=['foo'], on_stop=hang.wait
+                ),
+                RecordingPlugin(
+                    id='bad', log=log, requires=['foo'], on_stop=stop_bad
+                )
+            ]
+        )
+
+        plugin_manager.start()
+        del log[:]
+        plugin_manager.stop()
+
+        # The plugin that the hanging plugin requires is stopped anyway, and
+        # errors don't stop the teardown either.
+        self.assertEqual([('stop', 'foo')], log)
+        self.assertEqual(['hang'], plugin_manager.stop_overruns.keys())
+        self.assertTrue(plugin_manager.stop_overruns['hang'] >= 0.05)
+
+        return
+
+    def test_stop_timeout(self):
+        """ stop timeout """
+
+        # Let the hanging plugin finish when the test is over.
+        hang = threading.Event()
+        self.addCleanup(hang.set)
+
+        log = []
+        plugin_manager = PluginManager(
+            stop_timeout = 0.05,
+            plugins = [
+                RecordingPlugin(id='foo', log=log),
+                RecordingPlugin(
+                    id='hang', log=log, requires=['foo'], on_stop=hang.wait
+                )
+            ]
+        )
+
+        plugin_manager.start()
+        del log[:]
+        plugin_manager.stop()
+
+        # Once the deadline has passed, plugins that haven't been stopped yet
+        # are not stopped at all.
+        self.assertEqual([], log)
+        self.assertEqual(None, plugin_manager.stop_overruns['foo'])
+        self.assertTrue(plugin_manager.stop_overruns['hang'] >= 0.05)
+
+        return
+
     #### Private protocol #####################################################
 
     def _test_start_and_stop(self, plugin_manager, expected):
@@ -0,0 +1,355 @@
+""" Tests for the plugin profiler. """
+
+
+# Standard library imports.
+import json, os, shutil, sys, tempfile, threading, types
+
+# Enthought library imports.
+from envisage.api import Application, Plugin, PluginMemoryProfiler
+from envisage.api import PluginProfiler, ServiceOffer
+from envisage.core_plugin import CorePlugin
+from traits.api import Any, List
+from traits.testing.unittest_tools import unittest
+
+
+class SlowPlugin(Plugin):
+    """ A plugin that does some work when it starts. """
+
+    id = 'slow'
+
+    def start(self):
+        """ Start the plugin. """
+
+        sum(range(10000))
+
+        return
+
+
+class FakeTracemalloc(types.ModuleType):
+    """ A stand-in for the 'tracemalloc' module. """
+
+    def __init__(self, tracing):
+        """ Constructor. """
+
+        super(FakeTracemalloc, self).__init__('tracemalloc')
+
+        self.tracing = tracing
+        self.size    = 0
+
+        return
+
+    def get_traced_memory(self):
+        """ Return the current and peak size of traced memory. """
+
+        return self.size, self.size
+
+    def is_tracing(self):
+        """ Is tracing switched on? """
+
+        return self.tracing
+
+    def start(self):
+        """ Switch tracing on. """
+
+        self.tracing = True
+
+        return
+
+    def stop(self):
+        """ Switch tracing off. """
+
+        self.tracing = False
+
+        return
+
+
+class HungryPlugin(Plugin):
+    """ A plugin that uses lots of memory when it starts. """
+
+    id = 'hungry'
+
+    # The memory that the plugin holds on to.
+    data = Any
+
+    service_offers = List(contributes_to='envisage.service_offers')
+
+    def _service_offers_default(self):
+        """ Trait initializer. """
+
+        return [ServiceOffer(protocol='hungry.IFood', factory=list)]
+
+    def start(self):
+        """ Start the plugin. """
+
+        # Make sure the memory is actually touched (and so becomes resident).
+        self.data = 'x' * (16 * 1024 * 1024)
+
+        return
+
+
+class TestApplication(Application):
+    """ The type of application used in the tests. """
+
+    id = 'plugin.profiler.test'
+
+
+class PluginProfilerTestCase(unittest.TestCase):
+    """ Tests for the plugin profiler. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        shutil.rmtree(self.tmpdir)
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_report(self):
+        """ report """
+
+        profiler = PluginProfiler()
+        application = TestApplication(
+            profiler=profiler, plugins=[CorePlugin(), SlowPlugin()]
+        )
+        application.start()
+        application.stop()
+
+        report = profiler.get_report()
+
+        phases = [
+            'start_plugin', 'connect_extension_point_traits',
+            'register_services', 'start',
+            'stop_plugin', 'stop', 'unregister_services',
+            'disconnect_extension_point_traits'
+        ]
+        for plugin_id in ['envisage.core', 'slow']:
+            self.assertEqual(set(phases), set(report[plugin_id]))
+
+        self.assertEqual(
+            set(['application_start', 'application_stop', 'save_preferences']),
+            set(report[None])
+        )
+
+        # A plugin's start is part of starting the plugin.
+        slow = report['slow']
+        self.assertTrue(slow['start'] <= slow['start_plugin'])
+        self.assertTrue(
+            slow['start_plugin'] <= report[None]['application_start']
+        )
+
+        profiler.clear()
+        self.assertEqual({}, profiler.get_report())
+
+        return
+
+    def test_chrome_trace(self):
+        """ chrome trace """
+
+        profiler = PluginProfiler()
+        application = TestApplication(
+            profiler=profiler, plugins=[CorePlugin(), SlowPlugin()]
+        )
+        application.start()
+
+        filename = os.path.join(self.tmpdir, 'trace.json')
+        profiler.save_chrome_trace(filename)
+        with open(filename) as f:
+            trace = json.load(f)
+
+        events = trace['traceEvents']
+        self.assertEqual(len(profiler.records), len(events))
+
+        names = [event['name'] for event in events]
+        self.assertIn('slow start', names)
+        self.assertIn('application_start', names)
+
+        for event in events:
+            self.assertEqual('X', event['ph'])
+            self.assertTrue(event['ts'] >= 0)
+            self.assertTrue(event['dur'] >= 0)
+
+        return
+
+    def test_phase_is_recorded_if_it_fails(self):
+        """ phase is recorded if it fails """
+
+        profiler = PluginProfiler()
+
+        try:
+            with profiler.phase('start', 'broken'):
+                raise ZeroDivisionError
+
+        except ZeroDivisionError:
+            pass
+
+        self.assertEqual(['start'], profiler.get_report()['broken'].keys())
+
+        return
+
+    def test_phases_on_several_threads(self):
+        """ phases on several threads """
+
+        profiler = PluginProfiler()
+
+        def worker(plugin_id):
+            for i in range(200):
+                with profiler.phase('start', plugin_id):
+                    pass
+
+        threads = [
+            threading.Thread(target=worker, args=('plugin%d' % i,))
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(8 * 200, len(profiler.records))
+        self.assertEqual(8, len(profiler.get_report()))
+
+        return
+
+    def test_memory_report(self):
+        """ memory report """
+
+        profiler = PluginMemoryProfiler()
+        if profiler.memory_source == '':
+            self.skipTest('memory cannot be measured on this platform')
+
+        application = TestApplication(
+            profiler=profiler, plugins=[CorePlugin(), HungryPlugin()]
+        )
+        application.start()
+
+        report = profiler.get_memory_report()
+        hungry = report['hungry']
+        self.assertTrue(hungry['start'] >= 8 * 1024 * 1024)
+        self.assertTrue(hungry['start_plugin'] >= hungry['start'])
+
+        # The service offered by the plugin is attributed to it (and not to
+        # the core plugin, which actually registers it).
+        services = profiler.get_service_report(application)
+        self.assertEqual(1, len(services['hungry']))
+        self.assertEqual([], services['envisage.core'])
+
+        application.stop()
+        services = profiler.get_service_report(application)
+        self.assertEqual([], services['hungry'])
+
+        # The memory used by each phase is in the trace too.
+        events = profiler.get_chrome_trace()['traceEvents']
+        self.assertTrue(all('memory' in event['args'] for event in events))
+
+        return
+
+    def test_memory_is_not_measured_for_overlapping_phases(self):
+        """ memory is not measured for overlapping phases """
+
+        profiler = PluginMemoryProfiler()
+        if profiler.memory_source == '':
+            self.skipTest('memory cannot be measured on this platform')
+
+        started = threading.Event()
+        finish = threading.Event()
+        def worker():
+            with profiler.phase('start', 'other'):
+                started.set()
+                finish.wait(10)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        started.wait(10)
+
+        with profiler.phase('start', 'mine'):
+            pass
+
+        finish.set()
+        thread.join(10)
+
+        # Phases that don't overlap with phases on other threads are fine.
+        with profiler.phase('stop', 'mine'):
+            pass
+
+        memory = dict(
+            ((record.plugin_id, record.phase), record.memory)
+            for record in profiler.records
+        )
+        self.assertEqual(None, memory[('other', 'start')])
+        self.assertEqual(None, memory[('mine', 'start')])
+        self.assertNotEqual(None, memory[('mine', 'stop')])
+
+        # The phases are still timed.
+        self.assertEqual(3, len(profiler.records))
+
+        return
+
+    def test_close_only_stops_tracing_that_it_started(self):
+        """ close only stops tracing that it started """
+
+        def create_profiler(tracemalloc):
+            old = sys.modules.get('tracemalloc')
+            sys.modules['tracemalloc'] = tracemalloc
+            try:
+                profiler = PluginMemoryProfiler()
+
+            finally:
+                if old is None:
+                    del sys.modules['tracemalloc']
+
+                else:
+                    sys.modules['tracemalloc'] = old
+
+            return profiler
+
+        tracemalloc = FakeTracemalloc(tracing=False)
+        profiler = create_profiler(tracemalloc)
+        self.assertEqual('tracemalloc', profiler.memory_source)
+        self.assertTrue(tracemalloc.tracing)
+
+        with profiler.phase('start', 'hungry'):
+            tracemalloc.size += 100
+
+        profiler.close()
+        self.assertFalse(tracemalloc.tracing)
+
+        # Memory is no longer measured (but phases are still timed).
+        with profiler.phase('stop', 'hungry'):
+            pass
+
+        self.assertEqual(
+            [100, None], [record.memory for record in profiler.records]
+        )
+        self.assertEqual(
+            {'hungry' : {'start' : 100}}, profiler.get_memory_report()
+        )
+
+        # Tracing that was already running is left alone.
+        tracemalloc = FakeTracemalloc(tracing=True)
+        profiler = create_profiler(tracemalloc)
+        profiler.close()
+        self.assertTrue(tracemalloc.tracing)
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
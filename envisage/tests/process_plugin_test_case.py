@@ -0,0 +1,303 @@
+""" Tests for plugins that run in child processes. """
+
+
+# Standard library imports.
+import os, threading
+
+# Enthought library imports.
+from envisage.api import Application, ExtensionPoint, Plugin, ProcessPlugin
+from envisage.api import ServiceOffer
+from envisage.core_plugin import CorePlugin
+from traits.api import Any, HasTraits, Int, Interface, List, Str
+from traits.api import provides
+from traits.testing.unittest_tools import unittest
+
+
+class CalculatorError(Exception):
+    """ An exception that can't be copied to the parent process. """
+
+    def __init__(self, message, lock):
+        """ Constructor. """
+
+        super(CalculatorError, self).__init__(message)
+
+        # Locks can't be pickled.
+        self.lock = lock
+
+        return
+
+
+class ICalculator(Interface):
+    """ A service offered by a plugin in a child process. """
+
+
+@provides(ICalculator)
+class Calculator(HasTraits):
+    """ A service offered by a plugin in a child process. """
+
+    # The process that the calculator was created in.
+    pid = Int
+
+    # A (non-method) attribute.
+    name = Str('calculator')
+
+    # An attribute whose value is a function.
+    square = Any
+
+    # An attribute whose value can't be copied to the parent process.
+    lock = Any
+
+    def _lock_default(self):
+        """ Trait initializer. """
+
+        return threading.Lock()
+
+    def _pid_default(self):
+        """ Trait initializer. """
+
+        return os.getpid()
+
+    def add(self, x, y):
+        """ Add two numbers. """
+
+        return x + y
+
+    def divide(self, x, y):
+        """ Divide two numbers. """
+
+        return x / y
+
+    def fail(self):
+        """ Raise an exception that can't be copied to the parent. """
+
+        raise CalculatorError('failed', self.lock)
+
+    @staticmethod
+    def negate(x):
+        """ Negate a number. """
+
+        return -x
+
+    def _square_default(self):
+        """ Trait initializer. """
+
+        return lambda x: x * x
+
+
+class CalculatorPlugin(Plugin):
+    """ The plugin that runs in a child process. """
+
+    id = 'calculator'
+
+    # The greetings contributed by the plugin.
+    greetings = List(contributes_to='process.greetings')
+
+    service_offers = List(contributes_to='envisage.service_offers')
+
+    def _service_offers_default(self):
+        """ Trait initializer. """
+
+        return [ServiceOffer(protocol=ICalculator, factory=Calculator)]
+
+    def start(self):
+        """ Start the plugin. """
+
+        self.greetings = ['hello from %d' % os.getpid()]
+
+        return
+
+
+class BrokenPlugin(Plugin):
+    """ A plugin that fails to start. """
+
+    id = 'broken'
+
+    def start(self):
+        """ Start the plugin. """
+
+        raise ValueError('broken')
+
+
+class GreetingsPlugin(Plugin):
+    """ A plugin that offers an extension point. """
+
+    id = 'greetings'
+
+    greetings = ExtensionPoint(List, id='process.greetings')
+
+
+class IGreeter(Interface):
+    """ A service that uses the contributions to an extension point. """
+
+
+@provides(IGreeter)
+class Greeter(HasTraits):
+    """ A service that uses the contributions to an extension point. """
+
+    # The plugin that offers the extension point.
+    plugin = Any
+
+    def get_names(self):
+        """ Return the names contributed to the extension point. """
+
+        return self.plugin.names
+
+
+class GreeterPlugin(Plugin):
+    """ A plugin in a child process that offers an extension point. """
+
+    id = 'greeter'
+
+    # The names contributed by the parent application.
+    names = ExtensionPoint(List, id='process.names')
+
+    service_offers = List(contributes_to='envisage.service_offers')
+
+    def _service_offers_default(self):
+        """ Trait initializer. """
+
+        return [
+            ServiceOffer(
+                protocol = IGreeter,
+                factory  = lambda **properties: Greeter(plugin=self)
+            )
+        ]
+
+
+class NamesPlugin(Plugin):
+    """ A plugin in the parent that contributes to an extension point. """
+
+    id = 'names'
+
+    names = List(['fred', 'wilma'], contributes_to='process.names')
+
+
+class TestApplication(Application):
+    """ The type of application used in the tests. """
+
+    id = 'process.plugin.test'
+
+
+class ProcessPluginTestCase(unittest.TestCase):
+    """ Tests for plugins that run in child processes. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_contributions_and_services_are_forwarded(self):
+        """ contributions and services are forwarded """
+
+        plugin = ProcessPlugin(
+            id           = 'process.calculator',
+            plugin_class = __name__ + ':CalculatorPlugin'
+        )
+        greetings = GreetingsPlugin()
+        application = TestApplication(
+            plugins=[CorePlugin(), greetings, plugin]
+        )
+        application.start()
+
+        # The contributions made by the plugin when it was started in the
+        # child.
+        self.assertEqual(1, len(greetings.greetings))
+        self.assertTrue(greetings.greetings[0].startswith('hello from'))
+        self.assertNotEqual(
+            'hello from %d' % os.getpid(), greetings.greetings[0]
+        )
+
+        # The service lives in the child.
+        calculator = application.get_service(ICalculator)
+        self.assertIsInstance(calculator, ICalculator)
+        self.assertEqual(3, calculator.add(1, 2))
+        self.assertEqual('calculator', calculator.name)
+        self.assertNotEqual(os.getpid(), calculator.pid)
+
+        # Exceptions raised in the child are re-raised in the parent (or if
+        # they can't be copied then a 'RuntimeError' with the traceback is
+        # raised instead).
+        self.failUnlessRaises(ZeroDivisionError, calculator.divide, 1, 0)
+        try:
+            calculator.fail()
+
+        except RuntimeError as exc:
+            self.assertIn('CalculatorError', str(exc))
+            self.assertIn('Traceback', str(exc))
+
+        else:
+            self.fail('RuntimeError not raised')
+
+        # Anything callable is called in the child.
+        self.assertEqual(-3, calculator.negate(3))
+        self.assertEqual(9, calculator.square(3))
+
+        # Other attributes must be picklable.
+        self.failUnlessRaises(TypeError, getattr, calculator, 'lock')
+
+        # Once the plugin has stopped its contributions and services are gone.
+        application.stop()
+        self.assertEqual([], application.get_extensions('process.greetings'))
+        self.assertEqual(None, application.get_service(ICalculator))
+
+        return
+
+    def test_contributions_are_forwarded_to_the_child(self):
+        """ contributions are forwarded to the child """
+
+        plugin = ProcessPlugin(
+            id           = 'process.greeter',
+            plugin_class = __name__ + ':GreeterPlugin'
+        )
+        names = NamesPlugin()
+        application = TestApplication(plugins=[CorePlugin(), names, plugin])
+        application.start()
+
+        greeter = application.get_service(IGreeter)
+        self.assertEqual(['fred', 'wilma'], greeter.get_names())
+
+        # Changes to the contributions are forwarded too.
+        names.names = ['barney']
+        self.assertEqual(['barney'], greeter.get_names())
+
+        # The child's extension point is only known to the parent while the
+        # plugin is running.
+        get_extension_point = application.get_extension_point
+        self.assertNotEqual(None, get_extension_point('process.names'))
+        application.stop()
+        self.assertEqual(None, get_extension_point('process.names'))
+
+        return
+
+    def test_plugin_that_fails_to_start(self):
+        """ plugin that fails to start """
+
+        plugin = ProcessPlugin(
+            id           = 'process.broken',
+            plugin_class = __name__ + ':BrokenPlugin'
+        )
+        application = TestApplication(plugins=[CorePlugin(), plugin])
+
+        self.failUnlessRaises(ValueError, application.start)
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
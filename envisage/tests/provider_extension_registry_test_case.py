@@ -535,6 +535,188 @@ class ProviderExtensionRegistryTestCase(ExtensionRegistryTestCase):
 
         return
 
+    def test_add_and_remove_providers(self):
+        """ add and remove providers """
+
+        registry = self.registry
+
+        # Some providers.
+        class ProviderA(ExtensionProvider):
+            """ An extension provider. """
+
+            def get_extension_points(self):
+                """ Return the extension points offered by the provider. """
+
+                return [ExtensionPoint(List, 'x')]
+
+        class ProviderB(ExtensionProvider):
+            """ An extension provider. """
+
+            # The provider's contributions to 'x'.
+            x = List
+
+            def get_extensions(self, extension_point):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point == 'x':
+                    extensions = self.x
+
+                else:
+                    extensions = []
+
+                return extensions
+
+        a = ProviderA()
+        registry.add_provider(a)
+        self.assertEqual([], registry.get_extensions('x'))
+
+        # Add an extension listener to the registry.
+        events = []
+        def listener(registry, event):
+            """ A useful trait change handler for testing! """
+
+            events.append(event)
+
+            return
+
+        registry.add_extension_point_listener(listener, 'x')
+
+        # Add several providers at once.
+        b, c, d, e = [ProviderB(x=x) for x in ([1, 2], [], [3], [4, 5])]
+        registry.add_providers([b, c, d, e])
+
+        # All of the contributions are added in one event.
+        self.assertEqual([1, 2, 3, 4, 5], registry.get_extensions('x'))
+        self.assertEqual([a, b, c, d, e], registry.get_providers())
+        self.assertEqual(1, len(events))
+        self.assertEqual([1, 2, 3, 4, 5], events[0].added)
+        self.assertEqual(0, events[0].index)
+
+        # Contributions that are next to each other are removed in one event
+        # (even if there is a provider in between that doesn't contribute
+        # anything).
+        del events[:]
+        registry.remove_providers([b, d])
+
+        self.assertEqual([4, 5], registry.get_extensions('x'))
+        self.assertEqual([a, c, e], registry.get_providers())
+        self.assertEqual(1, len(events))
+        self.assertEqual([1, 2, 3], events[0].removed)
+        self.assertEqual(0, events[0].index)
+
+        # Other contributions are removed in separate events.
+        f, g = ProviderB(x=[6]), ProviderB(x=[7])
+        registry.add_providers([f, g])
+
+        del events[:]
+        registry.remove_providers([e, g])
+
+        self.assertEqual([6], registry.get_extensions('x'))
+        self.assertEqual([a, c, f], registry.get_providers())
+        self.assertEqual(2, len(events))
+        self.assertEqual(([4, 5], 0), (events[0].removed, events[0].index))
+        self.assertEqual(([7], 1), (events[1].removed, events[1].index))
+
+        # If any of the providers aren't in the registry then none of them
+        # are removed.
+        self.failUnlessRaises(ValueError, registry.remove_providers, [c, b])
+        self.assertEqual([a, c, f], registry.get_providers())
+
+        return
+
+    def test_replace_provider_with_object_contributions(self):
+        """ replace provider with object contributions """
+
+        registry = self.registry
+
+        # Some contributions that are objects (and so are only equal to
+        # themselves).
+        class Contribution(object):
+            """ A contribution. """
+
+            def __init__(self, name):
+                """ Constructor. """
+
+                self.name = name
+
+                return
+
+        def get_names(extensions):
+            """ Return the names of some contributions. """
+
+            return [extension.name for extension in extensions]
+
+        # Some providers.
+        class ProviderA(ExtensionProvider):
+            """ An extension provider. """
+
+            def get_extension_points(self):
+                """ Return the extension points offered by the provider. """
+
+                return [ExtensionPoint(List, 'x')]
+
+        class ProviderB(ExtensionProvider):
+            """ An extension provider. """
+
+            # The names of the provider's contributions to 'x'.
+            names = List
+
+            def get_extensions(self, extension_point):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point == 'x':
+                    extensions = [Contribution(name) for name in self.names]
+
+                else:
+                    extensions = []
+
+                return extensions
+
+        b = ProviderB(names=['a', 'b', 'c'])
+        registry.add_providers([ProviderA(), ProviderB(names=['z']), b])
+        self.assertEqual(4, len(registry.get_extensions('x')))
+
+        # Add an extension listener to the registry.
+        events = []
+        def listener(registry, event):
+            """ A useful trait change handler for testing! """
+
+            events.append(event)
+
+            return
+
+        registry.add_extension_point_listener(listener, 'x')
+
+        # By default, none of the new contributions are equal to the old ones
+        # so they are all replaced.
+        c = ProviderB(names=['a', 'B', 'c'])
+        registry.replace_provider(b, c)
+
+        self.assertEqual(1, len(events))
+        self.assertEqual(['a', 'b', 'c'], get_names(events[0].removed))
+        self.assertEqual(['a', 'B', 'c'], get_names(events[0].added))
+        self.assertEqual(1, events[0].index)
+
+        # With a key, only the contributions that actually changed are.
+        del events[:]
+        d = ProviderB(names=['a', 'b', 'c'])
+        registry.replace_provider(c, d, key=lambda extension: extension.name)
+
+        self.assertEqual(1, len(events))
+        self.assertEqual(['B'], get_names(events[0].removed))
+        self.assertEqual(['b'], get_names(events[0].added))
+        self.assertEqual(2, events[0].index)
+
+        self.assertEqual(
+            ['z', 'a', 'b', 'c'], get_names(registry.get_extensions('x'))
+        )
+
+        return
+
     def test_remove_non_existent_provider(self):
         """ remove provider """
 
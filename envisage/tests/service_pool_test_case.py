@@ -0,0 +1,292 @@
+""" Tests for service pools. """
+
+
+# Standard library imports.
+import threading
+
+# Enthought library imports.
+from envisage.api import Application, Plugin, PooledServiceOffer
+from envisage.api import ServicePool, ServicePoolExhaustedError
+from envisage.core_plugin import CorePlugin
+from traits.api import HasTraits, Int, Interface, List, Str
+from traits.testing.unittest_tools import unittest
+
+
+# This module's package.
+PKG = 'envisage.tests'
+
+
+class IParser(Interface):
+    """ A service that is not thread-safe. """
+
+
+class Parser(HasTraits):
+    """ A service that is not thread-safe. """
+
+    # The number of parsers created.
+    count = 0
+
+    # The language that the parser parses.
+    language = Str
+
+    # The parser's serial number.
+    number = Int
+
+    def __init__(self, **traits):
+        """ Constructor. """
+
+        super(Parser, self).__init__(**traits)
+
+        Parser.count += 1
+        self.number = Parser.count
+
+        return
+
+
+def parser_factory(**properties):
+    """ A factory for parsers. """
+
+    return Parser(**properties)
+
+
+class TestApplication(Application):
+    """ The type of application used in the tests. """
+
+    id = 'service.pool.test'
+
+
+class ServicePoolTestCase(unittest.TestCase):
+    """ Tests for service pools. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        Parser.count = 0
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_checkout_and_checkin(self):
+        """ checkout and checkin """
+
+        pool = ServicePool(factory=Parser)
+
+        a = pool.checkout()
+        b = pool.checkout()
+        self.assertIsNot(a, b)
+        self.assertEqual(2, Parser.count)
+
+        pool.checkin(a)
+        c = pool.checkout()
+        self.assertIs(a, c)
+        self.assertEqual(2, Parser.count)
+
+        # You can only check in objects that are checked out.
+        pool.checkin(b)
+        self.failUnlessRaises(ValueError, pool.checkin, b)
+        self.failUnlessRaises(ValueError, pool.checkin, Parser())
+
+        return
+
+    def test_checked_out_context_manager(self):
+        """ checked out context manager """
+
+        pool = ServicePool(factory=Parser, max_size=1)
+
+        with pool.checked_out() as parser:
+            self.assertEqual(Parser, type(parser))
+
+        # The object is checked back in even if an exception is raised.
+        try:
+            with pool.checked_out() as parser:
+                raise ZeroDivisionError
+
+        except ZeroDivisionError:
+            pass
+
+        with pool.checked_out(timeout=0) as other:
+            self.assertIs(parser, other)
+
+        return
+
+    def test_factory_properties_and_symbol_path(self):
+        """ factory properties and symbol path """
+
+        pool = ServicePool(
+            factory    = PKG + '.service_pool_test_case.parser_factory',
+            properties = {'language' : 'python'}
+        )
+
+        with pool.checked_out() as parser:
+            self.assertEqual(Parser, type(parser))
+            self.assertEqual('python', parser.language)
+
+        return
+
+    def test_min_size(self):
+        """ min size """
+
+        pool = ServicePool(factory=Parser, min_size=3)
+        self.assertEqual(0, Parser.count)
+
+        with pool.checked_out():
+            self.assertEqual(3, Parser.count)
+
+        return
+
+    def test_max_size(self):
+        """ max size """
+
+        pool = ServicePool(factory=Parser, max_size=2)
+
+        pool.checkout()
+        b = pool.checkout()
+
+        self.failUnlessRaises(
+            ServicePoolExhaustedError, pool.checkout, timeout=0.01
+        )
+
+        # A blocked checkout gets the object as soon as it is checked in.
+        result = []
+        def worker():
+            result.append(pool.checkout(timeout=10))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        pool.checkin(b)
+        thread.join(10)
+
+        self.assertEqual([b], result)
+        self.assertEqual(2, Parser.count)
+
+        return
+
+    def test_thread_affinity(self):
+        """ thread affinity """
+
+        pool = ServicePool(factory=Parser)
+
+        mine = pool.checkout()
+        theirs = []
+        def worker():
+            theirs.append(pool.checkout())
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(10)
+
+        # Check in our object *first* so that without affinity it would not
+        # be the next one out.
+        pool.checkin(mine)
+        pool.checkin(theirs[0])
+
+        self.assertIs(mine, pool.checkout())
+
+        return
+
+    def test_factory_failure_releases_place(self):
+        """ factory failure releases place """
+
+        def factory():
+            raise ZeroDivisionError
+
+        pool = ServicePool(factory=factory, max_size=1)
+        self.failUnlessRaises(ZeroDivisionError, pool.checkout)
+
+        pool.factory = Parser
+        with pool.checked_out(timeout=0) as parser:
+            self.assertEqual(Parser, type(parser))
+
+        return
+
+    def test_pooled_service_offer(self):
+        """ pooled service offer """
+
+        class PluginA(Plugin):
+            id = 'A'
+
+            service_offers = List(contributes_to='envisage.service_offers')
+
+            def _service_offers_default(self):
+                """ Trait initializer. """
+
+                pooled_service_offer = PooledServiceOffer(
+                    protocol = IParser,
+                    factory  = Parser,
+                    max_size = 2
+                )
+
+                return [pooled_service_offer]
+
+        application = TestApplication(plugins=[CorePlugin(), PluginA()])
+        application.start()
+
+        # The pool is looked up separately from ordinary services.
+        pool = application.get_service_pool(IParser)
+        self.assertEqual(ServicePool, type(pool))
+        self.assertIs(pool, application.get_service_pool(IParser))
+        self.assertEqual(2, pool.max_size)
+        self.assertEqual(None, application.get_service(IParser))
+
+        with pool.checked_out() as parser:
+            self.assertEqual(Parser, type(parser))
+
+        application.stop()
+        self.assertEqual(None, application.get_service_pool(IParser))
+
+        return
+
+    def test_pools_and_services_are_separate(self):
+        """ pools and services are separate """
+
+        application = TestApplication()
+
+        application.register_service(IParser, Parser, {'language' : 'c'})
+        pool_id = application.register_service_pool(
+            IParser, ServicePool(factory=Parser), {'language' : 'python'}
+        )
+        other_pool = ServicePool(factory=Parser)
+        application.register_service_pool(
+            IParser, other_pool, {'language' : 'ruby'}
+        )
+
+        # The pools are not ordinary services (and they are certainly not
+        # service factories!).
+        parsers = application.get_services(IParser)
+        self.assertEqual(1, len(parsers))
+        self.assertEqual('c', parsers[0].language)
+
+        pool = application.get_service_pool(IParser)
+        self.assertIs(pool, application.get_service_from_id(pool_id))
+        self.assertIs(
+            other_pool,
+            application.get_service_pool(IParser, "language == 'ruby'")
+        )
+        self.assertEqual(
+            None, application.get_service_pool(IParser, "language == 'c'")
+        )
+
+        # Pools are unregistered just like any other service.
+        application.unregister_service(pool_id)
+        self.assertIs(other_pool, application.get_service_pool(IParser))
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
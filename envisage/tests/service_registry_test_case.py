@@ -2,13 +2,27 @@
 
 
 # Standard library imports.
-import sys
+import sys, threading
 
 # Enthought library imports.
 from envisage.api import Application, ServiceRegistry, NoSuchServiceError
 from traits.api import HasTraits, Int, Interface, provides
 from traits.testing.unittest_tools import unittest
 
+# Local imports.
+#
+# We do these as absolute imports to allow nose to run from a different
+# working directory.
+from envisage.tests.event_tracker import EventTracker
+
+# The asynchronous lookups use 'concurrent.futures' by default (the 'futures'
+# package on Python 2).
+try:
+    import concurrent.futures as futures
+
+except ImportError:
+    futures = None
+
 
 # This module's package.
 PKG = 'envisage.tests'
@@ -538,6 +552,334 @@ class ServiceRegistryTestCase(unittest.TestCase):
 
         return
 
+    def test_register_and_unregister_services(self):
+        """ register and unregister services """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        registry = self.service_registry.service_registry
+        tracker = EventTracker(
+            subscriptions = [
+                (registry, 'registered'),
+                (registry, 'unregistered'),
+                (registry, 'services_registered'),
+                (registry, 'services_unregistered')
+            ]
+        )
+
+        x = Foo(price=10)
+        service_ids = self.service_registry.register_services(
+            [(IFoo, x, None), (IFoo, Foo, {'price' : 5})]
+        )
+        self.assertEqual(2, len(service_ids))
+        self.assertEqual(
+            ['registered', 'registered', 'services_registered'],
+            tracker.event_names
+        )
+        self.assertEqual(
+            service_ids, [event[3] for event in tracker.events[:2]]
+        )
+        self.assertEqual(service_ids, tracker.events[2][3])
+
+        services = self.service_registry.get_services(IFoo, minimize='price')
+        self.assertEqual(2, len(services))
+        self.assertEqual(5, services[0].price)
+        self.assertEqual(x, services[1])
+
+        # If any of the Ids are unknown then nothing is unregistered.
+        self.failUnlessRaises(
+            ValueError,
+            self.service_registry.unregister_services, service_ids + [-1]
+        )
+        self.assertEqual(2, len(self.service_registry.get_services(IFoo)))
+
+        self.service_registry.unregister_services(service_ids)
+        self.assertEqual([], self.service_registry.get_services(IFoo))
+        self.assertEqual(
+            ['unregistered', 'unregistered', 'services_unregistered'],
+            tracker.event_names[3:]
+        )
+        self.assertEqual(
+            service_ids, [event[3] for event in tracker.events[3:5]]
+        )
+        self.assertEqual(service_ids, tracker.events[5][3])
+
+        return
+
+    def test_minimize_and_maximize_with_ranking_index(self):
+        """ minimize and maximize with ranking index """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        self.service_registry.service_registry.ranking_attributes = ['price']
+
+        # Register some objects with various prices (including one via a
+        # factory).
+        x = Foo(price=10)
+        y = Foo(price=5)
+
+        for foo in [x, y]:
+            self.service_registry.register_service(IFoo, foo)
+
+        self.service_registry.register_service(IFoo, Foo, {'price' : 100})
+
+        # Find the service with the lowest price.
+        service = self.service_registry.get_service(IFoo, minimize='price')
+        self.assertEqual(y, service)
+
+        # Find the service with the highest price.
+        service = self.service_registry.get_service(IFoo, maximize='price')
+        self.assertEqual(Foo, type(service))
+        self.assertEqual(100, service.price)
+        z = service
+
+        # With a query.
+        service = self.service_registry.get_service(
+            IFoo, 'price > 5', minimize='price'
+        )
+        self.assertEqual(x, service)
+
+        services = self.service_registry.get_services(IFoo, minimize='price')
+        self.assertEqual([y, x, z], services)
+
+        services = self.service_registry.get_services(IFoo, maximize='price')
+        self.assertEqual([z, x, y], services)
+
+        # Register a new service after the index has been built.
+        w = Foo(price=1)
+        w_id = self.service_registry.register_service(IFoo, w)
+
+        service = self.service_registry.get_service(IFoo, minimize='price')
+        self.assertEqual(w, service)
+
+        # Change the price of a service.
+        w.price = 1000
+
+        service = self.service_registry.get_service(IFoo, minimize='price')
+        self.assertEqual(y, service)
+
+        service = self.service_registry.get_service(IFoo, maximize='price')
+        self.assertEqual(w, service)
+
+        # Unregister it.
+        self.service_registry.unregister_service(w_id)
+
+        service = self.service_registry.get_service(IFoo, maximize='price')
+        self.assertEqual(z, service)
+
+        # Changing the price of an unregistered service has no effect.
+        w.price = 2000
+
+        services = self.service_registry.get_services(IFoo, maximize='price')
+        self.assertEqual([z, x, y], services)
+
+        return
+
+    @unittest.skipIf(futures is None, 'concurrent.futures is not available')
+    def test_get_service_async(self):
+        """ get service async """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        factory_threads = []
+        def foo_factory(**properties):
+            """ A factory for foos. """
+
+            factory_threads.append(threading.current_thread())
+
+            return Foo(**properties)
+
+        self.service_registry.register_service(IFoo, foo_factory, {'price':10})
+
+        future = self.service_registry.get_service_async(IFoo)
+        service = future.result(timeout=10)
+        self.assertEqual(Foo, type(service))
+        self.assertEqual(10, service.price)
+
+        # The factory should have been called on a worker thread...
+        self.assertEqual(1, len(factory_threads))
+        self.assertIsNot(threading.current_thread(), factory_threads[0])
+
+        # ... and the service it created should now be in the registry.
+        self.assertIs(service, self.service_registry.get_service(IFoo))
+
+        # No such service.
+        future = self.service_registry.get_service_async(IFoo, 'price > 10')
+        self.assertEqual(None, future.result(timeout=10))
+
+        return
+
+    @unittest.skipIf(futures is None, 'concurrent.futures is not available')
+    def test_get_services_async(self):
+        """ get services async """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        x = Foo(price=10)
+        y = Foo(price=5)
+
+        for foo in [x, y]:
+            self.service_registry.register_service(IFoo, foo)
+
+        future = self.service_registry.get_services_async(
+            IFoo, minimize='price'
+        )
+        self.assertEqual([y, x], future.result(timeout=10))
+
+        return
+
+    @unittest.skipIf(futures is None, 'concurrent.futures is not available')
+    def test_service_factory_is_called_once_by_concurrent_lookups(self):
+        """ service factory is called once by concurrent lookups """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        # The factory blocks until all lookups have been submitted so that
+        # they really do race each other.
+        go = threading.Event()
+        calls = []
+        def foo_factory(**properties):
+            """ A factory for foos. """
+
+            go.wait(10)
+            calls.append(1)
+
+            return Foo(**properties)
+
+        self.service_registry.register_service(IFoo, foo_factory)
+
+        pending = [
+            self.service_registry.get_service_async(IFoo) for i in range(4)
+        ]
+        go.set()
+
+        services = [future.result(timeout=10) for future in pending]
+        self.assertEqual(1, len(calls))
+        for service in services:
+            self.assertIs(services[0], service)
+
+        return
+
+    def test_concurrent_registrations(self):
+        """ concurrent registrations """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            priority = Int
+
+        # Use a ranking index so that it is updated concurrently too.
+        self.service_registry.service_registry.ranking_attributes = [
+            'priority'
+        ]
+        self.service_registry.get_service(IFoo, maximize='priority')
+
+        service_ids = []
+        def register():
+            for i in range(100):
+                service_ids.append(
+                    self.service_registry.register_service(
+                        IFoo, Foo(priority=i)
+                    )
+                )
+
+        threads = [threading.Thread(target=register) for i in range(4)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(400, len(set(service_ids)))
+
+        service = self.service_registry.get_service(IFoo, maximize='priority')
+        self.assertEqual(99, service.priority)
+
+        for service_id in service_ids:
+            self.service_registry.unregister_service(service_id)
+
+        self.assertEqual(
+            None, self.service_registry.get_service(IFoo, maximize='priority')
+        )
+
+        return
+
+    @unittest.skipIf(futures is None, 'concurrent.futures is not available')
+    def test_slow_factory_does_not_block_other_services(self):
+        """ slow factory does not block other services """
+
+        class IFoo(Interface):
+            pass
+
+        class IBar(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        @provides(IBar)
+        class Bar(HasTraits):
+            pass
+
+        # The foo factory blocks until the bar has been looked up.
+        started = threading.Event()
+        go = threading.Event()
+        def foo_factory(**properties):
+            """ A factory for foos. """
+
+            started.set()
+            go.wait(10)
+
+            return Foo()
+
+        self.service_registry.register_service(IFoo, foo_factory)
+        self.service_registry.register_service(IBar, lambda: Bar())
+
+        future = self.service_registry.get_service_async(IFoo)
+
+        # 'Event.wait' always returns None in Python 2.6.
+        started.wait(10)
+        self.assertTrue(started.is_set())
+
+        # The bar is created while the foo factory is still running (if the
+        # lookup waited for the foo factory then the factory would have
+        # given up waiting and the future would be done).
+        self.assertEqual(Bar, type(self.service_registry.get_service(IBar)))
+        self.assertFalse(future.done())
+
+        go.set()
+        self.assertEqual(Foo, type(future.result(timeout=10)))
+
+        return
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
@@ -2,8 +2,8 @@
 
 
 # Enthought library imports.
-from envisage.api import Application, Plugin, Service
-from traits.api import HasTraits, Instance
+from envisage.api import Application, Plugin, Service, ServiceRegistry
+from traits.api import HasTraits, Instance, Int
 from traits.testing.unittest_tools import unittest
 
 
@@ -13,6 +13,22 @@ class TestApplication(Application):
     id = 'test'
 
 
+class CountingServiceRegistry(ServiceRegistry):
+    """ A service registry that counts service lookups. """
+
+    # The number of times 'get_service' has been called.
+    lookups = Int
+
+    def get_service(self, protocol, query='', minimize='', maximize=''):
+        """ Return at most one service that matches the specified query. """
+
+        self.lookups += 1
+
+        return super(CountingServiceRegistry, self).get_service(
+            protocol, query, minimize, maximize
+        )
+
+
 class ServiceTestCase(unittest.TestCase):
     """ Tests for the 'Service' trait type. """
 
@@ -84,6 +100,94 @@ class ServiceTestCase(unittest.TestCase):
 
         return
 
+    def test_service_is_cached(self):
+        """ service is cached """
+
+        class Foo(HasTraits):
+            price = Int
+
+        class PluginA(Plugin):
+            id = 'A'
+            foo = Service(Foo)
+            cheapest_foo = Service(Foo, minimize='price')
+            uncached_foo = Service(Foo, cache=False)
+
+        a = PluginA()
+        service_registry = CountingServiceRegistry()
+        application = TestApplication(
+            plugins=[a], service_registry=service_registry
+        )
+
+        # No such service (and that is cached too!).
+        self.assertEqual(None, a.foo)
+        self.assertEqual(None, a.foo)
+        self.assertEqual(1, service_registry.lookups)
+
+        # Registering a service invalidates the cache.
+        fred = Foo(price=100)
+        application.register_service(Foo, fred)
+        self.assertEqual(fred, a.foo)
+        self.assertEqual(fred, a.foo)
+        self.assertEqual(2, service_registry.lookups)
+
+        wilma = Foo(price=10)
+        wilma_id = application.register_service(Foo, wilma)
+        self.assertEqual(wilma, a.cheapest_foo)
+        self.assertEqual(wilma, a.cheapest_foo)
+        self.assertEqual(3, service_registry.lookups)
+
+        # Unregistering a service invalidates the cache too.
+        application.unregister_service(wilma_id)
+        self.assertEqual(fred, a.cheapest_foo)
+        self.assertEqual(4, service_registry.lookups)
+
+        # So does registering and unregistering services in bulk.
+        barney, betty = Foo(price=5), Foo(price=1)
+        service_ids = application.register_services(
+            [(Foo, barney, None), (Foo, betty, None)]
+        )
+        self.assertEqual(betty, a.cheapest_foo)
+        self.assertEqual(betty, a.cheapest_foo)
+        self.assertEqual(5, service_registry.lookups)
+
+        application.unregister_services(service_ids)
+        self.assertEqual(fred, a.cheapest_foo)
+        self.assertEqual(6, service_registry.lookups)
+
+        # Uncached services are looked up every time.
+        self.assertEqual(fred, a.uncached_foo)
+        self.assertEqual(fred, a.uncached_foo)
+        self.assertEqual(8, service_registry.lookups)
+
+        return
+
+    def test_cached_service_follows_application(self):
+        """ cached service follows application """
+
+        class Foo(HasTraits):
+            pass
+
+        class PluginA(Plugin):
+            id = 'A'
+            foo = Service(Foo)
+
+        a = PluginA()
+        application = TestApplication(plugins=[a])
+
+        fred = Foo()
+        application.register_service(Foo, fred)
+        self.assertEqual(fred, a.foo)
+
+        # Move the plugin to another application.
+        application.remove_plugin(a)
+        other = TestApplication(plugins=[a])
+
+        wilma = Foo()
+        other.register_service(Foo, wilma)
+        self.assertEqual(wilma, a.foo)
+
+        return
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
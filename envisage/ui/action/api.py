@@ -1,10 +1,14 @@
-from i_action_set import IActionSet
-from i_action_manager_builder import IActionManagerBuilder
+from envisage.lazy_module import install_lazy_module
 
-from abstract_action_manager_builder import AbstractActionManagerBuilder
-from action import Action
-from action_set import ActionSet
-from group import Group
-from menu import Menu
-from tool_bar import ToolBar
 
+install_lazy_module(__name__, {
+    'IActionSet'                   : 'i_action_set',
+    'IActionManagerBuilder'        : 'i_action_manager_builder',
+
+    'AbstractActionManagerBuilder' : 'abstract_action_manager_builder',
+    'Action'                       : 'action',
+    'ActionSet'                    : 'action_set',
+    'Group'                        : 'group',
+    'Menu'                         : 'menu',
+    'ToolBar'                      : 'tool_bar'
+})
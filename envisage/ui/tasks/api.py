@@ -1,6 +1,11 @@
-from preferences_category import PreferencesCategory
-from preferences_pane import PreferencesPane
-from task_extension import TaskExtension
-from task_factory import TaskFactory
-from task_window import TaskWindow
-from tasks_application import TasksApplication
+from envisage.lazy_module import install_lazy_module
+
+
+install_lazy_module(__name__, {
+    'PreferencesCategory' : 'preferences_category',
+    'PreferencesPane'     : 'preferences_pane',
+    'TaskExtension'       : 'task_extension',
+    'TaskFactory'         : 'task_factory',
+    'TaskWindow'          : 'task_window',
+    'TasksApplication'    : 'tasks_application'
+})
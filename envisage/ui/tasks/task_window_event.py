@@ -1,20 +1,29 @@
-# Enthought library imports.
-from traits.api import HasTraits, Instance, Vetoable
+class TaskWindowEvent(object):
+    """ A task window lifecycle event.
 
-# Local imports.
-from task_window import TaskWindow
+    This is a plain (slotted) object rather than a 'HasTraits' one because it
+    is only ever used to carry the window to listeners.
+    """
 
+    __slots__ = ('window',)
 
-class TaskWindowEvent(HasTraits):
-    """ A task window lifecycle event.
-    """
+    def __init__(self, window=None):
+        """ Constructor. """
 
-    # The window that the event occurred on.
-    window = Instance(TaskWindow)
+        # The window that the event occurred on.
+        self.window = window
 
 
-class VetoableTaskWindowEvent(TaskWindowEvent, Vetoable):
+class VetoableTaskWindowEvent(TaskWindowEvent):
     """ A vetoable task window lifecycle event.
     """
 
-    pass
+    __slots__ = ('veto',)
+
+    def __init__(self, window=None, veto=False):
+        """ Constructor. """
+
+        super(VetoableTaskWindowEvent, self).__init__(window=window)
+
+        # Should the request be vetoed? (Can only be set to 'True')
+        self.veto = veto
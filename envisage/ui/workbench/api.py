@@ -1,10 +1,14 @@
 """ Envisage package Copyright 2003, 2004, 2005 Enthought, Inc. """
 
 
-from workbench import Workbench
-from workbench_action_set import WorkbenchActionSet
-from workbench_application import WorkbenchApplication
-from workbench_window import WorkbenchWindow
+from envisage.lazy_module import install_lazy_module
 
 
+install_lazy_module(__name__, {
+    'Workbench'            : 'workbench',
+    'WorkbenchActionSet'   : 'workbench_action_set',
+    'WorkbenchApplication' : 'workbench_application',
+    'WorkbenchWindow'      : 'workbench_window'
+})
+
 #### EOF ######################################################################
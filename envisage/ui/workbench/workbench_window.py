@@ -198,6 +198,11 @@ class WorkbenchWindow(pyface.WorkbenchWindow):
 
         return service_id
 
+    def register_services(self, services):
+        """ Register multiple services. """
+
+        return self.service_registry.register_services(services)
+
     def set_service_properties(self, service_id, properties):
         """ Set the dictionary of properties associated with a service. """
 
@@ -212,6 +217,13 @@ class WorkbenchWindow(pyface.WorkbenchWindow):
 
         return
 
+    def unregister_services(self, service_ids):
+        """ Unregister multiple services. """
+
+        self.service_registry.unregister_services(service_ids)
+
+        return
+
     ###########################################################################
     # Private interface.
     ###########################################################################
@@ -228,23 +240,22 @@ class WorkbenchWindow(pyface.WorkbenchWindow):
     def _register_service_offers(self, service_offers):
         """ Register all service offers. """
 
-        return map(self._register_service_offer, service_offers)
-
-    def _register_service_offer(self, service_offer):
-        """ Register a service offer. """
+        services = []
+        for service_offer in service_offers:
+            # Add the window to the service offer properties (this is so that
+            # it is available to the factory when it is called to create the
+            # actual service).
+            service_offer.properties['window'] = self
 
-        # Add the window to the service offer properties (this is so that it
-        # is available to the factory when it is called to create the actual
-        # service).
-        service_offer.properties['window'] = self
+            services.append(
+                (
+                    service_offer.protocol,
+                    service_offer.factory,
+                    service_offer.properties
+                )
+            )
 
-        service_id = self.register_service(
-            protocol   = service_offer.protocol,
-            obj        = service_offer.factory,
-            properties = service_offer.properties
-        )
-
-        return service_id
+        return self.register_services(services)
 
     def _unregister_service_offers(self, service_ids):
         """ Unregister all service offers. """
@@ -254,8 +265,7 @@ class WorkbenchWindow(pyface.WorkbenchWindow):
         service_ids_copy = service_ids[:]
         service_ids_copy.reverse()
 
-        for service_id in service_ids_copy:
-            self.unregister_service(service_id)
+        self.unregister_services(service_ids_copy)
 
         return
 